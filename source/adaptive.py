@@ -0,0 +1,230 @@
+import argparse
+import csv
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from statistics import NormalDist
+from typing import Callable
+
+from cache import CACHE_DIRECTORY, ResultCache
+from engine import SimulationResult
+from sweep import SweepTask, derive_seed, run_tasks
+
+CONFIDENCE: float = 0.95            # confidence level of the intervals
+PRECISION: float = 0.05             # target half width of the intervals, relative to the mean (5%)
+BATCH_SIZE: int = 10                # runs added to each unfinished point per round
+MIN_RUNS: int = 10                  # runs of a point before its interval is trusted (it is too rough below that)
+MAX_RUNS: int = 1000                # runs of a point at most, for points which never reach the precision
+EXACT_T_DEGREES_OF_FREEDOM: int = 10  # t quantiles are exact up to this many degrees of freedom (see t_quantile())
+
+# metrics a point's runs are sampled for: name -> value of a run
+METRICS: dict[str, Callable[[SimulationResult], float]] = {
+    "moves": lambda result: result.moves,
+    "ttsw": lambda result: result.ttsw,
+    "lorot": lambda result: result.lorot,
+}
+
+
+class RunningStats:
+    """
+    Mean and variance of a stream of values, updated one value at a time with Welford's algorithm, which is
+    numerically stable and needs no memory of the values.
+
+    Methods:
+        add(value: float) -> None:
+            Adds a value.
+
+        variance() -> float:
+            Returns the sample variance of the values (0 for fewer than 2 values).
+
+        half_width(confidence: float) -> float:
+            Returns the half width of the confidence interval on the mean (inf for fewer than 2 values).
+    """
+
+    def __init__(self):
+        self.count: int = 0
+        self.mean: float = 0.0
+        self._m2: float = 0.0   # sum of the squared differences from the mean
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+
+    def variance(self) -> float:
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def half_width(self, confidence: float = CONFIDENCE) -> float:
+        if self.count < 2:
+            return math.inf
+        return t_quantile(0.5 + confidence / 2, self.count - 1) * math.sqrt(self.variance() / self.count)
+
+    def __repr__(self) -> str:
+        return f"RunningStats(count={self.count}, mean={self.mean:g}, std={math.sqrt(self.variance()):g})"
+
+
+def t_quantile(p: float, degrees_of_freedom: int) -> float:
+    """
+    Returns the p quantile (p >= 0.5) of Student's t distribution. Up to EXACT_T_DEGREES_OF_FREEDOM degrees of freedom,
+    which is where an adaptive sweep starts from, it is the exact value (the distribution function inverted by
+    bisection). Above that, it is the normal quantile corrected with the Cornish-Fisher expansion, within 0.02% of the
+    exact value for confidence levels up to 99.9%.
+    """
+    n = degrees_of_freedom
+    if n <= EXACT_T_DEGREES_OF_FREEDOM:
+        low, high = 0.0, 1.0
+        while _t_cdf(high, n) < p:
+            high *= 2
+        for _ in range(64):
+            middle = (low + high) / 2
+            if _t_cdf(middle, n) < p:
+                low = middle
+            else:
+                high = middle
+        return (low + high) / 2
+    z = NormalDist().inv_cdf(p)
+    return (z + (z ** 3 + z) / (4 * n) + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * n ** 2)
+            + (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / (384 * n ** 3)
+            + (79 * z ** 9 + 776 * z ** 7 + 1482 * z ** 5 - 1920 * z ** 3 - 945 * z) / (92160 * n ** 4))
+
+
+def _t_cdf(t: float, degrees_of_freedom: int) -> float:
+    """Returns the distribution function of Student's t distribution at t >= 0, in closed form (for whole degrees)."""
+    n = degrees_of_freedom
+    theta = math.atan(t / math.sqrt(n))
+    cos2 = math.cos(theta) ** 2
+    # the finite series of the distribution function, in cos^2 theta, whose terms depend on the parity of n
+    term = total = 1.0
+    for k in range(1, (n - 1) // 2 if n % 2 else n // 2):
+        term *= cos2 * (2 * k if n % 2 else 2 * k - 1) / (2 * k + 1 if n % 2 else 2 * k)
+        total += term
+    if n % 2 == 0:
+        a = math.sin(theta) * total
+    elif n == 1:
+        a = 2 / math.pi * theta
+    else:
+        a = 2 / math.pi * (theta + math.sin(theta) * math.cos(theta) * total)
+    return (1 + a) / 2
+
+
+@dataclass
+class SamplePoint:
+    """One point of an adaptive sweep: its parameters, and the running statistics of each metric over its runs."""
+
+    total_floors: int
+    capacity: int
+    num_requests: int
+    seed: int                       # seed the seeds of the point's runs are derived from
+    stats: dict[str, RunningStats] = field(default_factory=lambda: {metric: RunningStats() for metric in METRICS})
+    done: bool = False
+
+    @property
+    def runs(self) -> int:
+        return self.stats["moves"].count
+
+    def add(self, result: SimulationResult) -> None:
+        for metric, value in METRICS.items():
+            self.stats[metric].add(value(result))
+
+    def precise(self, metrics: list[str], precision: float, confidence: float) -> bool:
+        """Returns True if the interval of every metric is within precision of its mean."""
+        return all(self.stats[metric].half_width(confidence) <= precision * abs(self.stats[metric].mean)
+                   for metric in metrics)
+
+    def tasks(self, runs: int) -> list[SweepTask]:
+        """Returns the tasks of the point's next runs."""
+        return [SweepTask(run + 1, self.total_floors, self.capacity, self.num_requests, derive_seed(self.seed, run))
+                for run in range(self.runs, self.runs + runs)]
+
+
+def sample_adaptively(points: list[tuple[int, int, int]], metrics: list[str], precision: float = PRECISION,
+                      confidence: float = CONFIDENCE, batch_size: int = BATCH_SIZE, min_runs: int = MIN_RUNS,
+                      max_runs: int = MAX_RUNS, base_seed: int = 0, workers: int | None = None,
+                      cache: ResultCache | None = None) -> list[SamplePoint]:
+    """
+    Runs simulations of each (total_floors, capacity, num_requests) point until the confidence interval on the mean of
+    each of metrics (names in METRICS) is within precision of the mean (relative half width), or max_runs.
+
+    The points are run in rounds across a pool of worker processes: every round adds batch_size runs to each point
+    which is not precise enough yet, so points where the metrics vary little stop after min_runs, and the runs go to
+    the noisy points. The runs of a point draw their requests from seeds derived from the point's own seed, so the
+    result does not depend on the other points, the batch size, or the number of workers. If cache is given, runs
+    done before are reused (see sweep.run_tasks()).
+    """
+    unknown = [metric for metric in metrics if metric not in METRICS]
+    if unknown:
+        raise ValueError(f"metrics must be among: {', '.join(METRICS)}")
+    samples = [SamplePoint(floors, cap, requests, derive_seed(base_seed, i))
+               for i, (floors, cap, requests) in enumerate(points)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while True:
+            batches = [(point, point.tasks(min(max(batch_size, min_runs - point.runs), max_runs - point.runs)))
+                       for point in samples if not point.done]
+            if not batches:
+                break
+            tasks = [task for _, batch in batches for task in batch]
+            results = run_tasks(tasks, executor, workers, cache=cache)
+            for point, batch in batches:
+                for _ in batch:
+                    point.add(next(results))
+                point.done = point.runs >= max_runs or (
+                    point.runs >= min_runs and point.precise(metrics, precision, confidence))
+    return samples
+
+
+def write_summary(samples: list[SamplePoint], path: str, confidence: float = CONFIDENCE) -> None:
+    """Writes the number of runs, mean and confidence interval half width of every metric of each point to a csv file."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Total Floors", "Capacity", "Total Requests", "Runs"]
+                        + [f"{metric} {column}" for metric in METRICS for column in ("mean", "ci")])
+        for point in samples:
+            writer.writerow([point.total_floors, point.capacity, point.num_requests, point.runs]
+                            + [value for metric in METRICS for value in (point.stats[metric].mean,
+                                                                         point.stats[metric].half_width(confidence))])
+
+
+def _parse_list(text: str) -> list[int]:
+    return [int(value) for value in text.split(",")]
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run simulations of each point of a parameter grid until the confidence intervals of its metrics are tight enough.")
+    parser.add_argument("--floors", type=_parse_list, default=[10], help='total_floors values: "a,b,c"')
+    parser.add_argument("--capacity", type=_parse_list, default=[5], help='capacity values: "a,b,c"')
+    parser.add_argument("--requests", type=_parse_list, default=[30], help='num_requests values: "a,b,c"')
+    parser.add_argument("--metric", nargs="+", choices=list(METRICS), default=["ttsw"], help="metrics whose intervals must reach the precision")
+    parser.add_argument("--precision", type=float, default=PRECISION, help="target half width of the intervals, relative to the mean")
+    parser.add_argument("--confidence", type=float, default=CONFIDENCE, help="confidence level of the intervals")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="runs added to each unfinished point per round")
+    parser.add_argument("--min-runs", type=int, default=MIN_RUNS, help="runs of each point at least")
+    parser.add_argument("--max-runs", type=int, default=MAX_RUNS, help="runs of each point at most")
+    parser.add_argument("--seed", type=int, default=0, help="base seed of the sweep")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes (default: one per core)")
+    parser.add_argument("--output", "-o", default=None, help="csv file to write the summary of each point to")
+    parser.add_argument("--cache", nargs="?", const=CACHE_DIRECTORY, default=None, metavar="DIR", help=f"reuse the results of earlier runs, cached in DIR (default {CACHE_DIRECTORY})")
+    return parser.parse_args()
+
+
+def main():
+    args = _parse_args()
+    points = [(floors, cap, requests) for floors in args.floors for cap in args.capacity for requests in args.requests]
+    cache = ResultCache(args.cache) if args.cache else None
+    samples = sample_adaptively(points, args.metric, args.precision, args.confidence, args.batch_size, args.min_runs,
+                                args.max_runs, args.seed, args.workers, cache)
+
+    print(f"{'floors':>6} {'capacity':>8} {'requests':>8} {'runs':>5}"
+          + "".join(f" {metric + ' (' + format(args.confidence, '.0%') + ' CI)':>26}" for metric in METRICS))
+    for point in samples:
+        cells = "".join(f" {point.stats[metric].mean:>14.2f} ± {point.stats[metric].half_width(args.confidence):<9.2f}"
+                        for metric in METRICS)
+        print(f"{point.total_floors:>6} {point.capacity:>8} {point.num_requests:>8} {point.runs:>5}{cells}")
+    print(f"{sum(point.runs for point in samples)} runs in total")
+    if args.output:
+        write_summary(samples, args.output, args.confidence)
+
+if __name__ == "__main__":
+    main()
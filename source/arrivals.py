@@ -0,0 +1,195 @@
+import csv
+import random
+
+from request import Request
+
+STEPS_PER_HOUR: int = 360       # simulation steps in an hour of building time (one step is about 10 seconds)
+LOBBY_FLOOR: int = 1            # floor people enter and leave the building from
+
+# Time of day profile for an office building: (start hour, requests per hour, share of requests going up from the
+# lobby, share of requests going down to the lobby). The remaining share is inter-floor traffic.
+OFFICE_DAY_PROFILE: list[tuple[float, float, float, float]] = [
+    (0, 10, 0.3, 0.3),
+    (7, 300, 0.85, 0.05),       # morning up-peak
+    (9, 120, 0.2, 0.2),
+    (12, 250, 0.15, 0.7),       # lunch, going out
+    (13, 250, 0.7, 0.15),       # lunch, coming back
+    (14, 120, 0.2, 0.2),
+    (17, 300, 0.05, 0.85),      # evening down-peak
+    (19, 30, 0.2, 0.5),
+]
+
+
+class PoissonArrivals:
+    """
+    Stream of requests made at random, at a constant average rate (a Poisson process), with origin and destination
+    floors drawn uniformly. Yields (step, request) pairs in order of step, for SimulationEngine.add_arrivals().
+    The stream is infinite unless until is given; requests are only created as the stream is read.
+    """
+
+    def __init__(self, rate: float, total_floors: int, seed: int | None = None, until: int | None = None):
+        self.rate: float = rate                     # average number of requests per step
+        self.total_floors: int = total_floors
+        self.until: int | None = until              # the stream ends at this step
+        self.rng: random.Random = random.Random(seed)
+        self.time: float = 0.0
+
+    def __iter__(self) -> "PoissonArrivals":
+        return self
+
+    def __next__(self) -> tuple[int, Request]:
+        if self.rate <= 0:
+            raise StopIteration
+        self.time += self.rng.expovariate(self.rate)
+        if self.until is not None and self.time >= self.until:
+            raise StopIteration
+        return int(self.time), _random_request(self.rng, self.total_floors, 0.0, 0.0)
+
+
+class ProfileArrivals:
+    """
+    Stream of requests following a time of day profile (see OFFICE_DAY_PROFILE): within each period of the profile,
+    requests are made as a Poisson process at the period's rate, and split between up-peak traffic (from the lobby),
+    down-peak traffic (to the lobby) and inter-floor traffic. The profile repeats every day, and the stream ends after
+    the given number of days.
+    """
+
+    def __init__(self, total_floors: int, profile: list[tuple[float, float, float, float]] = OFFICE_DAY_PROFILE,
+                 seed: int | None = None, days: float = 1, steps_per_hour: int = STEPS_PER_HOUR):
+        self.total_floors: int = total_floors
+        self.profile: list[tuple[float, float, float, float]] = profile
+        self.steps_per_hour: int = steps_per_hour
+        self.until: float = days * 24 * steps_per_hour
+        self.rng: random.Random = random.Random(seed)
+        self.time: float = 0.0
+
+    def __iter__(self) -> "ProfileArrivals":
+        return self
+
+    def _period(self, time: float) -> tuple[float, float, float, float]:
+        """Returns (rate per step, up share, down share, start of the next period) of the period containing time."""
+        day_length = 24 * self.steps_per_hour
+        day_start = time - time % day_length
+        hour = (time - day_start) / self.steps_per_hour
+        index = max(i for i, period in enumerate(self.profile) if period[0] <= hour)
+        _, per_hour, up_share, down_share = self.profile[index]
+        next_hour = self.profile[index + 1][0] if index + 1 < len(self.profile) else 24
+        return per_hour / self.steps_per_hour, up_share, down_share, day_start + next_hour * self.steps_per_hour
+
+    def __next__(self) -> tuple[int, Request]:
+        while self.time < self.until:
+            rate, up_share, down_share, period_end = self._period(self.time)
+            arrival = self.time + self.rng.expovariate(rate) if rate > 0 else period_end
+            if arrival < period_end:
+                # the rate is constant until period_end, and the process is memoryless, so we can draw the next
+                # arrival from the current period and start over from the period boundary if it falls past it
+                self.time = arrival
+                if self.time >= self.until:
+                    break
+                return int(self.time), _random_request(self.rng, self.total_floors, up_share, down_share)
+            self.time = period_end
+        raise StopIteration
+
+
+class TraceArrivals:
+    """
+    Replays requests recorded in a csv file with a "step,origin,destination" header, sorted by step. The file is read
+    one line at a time, so a trace of any length runs in constant memory. The stream can be pickled (for example in a
+    SimulationEngine snapshot): it is reopened at the same position when unpickled.
+    """
+
+    def __init__(self, path: str):
+        self.path: str = path
+        self._file = open(path, newline="")
+        header = next(csv.reader([self._file.readline()]))
+        self._columns: tuple[int, int, int] = (header.index("step"), header.index("origin"), header.index("destination"))
+
+    def __iter__(self) -> "TraceArrivals":
+        return self
+
+    def __next__(self) -> tuple[int, Request]:
+        while self._file is not None:
+            line = self._file.readline()
+            if not line:
+                self._file.close()
+                self._file = None
+                break
+            if not line.strip():
+                continue
+            row = next(csv.reader([line]))
+            step, origin, destination = (int(row[column]) for column in self._columns)
+            return step, Request(origin, destination)
+        raise StopIteration
+
+    def __getstate__(self) -> dict:
+        return {"path": self.path, "columns": self._columns,
+                "position": self._file.tell() if self._file is not None else None}
+
+    def __setstate__(self, state: dict) -> None:
+        self.path = state["path"]
+        self._columns = state["columns"]
+        self._file = None
+        if state["position"] is not None:
+            self._file = open(self.path, newline="")
+            self._file.seek(state["position"])
+
+
+class ArrivalCursor:
+    """
+    Reads a stream of (step, request) pairs lazily, one arrival ahead, for callers which advance the simulation
+    themselves (like the GUI) rather than through SimulationEngine.
+
+    Methods:
+        release(step: int) -> list[Request]:
+            Returns the requests made up to (and including) step, which have not been returned yet.
+
+        exhausted() -> bool:
+            Returns True once every request of the stream has been returned.
+    """
+
+    def __init__(self, stream):
+        self._stream = iter(stream)
+        self._next: tuple[int, Request] | None = next(self._stream, None)
+
+    def release(self, step: int) -> list[Request]:
+        released: list[Request] = []
+        while self._next is not None and self._next[0] <= step:
+            released.append(self._next[1])
+            self._next = next(self._stream, None)
+        return released
+
+    def exhausted(self) -> bool:
+        return self._next is None
+
+
+def _random_request(rng: random.Random, total_floors: int, up_share: float, down_share: float) -> Request:
+    """Draws a request: from the lobby with probability up_share, to the lobby with probability down_share, else inter-floor."""
+    draw = rng.random()
+    if draw < up_share:
+        return Request(LOBBY_FLOOR, rng.randint(LOBBY_FLOOR + 1, total_floors))
+    if draw < up_share + down_share:
+        return Request(rng.randint(LOBBY_FLOOR + 1, total_floors), LOBBY_FLOOR)
+    origin = rng.randint(1, total_floors)
+    destination = rng.randint(1, total_floors - 1)
+    if destination >= origin:
+        destination += 1    # uniform over the other floors, without a retry loop
+    return Request(origin, destination)
+
+
+ARRIVAL_PROFILES: list[str] = ["none", "poisson", "office_day"]
+
+
+def make_arrivals(name: str, total_floors: int, rate: float = 0.1, seed: int | None = None, until: int | None = None):
+    """
+    Returns a new arrival stream from its name (one of ARRIVAL_PROFILES), or None for "none".
+    rate is the average number of requests per step for "poisson"; until is the step the stream ends at (for
+    "office_day", it defaults to the end of the first day).
+    """
+    if name == "none":
+        return None
+    if name == "poisson":
+        return PoissonArrivals(rate, total_floors, seed, until)
+    if name == "office_day":
+        days = until / (24 * STEPS_PER_HOUR) if until is not None else 1
+        return ProfileArrivals(total_floors, seed=seed, days=days)
+    raise ValueError(f"Unknown arrival profile {name!r}, must be one of: {', '.join(ARRIVAL_PROFILES)}")
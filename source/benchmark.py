@@ -0,0 +1,226 @@
+import argparse
+import cProfile
+import json
+import os
+import platform
+import pstats
+import subprocess
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+
+from arrivals import make_arrivals
+from dispatcher import make_dispatcher
+from engine import SimulationEngine, setup_simulation
+
+HISTORY_PATH: str = os.path.join("performance_data", "benchmarks", "history.jsonl") # benchmark results, one json object per line
+DEFAULT_THRESHOLD: float = 0.10     # relative slowdown (or memory increase) reported as a regression by compare
+PROFILED_FUNCTIONS: int = 15        # number of functions (by own time) kept from the profile of each scenario
+BENCHMARK_SEED: int = 0             # every scenario draws its requests from this seed, so runs are comparable
+MIN_TIMED_SECONDS: float = 0.2      # short scenarios are run again and again for at least this long, for a stable timing
+
+
+@dataclass(frozen=True)
+class BenchmarkScenario:
+    """
+    Parameters of one benchmark: a building and the requests made to it. num_requests are made at the start of the
+    run; if arrivals is not "none", requests are also made over time from that arrival profile until duration.
+    """
+
+    name: str
+    total_floors: int
+    capacity: int
+    num_requests: int
+    num_lifts: int = 1
+    arrivals: str = "none"
+    arrival_rate: float = 0.1
+    duration: int | None = None
+    event_driven: bool = False
+    vectorized: bool = False
+
+
+SCENARIOS: dict[str, BenchmarkScenario] = {
+    "tiny": BenchmarkScenario("tiny", total_floors=10, capacity=5, num_requests=30),
+    "office": BenchmarkScenario("office", total_floors=40, capacity=12, num_requests=0, num_lifts=6,
+                                arrivals="office_day"),
+    "skyscraper": BenchmarkScenario("skyscraper", total_floors=500, capacity=20, num_requests=20000, num_lifts=8),
+    "million": BenchmarkScenario("million", total_floors=60, capacity=20, num_requests=1_000_000, num_lifts=12,
+                                 event_driven=True, vectorized=True),
+}
+DEFAULT_SCENARIOS: list[str] = ["tiny", "office", "skyscraper"]     # "million" takes minutes, so it is opt-in
+
+
+def _setup(scenario: BenchmarkScenario) -> SimulationEngine:
+    arrivals = make_arrivals(scenario.arrivals, scenario.total_floors, scenario.arrival_rate, BENCHMARK_SEED,
+                             scenario.duration)
+    return setup_simulation(scenario.total_floors, scenario.capacity, scenario.num_requests, record_lor=False,
+                            event_driven=scenario.event_driven, num_lifts=scenario.num_lifts,
+                            dispatcher=make_dispatcher("eta"), seed=BENCHMARK_SEED, vectorized=scenario.vectorized,
+                            arrivals=arrivals)
+
+
+def _time_run(scenario: BenchmarkScenario) -> tuple[int, float]:
+    """
+    Runs the scenario and returns (number of steps, seconds spent in the run, excluding the setup). A scenario which
+    runs in less than MIN_TIMED_SECONDS is run several times, and the time is the average over those runs.
+    """
+    runs = 0
+    seconds = 0.0
+    while seconds < MIN_TIMED_SECONDS:
+        engine = _setup(scenario)
+        start = time.perf_counter()
+        result = engine.run()
+        seconds += time.perf_counter() - start
+        runs += 1
+    return result.steps, seconds / runs
+
+
+def _peak_memory(scenario: BenchmarkScenario) -> int:
+    """Returns the peak memory allocated (in bytes) while setting up and running the scenario."""
+    tracemalloc.start()
+    try:
+        _setup(scenario).run()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _profile(scenario: BenchmarkScenario) -> list[dict]:
+    """Runs the scenario under cProfile and returns the functions which took the most time of their own."""
+    engine = _setup(scenario)
+    profiler = cProfile.Profile()
+    profiler.runcall(engine.run)
+    functions = []
+    for (path, line, name), (_, calls, own_time, total_time, _) in pstats.Stats(profiler).stats.items():
+        functions.append({"function": f"{os.path.basename(path)}:{line}({name})", "calls": calls,
+                          "own_seconds": round(own_time, 6), "total_seconds": round(total_time, 6)})
+    functions.sort(key=lambda function: function["own_seconds"], reverse=True)
+    return functions[:PROFILED_FUNCTIONS]
+
+
+def _git_commit() -> str | None:
+    """Returns the hash of the checked out commit, or None if it is not available."""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(scenario: BenchmarkScenario, repeat: int = 3, memory: bool = True, profile: bool = True) -> dict:
+    """
+    Benchmarks one scenario and returns its record for the history file. The speed is the best of repeat timed runs;
+    the peak memory and the profile are measured in separate runs, since tracing and profiling slow the run down.
+    """
+    timings = [_time_run(scenario) for _ in range(repeat)]
+    steps, seconds = min(timings, key=lambda timing: timing[1])
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "scenario": asdict(scenario),
+        "steps": steps,
+        "seconds": round(seconds, 6),
+        "steps_per_second": round(steps / seconds, 1) if seconds else None,
+        "peak_memory_bytes": _peak_memory(scenario) if memory else None,
+        "functions": _profile(scenario) if profile else [],
+    }
+
+
+def append_history(records: list[dict], history_path: str = HISTORY_PATH) -> None:
+    os.makedirs(os.path.dirname(history_path) or ".", exist_ok=True)
+    with open(history_path, "a") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+
+
+def read_history(history_path: str = HISTORY_PATH) -> list[dict]:
+    with open(history_path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def compare(history: list[dict], threshold: float = DEFAULT_THRESHOLD, baseline: str | None = None) -> list[str]:
+    """
+    Compares the latest record of each scenario with an earlier one: the latest record from commit baseline if given,
+    otherwise the record just before it. Returns a description of each regression, that is a speed drop or a peak memory
+    increase of more than threshold (as a fraction); an empty list means there is none.
+    """
+    regressions: list[str] = []
+    for name in dict.fromkeys(record["scenario"]["name"] for record in history):
+        records = [record for record in history if record["scenario"]["name"] == name]
+        latest = records[-1]
+        earlier = [record for record in records[:-1] if baseline is None or record["commit"] == baseline]
+        if not earlier:
+            continue
+        reference = earlier[-1]
+        if latest["scenario"] != reference["scenario"]:
+            continue    # the scenario was changed, so the results are not comparable
+        speed, reference_speed = latest["steps_per_second"], reference["steps_per_second"]
+        if speed and reference_speed and speed < reference_speed * (1 - threshold):
+            regressions.append(f"{name}: {speed:,.0f} steps/s, down {1 - speed / reference_speed:.1%} "
+                               f"from {reference_speed:,.0f} ({reference['commit']})")
+        memory, reference_memory = latest["peak_memory_bytes"], reference["peak_memory_bytes"]
+        if memory and reference_memory and memory > reference_memory * (1 + threshold):
+            regressions.append(f"{name}: peak memory {memory / 2**20:.1f} MiB, up {memory / reference_memory - 1:.1%} "
+                               f"from {reference_memory / 2**20:.1f} MiB ({reference['commit']})")
+    return regressions
+
+
+def _print_record(record: dict) -> None:
+    memory = record["peak_memory_bytes"]
+    print(f"{record['scenario']['name']}: {record['steps']} steps in {record['seconds']:.3f} s "
+          f"({record['steps_per_second']:,.0f} steps/s)"
+          + (f", peak memory {memory / 2**20:.1f} MiB" if memory is not None else ""))
+    for function in record["functions"]:
+        print(f"    {function['own_seconds']:9.4f} s own {function['total_seconds']:9.4f} s total "
+              f"{function['calls']:>10} calls  {function['function']}")
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the compute cost of the simulation and track regressions.")
+    parser.add_argument("--history", default=HISTORY_PATH, help="history file the results are appended to / read from")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="run the benchmark scenarios and append the results to the history file")
+    run.add_argument("scenarios", nargs="*", default=DEFAULT_SCENARIOS,
+                     help=f"scenarios to run, among {', '.join(SCENARIOS)}, or all (default: {' '.join(DEFAULT_SCENARIOS)})")
+    run.add_argument("--repeat", type=int, default=3, help="number of timed runs per scenario (the best one is kept)")
+    run.add_argument("--no-memory", action="store_true", help="do not measure the peak memory")
+    run.add_argument("--no-profile", action="store_true", help="do not profile the functions")
+    run.add_argument("--dry-run", action="store_true", help="print the results without writing them to the history file")
+
+    compare_command = commands.add_parser("compare", help="compare the latest results with earlier ones")
+    compare_command.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                                 help="relative change reported as a regression (default: %(default)s)")
+    compare_command.add_argument("--baseline", default=None, help="commit to compare with (default: the previous run)")
+    return parser.parse_args()
+
+
+def main():
+    args = _parse_args()
+    if args.command == "run":
+        names = list(SCENARIOS) if "all" in args.scenarios else args.scenarios
+        unknown = [name for name in names if name not in SCENARIOS]
+        if unknown:
+            sys.exit(f"Unknown scenario {', '.join(unknown)}, must be one of: {', '.join(SCENARIOS)}, all")
+        records = []
+        for name in names:
+            record = run_benchmark(SCENARIOS[name], args.repeat, not args.no_memory, not args.no_profile)
+            _print_record(record)
+            records.append(record)
+        if not args.dry_run:
+            append_history(records, args.history)
+            print(f"Appended {len(records)} results to {args.history}")
+        return
+
+    regressions = compare(read_history(args.history), args.threshold, args.baseline)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if regressions:
+        sys.exit(1)
+    print("No regression.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+from dispatcher import Dispatcher, EtaDispatcher
+from lift import DwellTimeModel, Lift
+from req_queue import ReqQueue
+from request import Request
+from scheduling import Scheduler
+
+class Building:
+    """
+    This class implements a bank of lifts serving one building. New requests (hall calls) go into a shared pool, and
+    are handed to a lift by the dispatcher at the start of the next step. Each lift then serves the requests it was
+    assigned with its scheduler (see Lift and scheduling.py; all the lifts share the same one).
+
+    Attributes:
+        total_floors (int):           Number of floors in the building.
+        lifts (list[Lift]):           The lifts of the bank.
+        hall_calls (ReqQueue):        Requests which have not been assigned to a lift yet.
+        dispatcher (Dispatcher):      Decides which lift serves each request.
+        clock (int):                  Number of steps since the start of the simulation (read only).
+
+    Public methods:
+        __init__()
+        add_request()
+        dispatch()
+        move()
+        travel()
+        waiting_count()
+        onboard_count()
+        waiting_counts()
+        is_idle()
+    """
+
+    def __init__(self, total_floors: int, capacity: int, num_lifts: int = 1, dispatcher: Dispatcher | None = None,
+                 dwell_model: DwellTimeModel | None = None, scheduler: Scheduler | None = None):
+        self.total_floors: int = total_floors
+        self.lifts: list[Lift] = [Lift(total_floors, capacity, dwell_model, scheduler) for _ in range(num_lifts)]
+        self.hall_calls: ReqQueue = ReqQueue()
+        self.dispatcher: Dispatcher = dispatcher if dispatcher is not None else EtaDispatcher()
+
+
+    @property
+    def clock(self) -> int:
+        """Number of steps since the start of the simulation (all the lifts move in lockstep)."""
+        return self.lifts[0].clock
+
+
+    def add_request(self, req: Request) -> None:
+        """Adds a new request to the pool of hall calls, and timestamps its arrival."""
+        req.arrival_time = self.clock
+        self.hall_calls.add_request(req)
+
+
+    def dispatch(self) -> None:
+        """Assigns every pending hall call to a lift."""
+        if not self.hall_calls:
+            return
+        if len(self.lifts) == 1:
+            for req in self.hall_calls:
+                self.lifts[0].request_queue.add_request(req)
+            self.hall_calls = ReqQueue()
+            return
+        for req in self.hall_calls.get_requests():
+            lift = self.lifts[self.dispatcher.assign(req, self.lifts)]
+            lift.request_queue.add_request(req)
+            self.hall_calls.remove_request(req)
+
+
+    def move(self) -> None:
+        """Dispatches pending hall calls, then moves every lift by one step."""
+        self.dispatch()
+        for lift in self.lifts:
+            lift.move()
+
+
+    def travel(self, max_moves: int) -> int:
+        """
+        Dispatches pending hall calls, then moves every lift up to the next step where one of them stops, without going
+        through the steps in between (see Lift.travel()). Returns the number of steps this stands for.
+        """
+        self.dispatch()
+        moves = max_moves
+        for lift in self.lifts:
+            lift_moves = lift.moves_to_next_stop()
+            if lift_moves is not None and lift_moves < moves:
+                moves = lift_moves
+        for lift in self.lifts:
+            lift.travel(moves)
+        return moves
+
+
+    def waiting_count(self) -> int:
+        """Returns the number of requests waiting for a lift."""
+        return len(self.hall_calls) + sum(len(lift.request_queue) for lift in self.lifts)
+
+
+    def onboard_count(self) -> int:
+        """Returns the number of people onboard any of the lifts."""
+        return sum(len(lift.onboard_requests) for lift in self.lifts)
+
+
+    def waiting_counts(self) -> dict[int, int]:
+        """Returns the number of requests waiting on each floor, whichever lift they are waiting for."""
+        waiting_counts = self.hall_calls.waiting_counts()
+        for lift in self.lifts:
+            for floor, count in lift.request_queue.waiting_counts().items():
+                waiting_counts[floor] = waiting_counts.get(floor, 0) + count
+        return waiting_counts
+
+
+    def is_idle(self) -> bool:
+        """Returns True if nobody is waiting for a lift or onboard one."""
+        return self.waiting_count() == 0 and self.onboard_count() == 0
+
+
+    def __repr__(self) -> str:
+        return f"Building(total_floors={self.total_floors}, lifts={self.lifts}, hall_calls={self.hall_calls})"
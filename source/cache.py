@@ -0,0 +1,212 @@
+import hashlib
+import json
+import os
+import pickle
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable
+
+from engine import SimulationResult
+
+CACHE_DIRECTORY: str = os.path.join("performance_data", "cache")   # default directory of the on-disk tier
+MEMORY_ENTRIES: int = 256               # results kept in memory (least recently used first out)
+DISK_BYTES: int = 512 * 1024 * 1024     # size of the on-disk tier, beyond which the least recently used results are deleted
+CACHE_FORMAT: int = 1                   # bumped when the way results are stored changes, to ignore older entries
+
+# modules whose code decides the result of a run: when any of them changes, every cached result is out of date
+FINGERPRINT_MODULES: list[str] = [
+    "lift.py", "req_queue.py", "scheduling.py", "dispatcher.py", "building.py", "engine.py", "floor_index.py",
+    "request.py", "request_simulator.py", "arrivals.py", "direction.py", "latency.py",
+]
+IGNORED_KEYS: list[str] = ["scenario", "seed"]     # config keys which do not change the result of a run with a given seed
+
+
+@dataclass
+class CacheStats:
+    """Counters of a ResultCache."""
+
+    memory_hits: int = 0    # results found in memory
+    disk_hits: int = 0      # results read from the on-disk tier
+    misses: int = 0         # results which had to be simulated
+    evictions: int = 0      # files deleted from the on-disk tier to keep it under its size
+
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.disk_hits
+
+
+@lru_cache(maxsize=None)
+def code_fingerprint() -> str:
+    """Returns a hash of the source of FINGERPRINT_MODULES (computed once per process)."""
+    digest = hashlib.sha256()
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for module in FINGERPRINT_MODULES:
+        digest.update(module.encode())
+        with open(os.path.join(directory, module), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Content addressed cache of simulation results. A run with a given seed is deterministic, so its result only depends
+    on its configuration, its seed and the code of the simulation: the key of a result is a hash of all three (see
+    key()), and a result can be reused for as long as the key matches. Changing any parameter, the seed, or the code
+    of the simulation (FINGERPRINT_MODULES) gives a new key, so results never go stale.
+
+    There are two tiers. The memory tier holds the latest memory_entries results in the process. The on-disk tier
+    holds one pickle file per result under directory (shared by every process using it, and kept between runs); once
+    it grows over disk_bytes, the least recently used files are deleted. directory can be None for a cache in memory
+    only.
+
+    Methods:
+        key(config: dict, seed: int, **options) -> str:
+            Returns the key of the result of a run (options are any other arguments which change the result).
+
+        get(key: str) -> SimulationResult | None:
+            Returns the cached result, or None.
+
+        put(key: str, result: SimulationResult) -> None:
+            Adds a result to the cache.
+
+        get_or_run(key: str, run: Callable[[], SimulationResult]) -> SimulationResult:
+            Returns the cached result, or runs the simulation and caches its result.
+
+        clear() -> None:
+            Empties both tiers.
+    """
+
+    def __init__(self, directory: str | None = CACHE_DIRECTORY, memory_entries: int = MEMORY_ENTRIES,
+                 disk_bytes: int = DISK_BYTES):
+        self.directory: str | None = directory
+        self.memory_entries: int = memory_entries
+        self.disk_bytes: int = disk_bytes
+        self.stats: CacheStats = CacheStats()
+        self._memory: OrderedDict[str, SimulationResult] = OrderedDict()
+        self._disk_usage: int | None = None     # bytes used by the on-disk tier, measured on the first write
+
+    def key(self, config: dict, seed: int, **options) -> str:
+        """
+        Returns the key of the result of a run: a sha256 hash of config (as returned by parse_config(); the scenario
+        name and the config's own seed are left out), seed, options and code_fingerprint().
+        """
+        parameters = {name: value for name, value in config.items() if name not in IGNORED_KEYS}
+        content = json.dumps({"format": CACHE_FORMAT, "config": parameters, "seed": seed, "options": options,
+                              "code": code_fingerprint()}, sort_keys=True)
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    def get(self, key: str) -> SimulationResult | None:
+        result = self._memory.get(key)
+        if result is not None:
+            self._memory.move_to_end(key)
+            self.stats.memory_hits += 1
+            return result
+        result = self._read(key)
+        if result is None:
+            self.stats.misses += 1
+            return None
+        self.stats.disk_hits += 1
+        self._remember(key, result)
+        return result
+
+    def put(self, key: str, result: SimulationResult) -> None:
+        self._remember(key, result)
+        if self.directory is not None:
+            self._write(key, result)
+
+    def get_or_run(self, key: str, run: Callable[[], SimulationResult]) -> SimulationResult:
+        result = self.get(key)
+        if result is None:
+            result = run()
+            self.put(key, result)
+        return result
+
+    def clear(self) -> None:
+        self._memory.clear()
+        for path, _, _ in self._disk_files():
+            self._delete(path)
+        self._disk_usage = 0
+
+    def _remember(self, key: str, result: SimulationResult) -> None:
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.pkl")
+
+    def _read(self, key: str) -> SimulationResult | None:
+        if self.directory is None:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                result = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            self._delete(path)  # unreadable (for example written by an older version of the code): simulate again
+            return None
+        try:
+            os.utime(path)      # the modification time of a file is the last time it was used, for the eviction
+        except OSError:
+            pass
+        return result
+
+    def _write(self, key: str, result: SimulationResult) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        # written to a temporary file first, so other processes never read a partial file
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        with open(temporary_path, "wb") as f:
+            f.write(data)
+        os.replace(temporary_path, path)
+
+        if self._disk_usage is None:
+            self._disk_usage = sum(size for _, size, _ in self._disk_files())
+        else:
+            self._disk_usage += len(data)
+        if self._disk_usage > self.disk_bytes:
+            self._evict()
+
+    def _evict(self) -> None:
+        """Deletes the least recently used files until the on-disk tier is back under 90% of disk_bytes."""
+        files = sorted(self._disk_files(), key=lambda file: file[2])
+        usage = sum(size for _, size, _ in files)
+        for path, size, _ in files:
+            if usage <= self.disk_bytes * 0.9:
+                break
+            self._delete(path)
+            usage -= size
+            self.stats.evictions += 1
+        self._disk_usage = usage
+
+    def _disk_files(self) -> list[tuple[str, int, float]]:
+        """Returns the path, size and last use time of every file of the on-disk tier."""
+        files = []
+        if self.directory is None or not os.path.isdir(self.directory):
+            return files
+        for entry in os.scandir(self.directory):
+            if not entry.is_dir():
+                continue
+            for file in os.scandir(entry.path):
+                if file.name.endswith(".pkl"):
+                    try:
+                        stat = file.stat()
+                    except FileNotFoundError:
+                        continue    # deleted by another process
+                    files.append((file.path, stat.st_size, stat.st_mtime))
+        return files
+
+    def _delete(self, path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def __repr__(self) -> str:
+        return (f"ResultCache(directory={self.directory!r}, in memory={len(self._memory)}, "
+                f"hits={self.stats.hits}, misses={self.stats.misses})")
@@ -0,0 +1,167 @@
+import argparse
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+from arrivals import ARRIVAL_PROFILES, make_arrivals
+from dispatcher import DISPATCHERS, make_dispatcher
+from engine import SimulationResult, setup_simulation
+from latency import LatencyHistogram
+from scheduling import SCHEDULERS, make_scheduler
+from sweep import derive_seed
+
+# metrics the strategies are ranked by (lower is better for all of them): name -> column header
+RANKING_METRICS: dict[str, str] = {
+    "ttsw": "TTSW",
+    "moves": "Moves",
+    "wait_p99": "Wait p99",
+    "cpu": "CPU us/step",
+}
+
+
+@dataclass(frozen=True)
+class Workload:
+    """The building and the requests every strategy is run on (the requests are drawn from each run's seed)."""
+
+    total_floors: int
+    capacity: int
+    num_lifts: int
+    num_requests: int
+    arrivals: str = "none"
+    arrival_rate: float = 0.1
+    duration: int | None = None
+
+
+@dataclass(frozen=True)
+class ComparisonTask:
+    """One run of one strategy: a scheduler and a dispatcher, on the workload drawn from seed."""
+
+    scheduler: str
+    dispatcher: str
+    run: int
+    seed: int
+    workload: Workload
+    event_driven: bool = True
+
+    @property
+    def strategy(self) -> str:
+        return f"{self.scheduler}/{self.dispatcher}"
+
+
+@dataclass
+class StrategyScore:
+    """Results of one strategy over all the runs of a comparison."""
+
+    strategy: str
+    runs: int = 0
+    steps: int = 0
+    ttsw: int = 0
+    moves: int = 0
+    cpu_seconds: float = 0.0
+    wait_times: LatencyHistogram = field(default_factory=LatencyHistogram)
+
+    def metric(self, name: str) -> float:
+        """Returns a ranking metric (see RANKING_METRICS): means per run for TTSW and moves, lower is better for all."""
+        if name == "ttsw":
+            return self.ttsw / self.runs
+        if name == "moves":
+            return self.moves / self.runs
+        if name == "wait_p99":
+            return self.wait_times.percentile(99)
+        return self.cpu_seconds * 1e6 / self.steps if self.steps else 0.0
+
+
+def run_comparison_task(task: ComparisonTask) -> tuple[SimulationResult, float]:
+    """
+    Runs one task and returns its result and the CPU time the run took (excluding the setup). This runs in the
+    worker processes; CPU time rather than wall time is used, so that runs sharing the machine do not slow each other
+    down in the measure.
+    """
+    workload = task.workload
+    arrivals = make_arrivals(workload.arrivals, workload.total_floors, workload.arrival_rate, task.seed,
+                             workload.duration)
+    engine = setup_simulation(workload.total_floors, workload.capacity, workload.num_requests, record_lor=False,
+                              event_driven=task.event_driven, num_lifts=workload.num_lifts,
+                              dispatcher=make_dispatcher(task.dispatcher), seed=task.seed, arrivals=arrivals,
+                              scheduler=make_scheduler(task.scheduler))
+    start = time.process_time()
+    result = engine.run()
+    return result, time.process_time() - start
+
+
+def compare_strategies(workload: Workload, schedulers: list[str], dispatchers: list[str], runs: int = 10,
+                       base_seed: int = 0, workers: int | None = None,
+                       event_driven: bool = True) -> list[StrategyScore]:
+    """
+    Runs every combination of scheduler and dispatcher runs times across a pool of worker processes, and returns the
+    score of each. Run i of every strategy draws its requests from the same seed, so all the strategies are compared
+    on identical workloads.
+    """
+    tasks = [ComparisonTask(scheduler, dispatcher, run, derive_seed(base_seed, run), workload, event_driven)
+             for run in range(runs) for scheduler in schedulers for dispatcher in dispatchers]
+    scores: dict[str, StrategyScore] = {}
+    for task in tasks:
+        scores.setdefault(task.strategy, StrategyScore(task.strategy))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for task, (result, cpu_seconds) in zip(tasks, executor.map(run_comparison_task, tasks)):
+            score = scores[task.strategy]
+            score.runs += 1
+            score.steps += result.steps
+            score.ttsw += result.ttsw
+            score.moves += result.moves
+            score.cpu_seconds += cpu_seconds
+            score.wait_times.merge(result.wait_times)
+    return list(scores.values())
+
+
+def rank(scores: list[StrategyScore], metric: str) -> list[StrategyScore]:
+    """Returns the scores from best to worst by metric (one of RANKING_METRICS)."""
+    return sorted(scores, key=lambda score: score.metric(metric))
+
+
+def format_ranking(scores: list[StrategyScore], rank_by: str) -> str:
+    """Returns a table of the strategies, best first by rank_by, with the rank of each on every metric in brackets."""
+    ranks = {metric: {score.strategy: position for position, score in enumerate(rank(scores, metric), 1)}
+             for metric in RANKING_METRICS}
+    lines = [f"{'#':>2} {'strategy':<24}" + "".join(f" {header:>17}" for header in RANKING_METRICS.values())]
+    for position, score in enumerate(rank(scores, rank_by), 1):
+        cells = "".join(f" {score.metric(metric):>12.2f} ({ranks[metric][score.strategy]})" for metric in RANKING_METRICS)
+        lines.append(f"{position:>2} {score.strategy:<24}{cells}")
+    return "\n".join(lines)
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compare lift scheduling strategies head to head on identical seeded workloads.")
+    parser.add_argument("--schedulers", nargs="+", default=list(SCHEDULERS), help=f"schedulers to compare, among {', '.join(SCHEDULERS)}")
+    parser.add_argument("--dispatchers", nargs="+", default=["eta"], help=f"dispatchers to compare, among {', '.join(DISPATCHERS)}")
+    parser.add_argument("--floors", type=int, default=20, help="total_floors of the building")
+    parser.add_argument("--capacity", type=int, default=8, help="capacity of each lift")
+    parser.add_argument("--lifts", type=int, default=2, help="number of lifts")
+    parser.add_argument("--requests", type=int, default=100, help="number of requests made at the start of each run")
+    parser.add_argument("--arrivals", choices=ARRIVAL_PROFILES, default="poisson", help="arrival profile of the requests made over time")
+    parser.add_argument("--rate", type=float, default=0.2, help="average number of new requests per step (poisson)")
+    parser.add_argument("--duration", type=int, default=2000, help="step at which the arrival stream ends")
+    parser.add_argument("--runs", type=int, default=20, help="number of runs (workloads) per strategy")
+    parser.add_argument("--seed", type=int, default=0, help="base seed of the workloads")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes (default: one per core)")
+    parser.add_argument("--rank-by", choices=list(RANKING_METRICS), default="ttsw", help="metric the strategies are ranked by")
+    parser.add_argument("--step-by-step", action="store_true", help="step floor by floor instead of jumping from event to event")
+    return parser.parse_args()
+
+
+def main():
+    args = _parse_args()
+    for kind, names, known in (("scheduler", args.schedulers, SCHEDULERS), ("dispatcher", args.dispatchers, DISPATCHERS)):
+        unknown = [name for name in names if name not in known]
+        if unknown:
+            sys.exit(f"Unknown {kind} {', '.join(unknown)}, must be one of: {', '.join(known)}")
+
+    workload = Workload(args.floors, args.capacity, args.lifts, args.requests, args.arrivals, args.rate, args.duration)
+    scores = compare_strategies(workload, args.schedulers, args.dispatchers, args.runs, args.seed, args.workers,
+                                not args.step_by_step)
+    print(f"{args.runs} runs per strategy: {workload}")
+    print(format_ranking(scores, args.rank_by))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+from enum import Enum
+
+class Direction(Enum):
+    UP = "up"
+    DOWN = "down"
+    NONE = None
@@ -0,0 +1,115 @@
+from abc import ABC, abstractmethod
+
+from lift import Direction, Lift
+from request import Request
+
+ETA_STOP_PENALTY: int = 1       # extra steps counted by EtaDispatcher for every request a lift already has to serve
+NEW_STOP_PENALTY: int = 3       # extra steps counted by DestinationDispatcher for every stop a call adds to a lift's route
+
+
+class Dispatcher(ABC):
+    """
+    A dispatcher decides which lift of a bank serves a hall call. Each call is assigned exactly once, when it is
+    dispatched, so the cost of dispatching is O(lifts) per request rather than O(lifts x requests) per step.
+
+    Methods:
+        assign(req: Request, lifts: list[Lift]) -> int:
+            Returns the index in lifts of the lift which should serve req.
+    """
+
+    @abstractmethod
+    def assign(self, req: Request, lifts: list[Lift]) -> int:
+        ...
+
+
+class NearestCarDispatcher(Dispatcher):
+    """Assigns each call to the lift closest to the caller's floor (ties go to the lift with the fewest requests)."""
+
+    def assign(self, req: Request, lifts: list[Lift]) -> int:
+        return min(range(len(lifts)),
+                   key=lambda i: (abs(lifts[i].current_floor - req.origin_floor), _load(lifts[i])))
+
+
+class EtaDispatcher(Dispatcher):
+    """
+    Assigns each call to the lift with the lowest estimated time of arrival at the caller's floor. A lift going away
+    from the caller is expected to finish its sweep (up to its furthest stop) before turning back, and every request
+    the lift already has to serve adds ETA_STOP_PENALTY steps.
+    """
+
+    def assign(self, req: Request, lifts: list[Lift]) -> int:
+        return min(range(len(lifts)), key=lambda i: self.eta(lifts[i], req.origin_floor))
+
+    @staticmethod
+    def eta(lift: Lift, floor: int) -> int:
+        current = lift.current_floor
+        if lift.direction == Direction.UP and floor < current:
+            furthest = _furthest_stop(lift, highest=True)
+            distance = (furthest - current) + (furthest - floor)
+        elif lift.direction == Direction.DOWN and floor > current:
+            furthest = _furthest_stop(lift, highest=False)
+            distance = (current - furthest) + (floor - furthest)
+        else:
+            distance = abs(floor - current)
+        return distance + ETA_STOP_PENALTY * _load(lift)
+
+
+class DestinationDispatcher(Dispatcher):
+    """
+    Destination dispatch: callers give their destination at the hall (every Request has one), so each call can be
+    assigned to the lift which already stops at its origin and destination floors. The cost of a lift is its
+    EtaDispatcher.eta() to the caller, plus NEW_STOP_PENALTY steps for each of the two floors which is not already one
+    of its stops, so people going to the same floors are grouped in the same lift.
+    """
+
+    def assign(self, req: Request, lifts: list[Lift]) -> int:
+        return min(range(len(lifts)), key=lambda i: self.cost(lifts[i], req))
+
+    @staticmethod
+    def cost(lift: Lift, req: Request) -> int:
+        new_stops = 0
+        for floor in (req.origin_floor, req.destination_floor):
+            if lift.destination_index.count(floor) == 0 and lift.request_queue.count_at(floor) == 0:
+                new_stops += 1
+        return EtaDispatcher.eta(lift, req.origin_floor) + NEW_STOP_PENALTY * new_stops
+
+
+class ZoningDispatcher(Dispatcher):
+    """
+    Splits the building into as many contiguous zones of floors as there are lifts, and assigns each call to the lift
+    serving the zone of the caller's floor.
+    """
+
+    def assign(self, req: Request, lifts: list[Lift]) -> int:
+        total_floors = lifts[0].total_floors
+        return (req.origin_floor - 1) * len(lifts) // total_floors
+
+
+def _load(lift: Lift) -> int:
+    """Returns the number of requests a lift has to serve (waiting for it, or onboard)."""
+    return len(lift.request_queue) + len(lift.onboard_requests)
+
+
+def _furthest_stop(lift: Lift, highest: bool) -> int:
+    """Returns the highest (or lowest) floor the lift has to visit, or its current floor if it has nowhere to go."""
+    candidates = [lift.current_floor]
+    for index in (lift.destination_index, lift.request_queue.floor_index):
+        floor = index.highest() if highest else index.lowest()
+        if floor is not None:
+            candidates.append(floor)
+    return max(candidates) if highest else min(candidates)
+
+
+DISPATCHERS: dict[str, type[Dispatcher]] = {
+    "nearest": NearestCarDispatcher,
+    "eta": EtaDispatcher,
+    "destination": DestinationDispatcher,
+    "zoning": ZoningDispatcher,
+}
+
+
+def make_dispatcher(name: str) -> Dispatcher:
+    """Returns a new dispatcher from its name (one of the keys of DISPATCHERS)."""
+    if name not in DISPATCHERS:
+        raise ValueError(f"Unknown dispatcher {name!r}, must be one of: {', '.join(DISPATCHERS)}")
+    return DISPATCHERS[name]()
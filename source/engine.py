@@ -0,0 +1,350 @@
+import heapq
+import random
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator
+
+from building import Building
+from dispatcher import Dispatcher
+from event_log import EventLog
+from latency import LatencyHistogram
+from lift import DwellTimeModel, Lift
+from metrics_sink import MetricsSink
+from request import Request
+from request_simulator import simulate_request_arrays, simulate_requests
+from scheduling import Scheduler
+
+
+@dataclass
+class SimulationResult:
+    """
+    Metrics collected over a single headless simulation run (see README section 3b for definitions).
+
+    Attributes:
+        total_floors (int):           Number of floors in the simulated building.
+        capacity (int):               Capacity of each simulated lift.
+        total_requests (int):         Number of requests served over the run.
+        num_lifts (int):              Number of lifts in the building.
+        steps (int):                  Number of simulation steps (units of time) until every request was served.
+        moves (int):                  Number of floors travelled, summed over all lifts.
+        ttsw (int):                   Total Time Spent Waiting, sum over all steps of the number of waiting requests.
+        occupancy_steps (int):        Sum over all steps of the number of people onboard (any lift).
+        lor (list[float]):            Occupancy ratio at every step (only filled in if the run recorded it).
+        visited_floors (list[int]):   Floors visited by any lift, in order of first visit.
+        wait_times (LatencyHistogram):    Steps each served request waited between being made and being picked up.
+        ride_times (LatencyHistogram):    Steps each served request spent in a lift.
+        stops (int):                  Number of stops made, summed over all lifts.
+        dwell_time (float):           Seconds spent at stops, summed over all lifts (see DwellTimeModel).
+    """
+
+    total_floors: int
+    capacity: int
+    total_requests: int
+    num_lifts: int = 1
+    steps: int = 0
+    moves: int = 0
+    ttsw: int = 0
+    occupancy_steps: int = 0
+    lor: list[float] = field(default_factory=list)
+    visited_floors: list[int] = field(default_factory=list)
+    wait_times: LatencyHistogram = field(default_factory=LatencyHistogram)
+    ride_times: LatencyHistogram = field(default_factory=LatencyHistogram)
+    stops: int = 0
+    dwell_time: float = 0.0
+
+    @property
+    def lorot(self) -> float:
+        """Lift Occupancy Ratio Over Time, sum over all steps of occupancy / capacity (of the whole bank of lifts)."""
+        return self.occupancy_steps / (self.capacity * self.num_lifts)
+
+    @property
+    def lorot_average(self) -> float:
+        """Average occupancy ratio over the run (LOROT / T)."""
+        return self.lorot / self.steps if self.steps else 0.0
+
+    @property
+    def mean_dwell_time(self) -> float:
+        """Average number of seconds a stop took (crowded stops take longer, see DwellTimeModel)."""
+        return self.dwell_time / self.stops if self.stops else 0.0
+
+
+class SimulationEngine:
+    """
+    Headless driver for a Building (one or more lifts). Runs the same Lift / ReqQueue logic as
+    LiftSimulatorGUI.simulation_step(), but without Tk or any delay between steps, so a run completes as fast as the
+    CPU allows.
+
+    Each step records the metrics for the current state (waiting requests, occupancy) and then moves the lifts,
+    which is the same order of operations as the GUI loop. Requests can be made at the start of the run
+    (add_requests()) or at a later step (schedule_request()); they are kept in a priority queue ordered by arrival step,
+    and are made to the building at the start of that step. Arrivals can also come from a stream of
+    (step, request) pairs (add_arrivals()), which is read lazily: only the next arrival of each stream is held in the
+    priority queue, so requests are created as the simulation reaches them rather than all up front.
+
+    In event driven mode, the engine does not tick through every step. It jumps straight to the next event, which is
+    either the next floor where a lift stops (Building.travel()) or the next request arrival, whichever comes first.
+    Nothing changes between two events, so the metrics for the skipped steps are accumulated in closed form
+    (waiting requests x skipped steps, etc.), and the result is identical to the step by step mode.
+
+    If an event log is given, every arrival and every stop where people get off or on a lift is written to it (see
+    EventLog); both modes write the same log. If a metrics sink is given, the per-step metrics are streamed to it (see
+    MetricsSink), which is the way to keep the occupancy series of a long run without record_lor. The whole state of the engine can be saved at any step with snapshot()
+    and restored with restore(), to carry on the run from there without simulating the steps before it again.
+
+    Public methods:
+        __init__()
+        add_requests()
+        schedule_request()
+        add_arrivals()
+        is_finished()
+        step()
+        advance()
+        run()
+        snapshot()
+        restore()
+        save_snapshot()
+        load_snapshot()
+    """
+
+    def __init__(self, total_floors: int, capacity: int, record_lor: bool = True, event_driven: bool = False,
+                 num_lifts: int = 1, dispatcher: Dispatcher | None = None, event_log: EventLog | None = None,
+                 metrics_sink: MetricsSink | None = None, dwell_model: DwellTimeModel | None = None,
+                 scheduler: Scheduler | None = None):
+        self.building: Building = Building(total_floors, capacity, num_lifts, dispatcher, dwell_model, scheduler)
+        self.lift: Lift = self.building.lifts[0]    # the first (or only) lift of the building
+        self.record_lor: bool = record_lor          # whether to keep the full per-step LOR series in memory
+        self.event_driven: bool = event_driven      # whether run() jumps from event to event instead of stepping
+        self.event_log: EventLog | None = event_log # where arrivals and stops are logged, if anywhere
+        self.metrics_sink: MetricsSink | None = metrics_sink    # where the per-step metrics are streamed, if anywhere
+        self.result: SimulationResult = SimulationResult(total_floors, capacity, total_requests=0, num_lifts=num_lifts)
+        self.scenario: str = ""                     # name of the scenario run, if any (kept in snapshots)
+        # size of the event log when the engine was saved, to carry the log on from there (None if it had no log)
+        self.event_log_position: int | None = None
+        # position() of the metrics sink when the engine was saved, to carry the metrics on (None if it had no sink)
+        self.metrics_position: dict | None = None
+        self._visited: set[int] = set()
+        # heap of (arrival step, sequence number, request, stream the request came from or None)
+        self._arrivals: list[tuple[int, int, Request, Iterator[tuple[int, Request]] | None]] = []
+        self._arrival_seq: int = 0
+
+
+    def add_requests(self, requests: list[Request]) -> None:
+        """Makes requests to the building straight away."""
+        for req in requests:
+            self.building.add_request(req)
+            self.result.total_requests += 1
+            if self.event_log is not None:
+                self.event_log.arrival(self.result.steps, req)
+
+
+    def schedule_request(self, step: int, req: Request) -> None:
+        """Schedules a request to be made at the start of the given step."""
+        self._push_arrival(step, req, None)
+
+
+    def add_arrivals(self, arrivals: Iterable[tuple[int, Request]]) -> None:
+        """
+        Adds a stream of (step, request) pairs, in non-decreasing order of step. The stream is only read one arrival
+        ahead of the simulation.
+        """
+        self._pull(iter(arrivals))
+
+
+    def _push_arrival(self, step: int, req: Request, stream: Iterator[tuple[int, Request]] | None) -> None:
+        heapq.heappush(self._arrivals, (step, self._arrival_seq, req, stream))
+        self._arrival_seq += 1
+
+
+    def _pull(self, stream: Iterator[tuple[int, Request]]) -> None:
+        """Reads the next arrival of a stream into the priority queue (if the stream is not exhausted)."""
+        arrival = next(stream, None)
+        if arrival is not None:
+            self._push_arrival(arrival[0], arrival[1], stream)
+
+
+    def is_finished(self) -> bool:
+        """Returns True once there are no waiting or future requests and nobody is onboard a lift."""
+        return not self._arrivals and self.building.is_idle()
+
+
+    def _release_arrivals(self) -> None:
+        """Makes the scheduled requests which are due by the current step to the building."""
+        arrivals = self._arrivals
+        while arrivals and arrivals[0][0] <= self.result.steps:
+            _, _, req, stream = heapq.heappop(arrivals)
+            self.building.add_request(req)
+            self.result.total_requests += 1
+            if self.event_log is not None:
+                self.event_log.arrival(self.result.steps, req)
+            if stream is not None:
+                self._pull(stream)
+
+
+    def _record(self, steps: int, previous_floors: list[int], waiting: int, onboard: int) -> None:
+        """Records the metrics for a run of steps during which the number waiting and the number onboard did not change."""
+        result = self.result
+        result.steps += steps
+        result.ttsw += waiting * steps
+        result.occupancy_steps += onboard * steps
+        if self.record_lor:
+            result.lor.extend([onboard / (result.capacity * result.num_lifts)] * steps)
+        if self.metrics_sink is not None:
+            self.metrics_sink.record(steps, waiting, onboard)
+
+        new_floors: list[tuple[int, int, int]] = []    # (steps taken to reach it, lift, floor) of floors not visited yet
+        for i, (lift, previous_floor) in enumerate(zip(self.building.lifts, previous_floors)):
+            if self.event_log is not None and (lift.currently_offboarding or lift.currently_onboarding):
+                self.event_log.stop(result.steps, i, lift)
+            if lift.last_dwell_time:
+                result.stops += 1
+                result.dwell_time += lift.last_dwell_time
+            for req in lift.offboarded:
+                result.wait_times.record(req.pickup_time - req.arrival_time)
+                result.ride_times.record(req.dropoff_time - req.pickup_time)
+            current_floor = lift.current_floor
+            if current_floor == previous_floor:
+                continue
+            result.moves += abs(current_floor - previous_floor)
+            if len(self._visited) < result.total_floors:
+                step = 1 if current_floor > previous_floor else -1
+                for floor in range(previous_floor + step, current_floor + step, step):
+                    if floor not in self._visited:
+                        new_floors.append((abs(floor - previous_floor), i, floor))
+
+        # a moving lift goes one floor per step, so sorting by the steps taken (then by lift, the order the lifts move
+        # in within a step) gives the order the floors would have been first visited step by step
+        for _, _, floor in sorted(new_floors):
+            if floor not in self._visited:
+                self._visited.add(floor)
+                result.visited_floors.append(floor)
+
+
+    def step(self) -> None:
+        """Records the metrics for the current step, then moves the lifts by one step."""
+        self._release_arrivals()
+        building = self.building
+        waiting = building.waiting_count()
+        onboard = building.onboard_count()
+        previous_floors = [lift.current_floor for lift in building.lifts]
+        building.move()
+        self._record(1, previous_floors, waiting, onboard)
+
+
+    def advance(self, max_steps: int | None = None) -> None:
+        """
+        Advances the simulation to the next event (a lift's next stop or the next request arrival), or by max_steps
+        steps if that comes first.
+        """
+        self._release_arrivals()
+        horizon = max_steps
+        if self._arrivals:
+            until_arrival = self._arrivals[0][0] - self.result.steps
+            horizon = until_arrival if horizon is None else min(horizon, until_arrival)
+        if horizon is None:
+            # no arrivals left, so some lift always has somewhere to go until the run is finished
+            horizon = self.result.total_floors
+
+        building = self.building
+        waiting = building.waiting_count()
+        onboard = building.onboard_count()
+        previous_floors = [lift.current_floor for lift in building.lifts]
+        steps = building.travel(horizon)
+        self._record(steps, previous_floors, waiting, onboard)
+
+
+    def run(self, max_steps: int | None = None) -> SimulationResult:
+        """Runs the simulation until every request has been served (or max_steps is reached) and returns the result."""
+        while not self.is_finished():
+            if max_steps is not None and self.result.steps >= max_steps:
+                break
+            if self.event_driven:
+                self.advance(None if max_steps is None else max_steps - self.result.steps)
+            else:
+                self.step()
+        return self.result
+
+
+    def snapshot(self) -> bytes:
+        """
+        Returns the whole state of the simulation (lifts, queues, pending arrivals and arrival streams, metrics so far)
+        as bytes. The event log and the metrics sink are not part of the snapshot: attach new ones to the restored engine
+        to carry on writing them (the snapshot keeps how far they had got, see EventLog and MetricsSink).
+        """
+        import pickle     # only imported when snapshots are used, to keep the startup of short runs fast
+
+        if self.event_log is not None:
+            self.event_log.flush()  # the log must hold every event before the snapshot, even if the run stops here
+        if self.metrics_sink is not None:
+            self.metrics_sink.flush()
+
+        return pickle.dumps(self, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+    @staticmethod
+    def restore(data: bytes) -> "SimulationEngine":
+        """Returns a new engine in the state saved by snapshot()."""
+        import pickle
+
+        return pickle.loads(data)
+
+
+    def save_snapshot(self, path: str) -> None:
+        """Writes snapshot() to a file."""
+        with open(path, "wb") as f:
+            f.write(self.snapshot())
+
+
+    @staticmethod
+    def load_snapshot(path: str) -> "SimulationEngine":
+        """Returns a new engine in the state saved to a file by save_snapshot()."""
+        with open(path, "rb") as f:
+            return SimulationEngine.restore(f.read())
+
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state["event_log"] = None   # open files cannot be pickled
+        state["event_log_position"] = self.event_log.position() if self.event_log is not None else None
+        state["metrics_sink"] = None
+        state["metrics_position"] = self.metrics_sink.position() if self.metrics_sink is not None else None
+        return state
+
+
+def setup_simulation(total_floors: int, capacity: int, num_requests: int, record_lor: bool = True,
+                     event_driven: bool = False, num_lifts: int = 1, dispatcher: Dispatcher | None = None,
+                     seed: int | None = None, vectorized: bool = False,
+                     arrivals: Iterable[tuple[int, Request]] | None = None,
+                     event_log: EventLog | None = None,
+                     metrics_sink: MetricsSink | None = None,
+                     scheduler: Scheduler | None = None) -> SimulationEngine:
+    """
+    Returns an engine ready to run, with num_requests random requests made at the start of the run, plus the requests
+    of the arrival stream arrivals if given (see arrivals.py).
+    If seed is given, the requests are drawn from a dedicated random generator seeded with it, so the run is
+    reproducible. If vectorized is True, the requests are generated in bulk with NumPy (simulate_request_arrays()).
+    If event_log is given, the run is logged to it (see EventLog), and if metrics_sink is given, the per-step metrics
+    are streamed to it (see MetricsSink). scheduler is the algorithm every lift follows (LOOK by default, see
+    scheduling.py).
+    """
+    engine = SimulationEngine(total_floors, capacity, record_lor=record_lor, event_driven=event_driven,
+                              num_lifts=num_lifts, dispatcher=dispatcher, event_log=event_log,
+                              metrics_sink=metrics_sink, scheduler=scheduler)
+    if vectorized:
+        engine.add_arrivals(simulate_request_arrays(num_requests, total_floors, rng=seed).arrivals())
+    else:
+        rng = random.Random(seed) if seed is not None else None
+        engine.add_requests(simulate_requests(n_requests=num_requests, max_floor=total_floors, rng=rng))
+    if arrivals is not None:
+        engine.add_arrivals(arrivals)
+    return engine
+
+
+def run_simulation(total_floors: int, capacity: int, num_requests: int, record_lor: bool = True,
+                   event_driven: bool = False, num_lifts: int = 1, dispatcher: Dispatcher | None = None,
+                   seed: int | None = None, vectorized: bool = False,
+                   arrivals: Iterable[tuple[int, Request]] | None = None,
+                   event_log: EventLog | None = None,
+                   metrics_sink: MetricsSink | None = None,
+                   scheduler: Scheduler | None = None) -> SimulationResult:
+    """Runs a complete headless simulation (see setup_simulation() for the parameters) and returns its result."""
+    return setup_simulation(total_floors, capacity, num_requests, record_lor, event_driven, num_lifts, dispatcher,
+                            seed, vectorized, arrivals, event_log, metrics_sink, scheduler).run()
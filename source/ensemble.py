@@ -0,0 +1,356 @@
+import argparse
+import sys
+import time
+from dataclasses import dataclass, fields
+
+import numpy as np
+
+from engine import SimulationEngine, SimulationResult
+from lift import DwellTimeModel
+from request_simulator import RequestBatch, simulate_request_arrays
+from sweep import derive_seed
+
+DIRECTION_UP: int = 1       # values of LiftEnsemble.direction, for Direction.UP, DOWN and NONE
+DIRECTION_DOWN: int = -1
+DIRECTION_NONE: int = 0
+NEVER: int = np.iinfo(np.int64).max     # arrival step of the padding of replications with fewer requests than others
+
+
+@dataclass
+class EnsembleResult:
+    """
+    Metrics of every replication of a LiftEnsemble run, as arrays with one entry per replication. Each entry is equal
+    to the same metric of a SimulationResult for that replication's requests (see SimulationResult for definitions).
+
+    Attributes:
+        steps (np.ndarray):             Number of steps until every request of the replication was served.
+        moves (np.ndarray):             Number of floors travelled.
+        ttsw (np.ndarray):              Total Time Spent Waiting.
+        occupancy_steps (np.ndarray):   Sum over all steps of the number of people onboard.
+        stops (np.ndarray):             Number of stops made.
+        dwell_time (np.ndarray):        Seconds spent at stops.
+        served (np.ndarray):            Number of requests dropped off (the count of SimulationResult.wait_times).
+        wait_time (np.ndarray):         Steps waited by the requests dropped off, in total (wait_times.total).
+        ride_time (np.ndarray):         Steps spent in the lift by the requests dropped off, in total (ride_times.total).
+    """
+
+    steps: np.ndarray
+    moves: np.ndarray
+    ttsw: np.ndarray
+    occupancy_steps: np.ndarray
+    stops: np.ndarray
+    dwell_time: np.ndarray
+    served: np.ndarray
+    wait_time: np.ndarray
+    ride_time: np.ndarray
+
+    @property
+    def mean_wait_time(self) -> np.ndarray:
+        """Average number of steps a request waited, per replication."""
+        return self.wait_time / np.maximum(self.served, 1)
+
+    @property
+    def mean_ride_time(self) -> np.ndarray:
+        """Average number of steps a request spent in the lift, per replication."""
+        return self.ride_time / np.maximum(self.served, 1)
+
+    def summary(self, metric: str) -> dict[str, float]:
+        """Returns the mean, standard deviation, and 5th, 50th and 95th percentiles of a metric over the replications."""
+        values = getattr(self, metric)
+        p5, p50, p95 = np.percentile(values, [5, 50, 95])
+        return {"mean": float(values.mean()), "std": float(values.std()), "p5": p5, "p50": p50, "p95": p95}
+
+
+class LiftEnsemble:
+    """
+    Lockstep simulator of many independent replications of the same building with a single lift following the LOOK
+    scheduler, for capacity planning studies which need thousands of runs. Instead of one Lift object per replication,
+    the state of all the replications is held in NumPy arrays (one row per replication), and each step advances all of
+    them at once with array operations, so the cost of a step grows with the number of replications times the number
+    of floors, but with no Python loop over the replications.
+
+    The results are identical to running a SimulationEngine (step by step or event driven) on each replication's
+    requests: the next floor and the direction are chosen as LookScheduler.next_floor() does, from the nearest
+    candidate floor above and below the lift, and a stop lets off everyone who has arrived and lets on the people
+    waiting there in the order they made their request, up to the room left, as Lift._offload_and_onload_requests()
+    does. The order matters when not everyone can get on, so the waiting requests are kept in one first in, first out
+    queue per floor: the requests of each replication are laid out by origin floor and order of arrival, and only the
+    number of requests which arrived and which got on are counted per floor.
+
+    Requires NumPy.
+
+    Attributes:
+        total_floors (int):               Number of floors in the building.
+        capacity (int):                   Capacity of the lift.
+        dwell_model (DwellTimeModel):     How long the lift stays at a stop.
+        replications (int):               Number of replications.
+        clock (int):                      Number of steps since the start of the run.
+        floor (np.ndarray):               Current floor of the lift of each replication.
+        direction (np.ndarray):           Current direction of each lift (DIRECTION_UP, DIRECTION_DOWN, DIRECTION_NONE).
+        onboard (np.ndarray):             Number of people onboard, per replication and destination floor.
+        waiting (np.ndarray):             Number of people waiting, per replication and origin floor.
+
+    Public methods:
+        __init__()
+        step()
+        run()
+        is_finished()
+        result()
+    """
+
+    def __init__(self, total_floors: int, capacity: int, batches: list[RequestBatch],
+                 dwell_model: DwellTimeModel | None = None):
+        """
+        Instantiates an ensemble with one replication per batch of requests. The requests of a batch without arrival
+        steps are all made at step 0, like those of SimulationEngine.add_requests().
+        """
+        self.total_floors: int = total_floors
+        self.capacity: int = capacity
+        self.dwell_model: DwellTimeModel = dwell_model if dwell_model is not None else DwellTimeModel()
+        self.replications: int = len(batches)
+        self.clock: int = 0
+        reps, columns = self.replications, total_floors + 2     # floors 0 and total_floors + 1 are never used
+
+        # requests of each replication, padded to the same length; the padding never arrives
+        length = max((len(batch) for batch in batches), default=0)
+        arrivals = np.full((reps, length), NEVER, dtype=np.int64)
+        origins = np.zeros((reps, length), dtype=np.int64)
+        destinations = np.zeros((reps, length), dtype=np.int64)
+        for i, batch in enumerate(batches):
+            n = len(batch)
+            arrivals[i, :n] = batch.arrival_steps if batch.arrival_steps is not None else 0
+            origins[i, :n] = batch.origins
+            destinations[i, :n] = batch.destinations
+
+        # order in which the requests are made (by arrival step, then order in the batch, as SimulationEngine makes
+        # them), then the queue of each floor in that order
+        by_arrival = np.argsort(arrivals, axis=1, kind="stable")
+        by_floor = np.take_along_axis(by_arrival, np.argsort(np.take_along_axis(origins, by_arrival, axis=1), axis=1,
+                                                             kind="stable"), axis=1)
+        self._queue_destinations: np.ndarray = np.take_along_axis(destinations, by_floor, axis=1)
+        self._queue_arrivals: np.ndarray = np.take_along_axis(arrivals, by_floor, axis=1)
+        rows = np.repeat(np.arange(reps), length)
+        per_floor = np.bincount(rows * columns + origins.ravel(), minlength=reps * columns).reshape(reps, columns)
+        self._queue_start: np.ndarray = np.cumsum(per_floor, axis=1) - per_floor   # position of each floor's queue
+        self._queue_head: np.ndarray = np.zeros((reps, columns), dtype=np.int64)  # people who got on, per floor
+
+        # every arrival of the ensemble, by step: rows and origin floors
+        made = arrivals.ravel() != NEVER
+        arrival_order = np.argsort(arrivals.ravel()[made], kind="stable")
+        self._arrival_steps: np.ndarray = arrivals.ravel()[made][arrival_order]
+        self._arrival_rows: np.ndarray = rows[made][arrival_order]
+        self._arrival_floors: np.ndarray = origins.ravel()[made][arrival_order]
+        self._next_arrival: int = 0
+        self._pending: np.ndarray = np.bincount(self._arrival_rows, minlength=reps)   # requests not made yet
+
+        self.floor: np.ndarray = np.ones(reps, dtype=np.int64)
+        self.direction: np.ndarray = np.full(reps, DIRECTION_NONE, dtype=np.int64)
+        self.onboard: np.ndarray = np.zeros((reps, columns), dtype=np.int64)
+        self.waiting: np.ndarray = np.zeros((reps, columns), dtype=np.int64)
+        self._onboard_total: np.ndarray = np.zeros(reps, dtype=np.int64)
+        self._waiting_total: np.ndarray = np.zeros(reps, dtype=np.int64)
+        self._pickup_times: np.ndarray = np.zeros((reps, columns), dtype=np.int64)  # sum over the people onboard
+        self._wait_times: np.ndarray = np.zeros((reps, columns), dtype=np.int64)    # sum over the people onboard
+        self._floors: np.ndarray = np.arange(columns)
+        self._rows: np.ndarray = np.arange(reps)
+        self._result: EnsembleResult = EnsembleResult(
+            *(np.zeros(reps, dtype=np.float64 if f.name == "dwell_time" else np.int64) for f in fields(EnsembleResult)))
+
+
+    def _active(self) -> np.ndarray:
+        """Returns which replications are not finished (requests still to be made, waiting or onboard)."""
+        return (self._pending > 0) | (self._waiting_total > 0) | (self._onboard_total > 0)
+
+
+    def is_finished(self) -> bool:
+        """Returns True once every request of every replication has been served."""
+        return not self._active().any()
+
+
+    def _release_arrivals(self) -> None:
+        """Makes the requests which are due by the current step."""
+        end = np.searchsorted(self._arrival_steps, self.clock, side="right")
+        if end == self._next_arrival:
+            return
+        rows = self._arrival_rows[self._next_arrival:end]
+        np.add.at(self.waiting, (rows, self._arrival_floors[self._next_arrival:end]), 1)
+        made = np.bincount(rows, minlength=self.replications)
+        self._waiting_total += made
+        self._pending -= made
+        self._next_arrival = end
+
+
+    def _next_floors(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Decides where each lift goes next and updates its direction, as LookScheduler.next_floor() does. Returns the
+        move of each lift (+1, -1, or 0 if it has nowhere to go) and whether each lift is full.
+        """
+        full = self._onboard_total >= self.capacity
+        candidates = (self.onboard > 0) | ((self.waiting > 0) & ~full[:, None])
+        current = self.floor[:, None]
+        above = (candidates & (self._floors > current)).any(axis=1)
+        below = (candidates & (self._floors < current)).any(axis=1)
+
+        # a lift with no direction looks up first
+        up = self.direction != DIRECTION_DOWN
+        go_up = np.where(up, above, above & ~below)
+        go_down = np.where(up, below & ~above, below)
+        self.direction = np.where(go_up, DIRECTION_UP, np.where(go_down, DIRECTION_DOWN, DIRECTION_NONE))
+        return self.direction.copy(), full
+
+
+    def _offload_and_onload(self, stopping: np.ndarray) -> None:
+        """
+        Lets off the people who have arrived and lets on the people waiting, up to the room left, in the lifts of the
+        stopping replications, as Lift._offload_and_onload_requests() does.
+        """
+        result = self._result
+        rows = np.flatnonzero(stopping)
+        floors = self.floor[rows]
+        clock = self.clock
+
+        alighting = self.onboard[rows, floors]
+        result.served[rows] += alighting
+        result.ride_time[rows] += alighting * clock - self._pickup_times[rows, floors]
+        result.wait_time[rows] += self._wait_times[rows, floors]
+        self.onboard[rows, floors] = 0
+        self._pickup_times[rows, floors] = 0
+        self._wait_times[rows, floors] = 0
+        self._onboard_total[rows] -= alighting
+
+        # the people waiting get on in the order of their requests, one position of the floor's queue at a time
+        boarding = np.minimum(self.capacity - self._onboard_total[rows], self.waiting[rows, floors])
+        first = self._queue_start[rows, floors] + self._queue_head[rows, floors]
+        for position in range(int(boarding.max(initial=0))):
+            on = boarding > position
+            boarder_rows = rows[on]
+            queued = first[on] + position
+            destinations = self._queue_destinations[boarder_rows, queued]
+            self.onboard[boarder_rows, destinations] += 1
+            self._pickup_times[boarder_rows, destinations] += clock
+            self._wait_times[boarder_rows, destinations] += clock - self._queue_arrivals[boarder_rows, queued]
+        self._queue_head[rows, floors] += boarding
+        self.waiting[rows, floors] -= boarding
+        self._waiting_total[rows] -= boarding
+        self._onboard_total[rows] += boarding
+
+        model = self.dwell_model
+        dwell_time = model.door_seconds + alighting * model.alighting_seconds + boarding * model.boarding_seconds
+        result.dwell_time[rows] += dwell_time
+        result.stops[rows] += dwell_time != 0
+
+
+    def step(self) -> None:
+        """Records the metrics for the current step, then moves the lifts of all the replications by one step."""
+        active = self._active()
+        self._release_arrivals()
+        result = self._result
+        result.steps += active
+        result.ttsw += self._waiting_total
+        result.occupancy_steps += self._onboard_total
+
+        moves, full = self._next_floors()
+        rows = self._rows
+        # an idle lift opens its doors for the people who called it to its floor
+        stopping = (moves == 0) & ~full & (self.waiting[rows, self.floor] > 0)
+        self.floor += moves
+        self.clock += 1
+        result.moves += moves != 0
+        stopping |= (moves != 0) & ((self.onboard[rows, self.floor] > 0) | (self.waiting[rows, self.floor] > 0))
+        if stopping.any():
+            self._offload_and_onload(stopping)
+
+        # a lift with nobody left to serve has no direction
+        self.direction[(self._waiting_total == 0) & (self._onboard_total == 0)] = DIRECTION_NONE
+
+
+    def run(self, max_steps: int | None = None) -> EnsembleResult:
+        """Runs every replication until all of its requests have been served (or max_steps) and returns the result."""
+        while not self.is_finished():
+            if max_steps is not None and self.clock >= max_steps:
+                break
+            self.step()
+        return self.result()
+
+
+    def result(self) -> EnsembleResult:
+        """Returns the metrics of every replication so far."""
+        return self._result
+
+
+def make_batches(total_floors: int, num_requests: int, replications: int, base_seed: int = 0,
+                 duration: int | None = None) -> list[RequestBatch]:
+    """
+    Returns the requests of each replication: num_requests random requests drawn from derive_seed(base_seed, i) for
+    replication i (see simulate_request_arrays()), made at step 0, or at random steps before duration if given.
+    """
+    return [simulate_request_arrays(num_requests, total_floors, derive_seed(base_seed, i), duration)
+            for i in range(replications)]
+
+
+def run_replication(total_floors: int, capacity: int, batch: RequestBatch,
+                    dwell_model: DwellTimeModel | None = None) -> SimulationResult:
+    """Runs one replication with a SimulationEngine (one Lift object), for comparison with LiftEnsemble."""
+    engine = SimulationEngine(total_floors, capacity, record_lor=False, event_driven=True, dwell_model=dwell_model)
+    engine.add_arrivals(batch.arrivals())
+    return engine.run()
+
+
+def mismatches(result: EnsembleResult, index: int, reference: SimulationResult) -> list[str]:
+    """Returns the metrics of replication index which differ from reference (a result of run_replication())."""
+    expected = {
+        "steps": reference.steps,
+        "moves": reference.moves,
+        "ttsw": reference.ttsw,
+        "occupancy_steps": reference.occupancy_steps,
+        "stops": reference.stops,
+        "dwell_time": reference.dwell_time,
+        "served": reference.wait_times.count,
+        "wait_time": reference.wait_times.total,
+        "ride_time": reference.ride_times.total,
+    }
+    return [f"{metric}: {getattr(result, metric)[index]} != {value}" for metric, value in expected.items()
+            if not np.isclose(getattr(result, metric)[index], value)]
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run many independent replications of a single lift building in lockstep with NumPy.")
+    parser.add_argument("--floors", type=int, default=20, help="total_floors of the building")
+    parser.add_argument("--capacity", type=int, default=8, help="capacity of the lift")
+    parser.add_argument("--requests", type=int, default=100, help="number of requests of each replication")
+    parser.add_argument("--duration", type=int, default=None, help="requests are made at random steps before this one (default: all at the start)")
+    parser.add_argument("--replications", type=int, default=10000, help="number of replications")
+    parser.add_argument("--seed", type=int, default=0, help="base seed of the replications")
+    parser.add_argument("--check", type=int, default=0, metavar="N", help="also run the first N replications one Lift at a time, and check the results are identical")
+    return parser.parse_args()
+
+
+def main():
+    args = _parse_args()
+    batches = make_batches(args.floors, args.requests, args.replications, args.seed, args.duration)
+    start = time.perf_counter()
+    ensemble = LiftEnsemble(args.floors, args.capacity, batches)
+    result = ensemble.run()
+    seconds = time.perf_counter() - start
+    print(f"{args.replications} replications in {seconds:.2f} s ({ensemble.clock} steps)")
+    print(f"{'metric':<16}{'mean':>12}{'std':>12}{'p5':>12}{'p50':>12}{'p95':>12}")
+    for metric in ("steps", "moves", "ttsw", "stops", "dwell_time", "mean_wait_time", "mean_ride_time"):
+        cells = "".join(f"{value:>12.2f}" for value in result.summary(metric).values())
+        print(f"{metric:<16}{cells}")
+
+    if args.check:
+        start = time.perf_counter()
+        failed = 0
+        for i in range(min(args.check, args.replications)):
+            errors = mismatches(result, i, run_replication(args.floors, args.capacity, batches[i]))
+            if errors:
+                failed += 1
+                print(f"replication {i}: {', '.join(errors)}", file=sys.stderr)
+        seconds = time.perf_counter() - start
+        print(f"checked {min(args.check, args.replications)} replications against Lift in {seconds:.2f} s: "
+              f"{failed} mismatched")
+        if failed:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
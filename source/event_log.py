@@ -0,0 +1,169 @@
+import os
+import struct
+from dataclasses import dataclass
+from typing import Iterator
+
+from lift import Direction, Lift
+from request import Request
+
+EVENT_LOG_MAGIC: bytes = b"LIFTLOG1"     # first bytes of every event log file (format identifier and version)
+# one fixed size record per event: kind, lift, direction, padding, step, floor, destination, alighted, load
+EVENT_RECORD: struct.Struct = struct.Struct("<BBbxIIIHH")
+EVENTS_PER_READ: int = 4096             # number of records read from the file at a time
+
+ARRIVAL: int = 0        # a request was made: floor is its origin, destination its destination
+STOP: int = 1           # a lift opened its doors: floor is where, alighted and load are the people off and then onboard
+
+DIRECTION_CODES: dict[Direction, int] = {Direction.UP: 1, Direction.DOWN: -1, Direction.NONE: 0}
+
+
+@dataclass(frozen=True)
+class Event:
+    """One record of an event log (see EventLog). Fields which do not apply to the kind of event are 0."""
+
+    kind: int
+    lift: int
+    direction: int
+    step: int
+    floor: int
+    destination: int
+    alighted: int
+    load: int
+
+
+class EventLog:
+    """
+    Append-only log of a simulation run, in a compact binary format: every request arrival, and every stop where a
+    lift let people off or on (with the direction the lift chose next), as fixed size records of EVENT_RECORD.size
+    bytes. The arrivals are enough to replay the run exactly (see logged_arrivals()), and the stops are the decisions
+    to compare when two versions of the dispatch logic are run on the same arrivals (see first_divergence()).
+
+    A log is written from scratch, replacing any file at path. A run restored from a snapshot carries on the log it
+    started instead: given the size the log had when the snapshot was saved (SimulationEngine.event_log_position),
+    the log is cut back to that size, dropping any events the original run logged after the snapshot, and the new
+    events are appended. The log is then the log of one run, whichever run wrote each part of it.
+
+    Methods:
+        arrival(step: int, req: Request) -> None:
+            Logs a request made at step.
+
+        stop(step: int, lift_index: int, lift: Lift) -> None:
+            Logs the stop the lift just made, at step.
+
+        position() -> int:
+            Returns the size of the log so far, in bytes (to carry it on from there).
+
+        flush() -> None:
+            Writes the buffered events to the file.
+
+        close() -> None:
+            Flushes and closes the file.
+    """
+
+    def __init__(self, path: str, position: int | None = None):
+        self.path: str = path
+        if position is None:
+            self._file = open(path, "wb")
+            self._file.write(EVENT_LOG_MAGIC)
+            return
+        if not os.path.exists(path) or os.path.getsize(path) < position:
+            raise ValueError(f"{path} is missing events logged before the snapshot, so it cannot be carried on")
+        self._file = open(path, "r+b")
+        if self._file.read(len(EVENT_LOG_MAGIC)) != EVENT_LOG_MAGIC:
+            self._file.close()
+            raise ValueError(f"{path} is not an event log")
+        self._file.truncate(position)
+        self._file.seek(position)
+
+    def arrival(self, step: int, req: Request) -> None:
+        direction = 1 if req.is_upward() else -1
+        self._file.write(EVENT_RECORD.pack(ARRIVAL, 0, direction, step, req.origin_floor, req.destination_floor, 0, 0))
+
+    def stop(self, step: int, lift_index: int, lift: Lift) -> None:
+        self._file.write(EVENT_RECORD.pack(STOP, lift_index, DIRECTION_CODES[lift.direction], step, lift.current_floor,
+                                           0, len(lift.offboarded), len(lift.onboard_requests)))
+
+    def position(self) -> int:
+        return self._file.tell()
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> "EventLog":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def read_events(path: str) -> Iterator[Event]:
+    """Yields the events of a log, in order. The file is read in blocks, so a log of any size runs in constant memory."""
+    with open(path, "rb") as f:
+        if f.read(len(EVENT_LOG_MAGIC)) != EVENT_LOG_MAGIC:
+            raise ValueError(f"{path} is not an event log")
+        while True:
+            block = f.read(EVENT_RECORD.size * EVENTS_PER_READ)
+            if not block:
+                return
+            if len(block) % EVENT_RECORD.size:
+                raise ValueError(f"{path} is truncated")
+            for fields in EVENT_RECORD.iter_unpack(block):
+                yield Event(*fields)
+
+
+def logged_arrivals(path: str) -> Iterator[tuple[int, Request]]:
+    """
+    Yields the requests made during a logged run as (step, request) pairs, for SimulationEngine.add_arrivals().
+    Running a new engine with the same parameters on these arrivals replays the logged run exactly. Raises ValueError
+    if the steps go backwards, as they do in a file holding more than one run, or if the log holds no arrivals.
+    """
+    last_step = 0
+    arrivals = 0
+    for event in read_events(path):
+        if event.step < last_step:
+            raise ValueError(f"{path} goes back from step {last_step} to step {event.step}: it is not the log of one run")
+        last_step = event.step
+        if event.kind == ARRIVAL:
+            arrivals += 1
+            yield event.step, Request(event.floor, event.destination)
+    if arrivals == 0:
+        raise ValueError(f"{path} holds no arrivals to replay")
+
+
+def first_divergence(path_a: str, path_b: str) -> tuple[int, Event | None, Event | None] | None:
+    """
+    Compares two event logs and returns (index, event of a, event of b) for the first event which differs (None for
+    the log which ended first), or None if the logs are identical.
+    """
+    events_a = read_events(path_a)
+    events_b = read_events(path_b)
+    index = 0
+    while True:
+        event_a = next(events_a, None)
+        event_b = next(events_b, None)
+        if event_a is None and event_b is None:
+            return None
+        if event_a != event_b:
+            return index, event_a, event_b
+        index += 1
+
+
+def main():
+    import argparse     # the engine imports this module, so the CLI's dependencies are only imported when it is run
+
+    parser = argparse.ArgumentParser(description="Print the first event where two simulation event logs differ.")
+    parser.add_argument("log_a")
+    parser.add_argument("log_b")
+    args = parser.parse_args()
+    divergence = first_divergence(args.log_a, args.log_b)
+    if divergence is None:
+        print("The logs are identical.")
+        return
+    index, event_a, event_b = divergence
+    print(f"The logs differ from event {index}:\n  {args.log_a}: {event_a}\n  {args.log_b}: {event_b}")
+
+if __name__ == "__main__":
+    main()
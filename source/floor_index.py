@@ -0,0 +1,85 @@
+from bisect import bisect_left, bisect_right, insort
+
+class FloorIndex:
+    """
+    This class keeps a count of demand (requests) per floor, together with a sorted list of the floors which have
+    non-zero demand. It is used by the lift to find the nearest floor with demand above or below its current floor
+    with a binary search, so the cost of choosing the next stop scales with the number of floors rather than the
+    number of requests.
+
+    Methods:
+        add(floor: int, n: int = 1) -> None:
+            Adds n units of demand at floor.
+
+        remove(floor: int, n: int = 1) -> None:
+            Removes n units of demand at floor.
+
+        count(floor: int) -> int:
+            Returns the demand at floor.
+
+        nearest_above(floor: int) -> int | None:
+            Returns the lowest floor with demand strictly above floor, or None.
+
+        nearest_below(floor: int) -> int | None:
+            Returns the highest floor with demand strictly below floor, or None.
+
+        lowest() -> int | None:
+            Returns the lowest floor with demand, or None.
+
+        highest() -> int | None:
+            Returns the highest floor with demand, or None.
+
+        floors() -> list[int]:
+            Returns the floors with demand, in ascending order.
+
+        counts() -> dict[int, int]:
+            Returns the demand on each floor with demand.
+    """
+
+    def __init__(self):
+        self._counts: dict[int, int] = {}   # floor -> demand at that floor (only floors with demand > 0)
+        self._sorted: list[int] = []        # floors with demand > 0, ascending
+
+    def add(self, floor: int, n: int = 1) -> None:
+        count = self._counts.get(floor, 0)
+        if count == 0:
+            insort(self._sorted, floor)
+        self._counts[floor] = count + n
+
+    def remove(self, floor: int, n: int = 1) -> None:
+        count = self._counts[floor] - n
+        if count > 0:
+            self._counts[floor] = count
+        else:
+            del self._counts[floor]
+            del self._sorted[bisect_left(self._sorted, floor)]
+
+    def count(self, floor: int) -> int:
+        return self._counts.get(floor, 0)
+
+    def nearest_above(self, floor: int) -> int | None:
+        i = bisect_right(self._sorted, floor)
+        return self._sorted[i] if i < len(self._sorted) else None
+
+    def nearest_below(self, floor: int) -> int | None:
+        i = bisect_left(self._sorted, floor)
+        return self._sorted[i - 1] if i > 0 else None
+
+    def lowest(self) -> int | None:
+        return self._sorted[0] if self._sorted else None
+
+    def highest(self) -> int | None:
+        return self._sorted[-1] if self._sorted else None
+
+    def floors(self) -> list[int]:
+        return list(self._sorted)
+
+    def counts(self) -> dict[int, int]:
+        return dict(self._counts)
+
+    def __len__(self) -> int:
+        """Returns the number of floors with demand."""
+        return len(self._sorted)
+
+    def __repr__(self) -> str:
+        return f"FloorIndex({self._counts})"
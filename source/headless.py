@@ -0,0 +1,152 @@
+import argparse
+import os
+import sys
+
+from arrivals import make_arrivals
+from dispatcher import make_dispatcher
+from engine import SimulationEngine, setup_simulation
+from event_log import EventLog, logged_arrivals
+from input_parser import parse_config, parse_overrides, scenario_names
+from metrics_sink import MetricsSink
+from profiling import Profiler
+from scheduling import make_scheduler
+
+CONFIG_FILEPATH: str = os.path.join("source", "config.json") # filepath for config.json
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run the lift simulation without the GUI and print its metrics.")
+    parser.add_argument("--config", default=CONFIG_FILEPATH, help="path to the configuration file")
+    parser.add_argument("--no-config", action="store_true", help="use the default parameters (with --set and LIFT_* overrides) instead of a file")
+    parser.add_argument("--scenario", action="append", default=[], help="scenario of the configuration file to run (can be repeated, or all)")
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=VALUE", help="override a parameter of the configuration (can be repeated)")
+    parser.add_argument("--runs", type=int, default=1, help="number of simulations to run")
+    parser.add_argument("--seed", type=int, default=None, help="seed of the first run (run i uses seed + i - 1), overrides the config")
+    parser.add_argument("--vectorized", action="store_true", help="generate the requests in bulk with NumPy")
+    parser.add_argument("--duration", type=int, default=None, help="step at which the arrival stream of the config ends")
+    parser.add_argument("--event-driven", action="store_true", help="jump from event to event instead of stepping floor by floor")
+    parser.add_argument("--event-log", default=None, help="binary file to log arrivals and lift stops to (one file per run if --runs > 1); with --resume, the log of the run the snapshot was saved from, carried on from the snapshot")
+    parser.add_argument("--replay", default=None, help="event log whose arrivals are replayed instead of drawing random requests")
+    parser.add_argument("--snapshot-at", type=int, action="append", default=[], help="step at which to save a snapshot (can be repeated)")
+    parser.add_argument("--snapshot", default="snapshot_{step}.pkl", help="path of the snapshots, {step} is replaced with the step")
+    parser.add_argument("--resume", default=None, help="snapshot to carry on the simulation from (the config is ignored)")
+    parser.add_argument("--metrics-dir", default=None, help="directory to stream the per-step metrics to, as .npy columns (one directory per run if --runs > 1)")
+    parser.add_argument("--metrics-window", type=int, default=1, help="number of steps aggregated into each sample of --metrics-dir")
+    parser.add_argument("--profile", action="store_true", help="time the phases of each step and print a summary to stderr")
+    parser.add_argument("--profile-collapsed", default=None, help="write the profile as collapsed stacks (for flame graphs)")
+    parser.add_argument("--profile-trace", default=None, help="write the profile as a Chrome trace (json)")
+    return parser.parse_args()
+
+
+def _run_path(path: str, run: int, runs: int, scenario: str | None = None) -> str:
+    """
+    Returns the path of a per-run file: path itself for a single run, path with the run number (and the scenario name,
+    if several scenarios are run) inserted otherwise.
+    """
+    root, extension = os.path.splitext(path)
+    if scenario is not None:
+        root = f"{root}_{scenario}"
+    if runs == 1:
+        return f"{root}{extension}"
+    return f"{root}_{run}{extension}"
+
+
+def _simulate(config: dict | None, args: argparse.Namespace, run: int, seed: int | None,
+              scenario: str | None = None) -> SimulationEngine:
+    """
+    Runs one simulation, saving the snapshots and writing the event log and metrics asked for on the command line, and
+    returns the engine once finished. scenario is the name used in the paths of those files, if several scenarios are
+    run.
+    """
+    event_log_path = _run_path(args.event_log, run, args.runs, scenario) if args.event_log else None
+    event_log = EventLog(event_log_path) if event_log_path and not args.resume else None
+    if args.resume:
+        engine = SimulationEngine.load_snapshot(args.resume)
+        if event_log_path:
+            # a resumed run carries on the log of the run it was saved from, which holds the steps before the snapshot
+            if engine.event_log_position is None:
+                raise ValueError(f"{args.resume} was saved by a run without an event log, so it cannot write one")
+            engine.event_log = EventLog(event_log_path, engine.event_log_position)
+    elif args.replay:
+        engine = setup_simulation(config["total_floors"], config["capacity"], 0, record_lor=False,
+                                  event_driven=args.event_driven, num_lifts=config["num_lifts"],
+                                  dispatcher=make_dispatcher(config["dispatcher"]),
+                                  arrivals=logged_arrivals(args.replay), event_log=event_log,
+                                  scheduler=make_scheduler(config["scheduler"]))
+    else:
+        arrivals = make_arrivals(config["arrivals"], config["total_floors"], config["arrival_rate"], seed, args.duration)
+        engine = setup_simulation(config["total_floors"], config["capacity"], config["num_requests"], record_lor=False,
+                                  event_driven=args.event_driven, num_lifts=config["num_lifts"],
+                                  dispatcher=make_dispatcher(config["dispatcher"]), vectorized=args.vectorized,
+                                  seed=seed, arrivals=arrivals, event_log=event_log,
+                                  scheduler=make_scheduler(config["scheduler"]))
+    if config is not None:
+        engine.scenario = config["scenario"]     # saved in the snapshots, for the output of a resumed run
+    if args.metrics_dir:
+        # like the event log, a resumed run carries on the metrics of the run it was saved from
+        if args.resume and engine.metrics_position is None:
+            raise ValueError(f"{args.resume} was saved by a run without --metrics-dir, so it cannot write the metrics")
+        engine.metrics_sink = MetricsSink(_run_path(args.metrics_dir, run, args.runs, scenario),
+                                          engine.result.capacity * engine.result.num_lifts, args.metrics_window,
+                                          first_step=engine.result.steps, position=engine.metrics_position)
+    for step in sorted(args.snapshot_at):
+        engine.run(max_steps=step)
+        engine.save_snapshot(_run_path(args.snapshot.format(step=step), run, args.runs, scenario))
+    engine.run()
+    if engine.event_log is not None:
+        engine.event_log.close()
+    if engine.metrics_sink is not None:
+        engine.metrics_sink.close()
+    return engine
+
+
+def _scenarios(args: argparse.Namespace) -> list[dict | None]:
+    """Returns the configuration of each scenario to run, or [None] to resume a snapshot (it has its own parameters)."""
+    if args.resume is not None:
+        return [None]
+    overrides = parse_overrides(args.set)
+    config_path = None if args.no_config else args.config
+    names = scenario_names(config_path) if "all" in args.scenario else args.scenario or [None]
+    return [parse_config(config_path, name, overrides) for name in names]
+
+
+def main():
+    args = _parse_args()
+    try:
+        scenarios = _scenarios(args)
+    except ValueError as e:
+        sys.exit(str(e))
+
+    print("simulation,total_floors,capacity,total_requests,steps,moves,ttsw,lorot_average,"
+          "wait_p50,wait_p90,wait_p99,wait_max,ride_p50,ride_p90,ride_p99,ride_max,stops,mean_dwell_time,scenario")
+    profiler = None
+    if args.profile or args.profile_collapsed or args.profile_trace:
+        profiler = Profiler(trace=args.profile_trace is not None)
+        profiler.enable()
+    for config in scenarios:
+        base_seed = args.seed if args.seed is not None or config is None else config["seed"]
+        for i in range(1, args.runs + 1):
+            seed = None if base_seed is None else base_seed + i - 1
+            try:
+                engine = _simulate(config, args, i, seed, config["scenario"] if len(scenarios) > 1 else None)
+            except ValueError as e:     # an event log which cannot be replayed or carried on
+                sys.exit(str(e))
+            result = engine.result
+            wait = result.wait_times
+            ride = result.ride_times
+            print(f"{i},{result.total_floors},{result.capacity},{result.total_requests},"
+                  f"{result.steps},{result.moves},{result.ttsw},{result.lorot_average:.4f},"
+                  f"{wait.percentile(50)},{wait.percentile(90)},{wait.percentile(99)},{wait.max},"
+                  f"{ride.percentile(50)},{ride.percentile(90)},{ride.percentile(99)},{ride.max},"
+                  f"{result.stops},{result.mean_dwell_time:.2f},{engine.scenario}")
+
+    if profiler is not None:
+        profiler.disable()
+        print(profiler.summary(), file=sys.stderr)
+        if args.profile_collapsed:
+            profiler.write_collapsed(args.profile_collapsed)
+        if args.profile_trace:
+            profiler.write_chrome_trace(args.profile_trace)
+
+if __name__ == "__main__":
+    main()
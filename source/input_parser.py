@@ -1,41 +1,159 @@
 import json
+import os
 
-def parse_config(file_path: str) -> dict[str, int]:
+DEFAULT_SCENARIO: str = "default"   # name of the only scenario of a config file which does not list scenarios
+ENV_PREFIX: str = "LIFT_"           # environment variables overriding the config: LIFT_TOTAL_FLOORS=20, LIFT_SEED=1...
+SCENARIO_ENV_VAR: str = "LIFT_SCENARIO"     # environment variable selecting the scenario of a multi-scenario file
+
+# names the config can choose from: the keys of dispatcher.DISPATCHERS, scheduling.SCHEDULERS and
+# arrivals.ARRIVAL_PROFILES, listed here rather than imported so that parsing a config imports none of the simulation
+DISPATCHER_NAMES: tuple[str, ...] = ("nearest", "eta", "destination", "zoning")
+SCHEDULER_NAMES: tuple[str, ...] = ("look", "collective", "cost")
+ARRIVAL_PROFILE_NAMES: tuple[str, ...] = ("none", "poisson", "office_day")
+
+DEFAULTS: dict[str, int | float | str | None] = {
+    "total_floors": 15,
+    "capacity": 5,
+    "num_requests": 10,
+    "num_lifts": 1,
+    "dispatcher": "eta",
+    "scheduler": "look",
+    "arrivals": "none",
+    "arrival_rate": 0.1,
+    "seed": None
+}
+
+
+def parse_config(file_path: str | None, scenario: str | None = None, overrides: dict | None = None,
+                 environ: dict[str, str] | None = None) -> dict[str, int | float | str]:
     """
     Reads configuration from a JSON file and returns a dictionary.
 
+    The file either holds the parameters of a single simulation, or several scenarios:
+        {
+            "defaults": {"total_floors": 20, ...},             (optional, shared by every scenario)
+            "scenarios": {"quiet": {"num_requests": 10}, "busy": {"num_requests": 500}, ...}
+        }
+    in which case scenario is the name of the one to read (or the SCENARIO_ENV_VAR environment variable; a file with
+    a single scenario needs no name). file_path can be None, to use the defaults only.
+
+    The parameters read from the file are then overridden by the environment variables named after them (ENV_PREFIX
+    followed by the parameter in upper case, for example LIFT_NUM_REQUESTS=100; environ defaults to os.environ), and
+    finally by overrides (for example from the command line, see parse_overrides()). So a worker can be launched with
+    its parameters without writing a file. The dictionary returned also holds the name of the scenario, as "scenario".
+
     This function verifies the following conditions:
         - total_floors >= 2, because a lift in a building with 1 floor (or fewer) does not make sense
         - capacity >= 1, because a lift which cannot hold at least 1 person does not make sense
         - num_requests >= 0, because we cannot have a negative number of requests
-    
-    If the user fails to provide any keys, they will be replaced by the following defaults:
-        total_floors: 10
-        capacity: 4
-        num_requests: 30
+        - num_lifts >= 1, because a building needs at least one lift
+        - dispatcher is the name of one of the dispatchers in dispatcher.DISPATCHERS (DISPATCHER_NAMES)
+        - scheduler is the name of one of the schedulers in scheduling.SCHEDULERS (SCHEDULER_NAMES)
+        - arrivals is the name of one of the arrival profiles in arrivals.ARRIVAL_PROFILES (ARRIVAL_PROFILE_NAMES)
+        - arrival_rate >= 0, the average number of new requests per step for the "poisson" profile
+        - seed is an integer (runs with the same seed are identical), or null for a different run every time
+
+    If the user fails to provide any keys, they will be replaced by the following defaults (see DEFAULTS):
+        total_floors: 15
+        capacity: 5
+        num_requests: 10
+        num_lifts: 1
+        dispatcher: "eta"
+        scheduler: "look"
+        arrivals: "none"
+        arrival_rate: 0.1
+        seed: null
     """
+    environ = os.environ if environ is None else environ
+    scenarios = _read_scenarios(file_path)
+    if scenario is None:
+        scenario = environ.get(SCENARIO_ENV_VAR)
+    if scenario is None:
+        if len(scenarios) > 1:
+            raise ValueError(f"The configuration has several scenarios, choose one of: {', '.join(scenarios)}")
+        scenario = next(iter(scenarios))
+    if scenario not in scenarios:
+        raise ValueError(f"Unknown scenario {scenario!r}, must be one of: {', '.join(scenarios)}")
+
+    config = dict(scenarios[scenario])
+    config["scenario"] = scenario
+    for key in DEFAULTS:
+        if ENV_PREFIX + key.upper() in environ:
+            config[key] = _parse_value(environ[ENV_PREFIX + key.upper()])
+    config.update(overrides or {})
+    return _validate(config)
+
 
-    defaults: dict[str, int] = {
-        "total_floors": 15,
-        "capacity": 5,
-        "num_requests": 10
-    }
-    
+def scenario_names(file_path: str | None) -> list[str]:
+    """Returns the names of the scenarios of a configuration file, in order (DEFAULT_SCENARIO for a plain file)."""
+    return list(_read_scenarios(file_path))
+
+
+def parse_overrides(assignments: list[str]) -> dict:
+    """
+    Parses overrides given as "key=value" strings (for example on the command line) into a dictionary for
+    parse_config(). Values are read as JSON (so 20 is an int, null is None), or else taken as strings.
+    """
+    overrides = {}
+    for assignment in assignments:
+        key, separator, value = assignment.partition("=")
+        if not separator or key.strip() not in DEFAULTS:
+            raise ValueError(f"Overrides must be key=value with key one of: {', '.join(DEFAULTS)} (got {assignment!r})")
+        overrides[key.strip()] = _parse_value(value.strip())
+    return overrides
+
+
+def _parse_value(text: str):
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        return text
+
+
+def _read_scenarios(file_path: str | None) -> dict[str, dict]:
+    """Returns the parameters of each scenario of a file, as written in it (with the shared defaults applied)."""
+    if file_path is None:
+        return {DEFAULT_SCENARIO: {}}
     try:
         with open(file_path, 'r') as f:
             config = json.load(f)
     except (FileNotFoundError, json.JSONDecodeError) as e:
         raise ValueError(f"Error reading configuration: {e}")
-    
-    for key, default_value in defaults.items():
+    if not isinstance(config, dict):
+        raise ValueError("The configuration must be a JSON object")
+
+    if "scenarios" not in config:
+        return {DEFAULT_SCENARIO: config}
+    scenarios = config["scenarios"]
+    if not isinstance(scenarios, dict) or not scenarios:
+        raise ValueError("scenarios must be a non-empty object of scenario name -> parameters")
+    shared = config.get("defaults", {})
+    return {name: {**shared, **parameters} for name, parameters in scenarios.items()}
+
+
+def _validate(config: dict) -> dict:
+    """Fills in the defaults of the missing keys, and checks the values (see parse_config())."""
+    for key, default_value in DEFAULTS.items():
         if key not in config:
             config[key] = default_value
-    
+
     if not isinstance(config["total_floors"], int) or config["total_floors"] < 2:
         raise ValueError("total_floors must be an integer >= 2. We cannot have a building with 1 floor!")
     if not isinstance(config["capacity"], int) or config["capacity"] < 1:
         raise ValueError("Capacity must be an int > 0 (cannot have a lift with 0 capacity)")
     if not isinstance(config["num_requests"], int) or config["num_requests"] < 0:
         raise ValueError("num_requests must be a positive integer!")
-    
+    if not isinstance(config["num_lifts"], int) or config["num_lifts"] < 1:
+        raise ValueError("num_lifts must be an integer >= 1 (a building needs at least one lift)")
+    if config["dispatcher"] not in DISPATCHER_NAMES:
+        raise ValueError(f"dispatcher must be one of: {', '.join(DISPATCHER_NAMES)}")
+    if config["scheduler"] not in SCHEDULER_NAMES:
+        raise ValueError(f"scheduler must be one of: {', '.join(SCHEDULER_NAMES)}")
+    if config["arrivals"] not in ARRIVAL_PROFILE_NAMES:
+        raise ValueError(f"arrivals must be one of: {', '.join(ARRIVAL_PROFILE_NAMES)}")
+    if not isinstance(config["arrival_rate"], (int, float)) or config["arrival_rate"] < 0:
+        raise ValueError("arrival_rate must be a number >= 0")
+    if config["seed"] is not None and not isinstance(config["seed"], int):
+        raise ValueError("seed must be an integer, or null for a random seed")
+
     return config
@@ -0,0 +1,92 @@
+import math
+
+PERCENTILES: list[float] = [50, 90, 99]     # percentiles reported by LatencyHistogram.summary()
+
+
+class LatencyHistogram:
+    """
+    Streaming histogram of non-negative integer values (for example waiting times in steps), in the style of an HDR
+    histogram: values below 2^significant_bits are counted exactly, and larger values are counted in buckets whose
+    width is a fixed fraction of the value (at most 1/64, about 1.6%, with the default 7 bits). Memory is bounded by
+    the number of buckets (a few hundred for any realistic range of values), whatever the number of values recorded,
+    and two histograms can be merged, for example to combine the runs of a sweep.
+
+    Methods:
+        record(value: int, count: int = 1) -> None:
+            Records value, count times.
+
+        merge(other: LatencyHistogram) -> None:
+            Adds the values recorded by other to this histogram.
+
+        percentile(p: float) -> int:
+            Returns the value below which p% of the recorded values fall (within the bucket precision).
+
+        mean() -> float:
+            Returns the mean of the recorded values.
+
+        summary() -> dict[str, float]:
+            Returns the count, mean, p50, p90, p99 and max of the recorded values.
+    """
+
+    def __init__(self, significant_bits: int = 7):
+        self.significant_bits: int = significant_bits
+        self.count: int = 0
+        self.total: int = 0
+        self.max: int = 0
+        self._counts: dict[int, int] = {}   # bucket index -> number of values recorded in the bucket
+
+    def _bucket(self, value: int) -> int:
+        shift = value.bit_length() - self.significant_bits
+        if shift <= 0:
+            return value
+        return (shift << self.significant_bits) + (value >> shift)
+
+    def _highest_value(self, bucket: int) -> int:
+        """Returns the highest value which falls in a bucket."""
+        shift = bucket >> self.significant_bits
+        if shift == 0:
+            return bucket
+        return (((bucket - (shift << self.significant_bits)) + 1) << shift) - 1
+
+    def record(self, value: int, count: int = 1) -> None:
+        if value < 0:
+            raise ValueError("LatencyHistogram can only record values >= 0")
+        bucket = self._bucket(value)
+        self._counts[bucket] = self._counts.get(bucket, 0) + count
+        self.count += count
+        self.total += value * count
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        if other.significant_bits != self.significant_bits:
+            raise ValueError("Cannot merge histograms with different precisions")
+        for bucket, count in other._counts.items():
+            self._counts[bucket] = self._counts.get(bucket, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, p: float) -> int:
+        if self.count == 0:
+            return 0
+        rank = max(1, math.ceil(p / 100 * self.count))
+        seen = 0
+        for bucket in sorted(self._counts):
+            seen += self._counts[bucket]
+            if seen >= rank:
+                return min(self._highest_value(bucket), self.max)
+        return self.max
+
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def summary(self) -> dict[str, float]:
+        summary: dict[str, float] = {"count": self.count, "mean": self.mean()}
+        for p in PERCENTILES:
+            summary[f"p{p:g}"] = self.percentile(p)
+        summary["max"] = self.max
+        return summary
+
+    def __repr__(self) -> str:
+        return f"LatencyHistogram(count={self.count}, p50={self.percentile(50)}, p99={self.percentile(99)}, max={self.max})"
@@ -1,19 +1,32 @@
-from enum import Enum
-from typing import Callable
+from dataclasses import dataclass
 
+from direction import Direction
+from floor_index import FloorIndex
 from req_queue import ReqQueue
 from request import Request
+from scheduling import LookScheduler, Scheduler
 
-class Direction(Enum):
-    UP = "up"
-    DOWN = "down"
-    NONE = None
+
+@dataclass(frozen=True)
+class DwellTimeModel:
+    """
+    Time (in seconds) a lift spends at a stop: a fixed time to open and close the doors, plus a time per person getting
+    off and per person getting on. This makes crowded stops take longer than quiet ones.
+    """
+
+    door_seconds: float = 4.0           # opening and closing the doors
+    alighting_seconds: float = 1.0      # per person getting off
+    boarding_seconds: float = 1.2       # per person getting on
+
+    def dwell_time(self, alighted: int, boarded: int) -> float:
+        return self.door_seconds + alighted * self.alighting_seconds + boarded * self.boarding_seconds
 
 
 class Lift:
     """
     This class implements the main functionality of the lift. This class contains the queue of requests for the lift, 
-    as well as the implementation for determining which floor to go to.
+    and moves the lift; which floor to go to, where to stop and who gets on are decided by its scheduler (see
+    scheduling.py), LOOK by default.
 
     Attributes:
         current_floor (int):                  The current floor of the lift (starts at 1).
@@ -21,15 +34,26 @@ class Lift:
         capacity (int):                       Capacity of the lift (max requests on board).
         request_queue (ReqQueue):             Queue with the requests for the lift.
         onboard_requests (list[Request]):     List of requests which are onboard the lift at given time.
+        destination_index (FloorIndex):       Sorted index of the destination floors of the onboard requests.
         direction (enum):                     Current direction of the elevator - enum: (UP, DOWN, or NONE).
+        clock (int):                          Number of calls to move() so far; used to timestamp pickups and drop-offs.
+        offboarded (list[Request]):           Requests which got off the lift during the last move.
+        boarded (int):                        Number of requests which got on the lift during the last move.
+        dwell_model (DwellTimeModel):         How long the lift stays at a stop, given how many people get off and on.
+        last_dwell_time (float):              Seconds the lift spent at its stop during the last move (0 if it did not stop).
+        dwell_time (float):                   Seconds spent at stops since the start of the simulation.
+        scheduler (Scheduler):                Decides where the lift goes next, where it stops and who gets on.
 
     Public methods:
         __init__()
         move()
+        travel()
+        moves_to_next_stop()
         __repr__()
     """
 
-    def __init__(self, total_floors: int, capacity: int):
+    def __init__(self, total_floors: int, capacity: int, dwell_model: DwellTimeModel | None = None,
+                 scheduler: Scheduler | None = None):
         """
         Instantiates an instance of Lift class. Requires total_floors and capacity to be passed in by the caller.
         """
@@ -38,10 +62,18 @@ class Lift:
         self.capacity: int = capacity
         self.request_queue: ReqQueue = ReqQueue()       # Waiting requests
         self.onboard_requests: list[Request] = []       # Requests already picked up
+        self.destination_index: FloorIndex = FloorIndex()   # Destination floors of the onboard requests
         self.direction = Direction.NONE                 # enum, direction is initialised to NONE
         self.current_floor_stop: bool = True            # whether or not the lift needs to stop at the current floor
         self.currently_offboarding: bool = False        # whether or not people are currently getting off the lift
         self.currently_onboarding: bool = False         # whether or not people are currently getting on the lift
+        self.clock: int = 0                             # number of moves (units of time) since the start of the simulation
+        self.offboarded: list[Request] = []             # requests dropped off during the last move
+        self.boarded: int = 0                           # number of requests picked up during the last move
+        self.dwell_model: DwellTimeModel = dwell_model if dwell_model is not None else DwellTimeModel()
+        self.last_dwell_time: float = 0.0               # seconds spent at the stop made during the last move
+        self.dwell_time: float = 0.0                    # seconds spent at stops since the start of the simulation
+        self.scheduler: Scheduler = scheduler if scheduler is not None else LookScheduler()
 
 
     def _is_full(self) -> bool:
@@ -49,134 +81,144 @@ class Lift:
         return len(self.onboard_requests) >= self.capacity
 
 
-    def _get_candidate_floors(self) -> list[int]:
+    def _nearest_candidate_above(self) -> int | None:
         """
-        Helper function to get candidate floors for next_stop().
-        next_stop() will then filter these candidates and select appropriately.
+        Returns the nearest floor above the lift which is a candidate for its next stop, or None if there is none.
+        Candidates are the destination floors of onboard requests and, if the lift is not full, the origin floors of
+        waiting requests.
         """
-        candidate_floors: list[int] = []
-        # include onboard requests (their destination floors)
-        for req in self.onboard_requests:
-            candidate_floors.append(req.destination_floor)
-        # include waiting requests (their origin floors) if lift is not full
+        nearest = self.destination_index.nearest_above(self.current_floor)
         if not self._is_full():
-            for req in self.request_queue.get_requests():
-                candidate_floors.append(req.origin_floor)
-        return candidate_floors
+            waiting = self.request_queue.floor_index.nearest_above(self.current_floor)
+            if waiting is not None and (nearest is None or waiting < nearest):
+                nearest = waiting
+        return nearest
 
 
-    def _filter_candidates(self, candidates: list[int], compare: Callable[[int, int], bool], select: Callable[[list[int]], int]) -> int | None:
-        """
-        Helper function to filter candidate requests in _next_floor() method.
-        Retrurns the selected floor, or None if no valid candidate.
-        Compare takes in an inline (lambda) function which compares the candidate to the current floor based on 
-        the lift's current direction (so x>y or x<y based on if lift direction is upward or downward).
-        Select takes in a function, min if upward, max if downward. 
-        """
-        valid_floors: list[int] = [floor for floor in candidates if compare(floor, self.current_floor) == True]
-        return select(valid_floors) if valid_floors else None
+    def _nearest_candidate_below(self) -> int | None:
+        """Returns the nearest floor below the lift which is a candidate for its next stop, or None if there is none."""
+        nearest = self.destination_index.nearest_below(self.current_floor)
+        if not self._is_full():
+            waiting = self.request_queue.floor_index.nearest_below(self.current_floor)
+            if waiting is not None and (nearest is None or waiting > nearest):
+                nearest = waiting
+        return nearest
     
 
     def _need_to_stop(self) -> bool:
         """Helper function which returns True if the lift needs to stop and open the doors at current floor"""
-        # check if any onboard requests have reached their destination
-        for req in self.onboard_requests:
-            if req.destination_floor == self.current_floor:
-                return True
-        # check if anyone is waiting for the lift at current floor
-        for req in self.request_queue.get_requests():
-            if req.origin_floor == self.current_floor:
-                return True
-        return False
+        return self.scheduler.stops_at(self, self.current_floor)
     
     
     def _next_floor(self) -> int | None:
         """
-        This function determines which floor the lift should move to next.
-        Implements an improved SCAN algorithm (also known as elevator algorithm or look algorithm).
+        This function determines which floor the lift should move to next (and updates its direction), as decided by
+        the scheduler. Returns None if the lift has nowhere to go.
         """
-        candidates = self._get_candidate_floors()
-        
-        if not candidates:
-            self.direction = Direction.NONE
-            return None
-        
-        if self.direction == Direction.NONE:
-            # we arbitrarily assign UP, the next part of the function will deal appropriately
-            self.direction = Direction.UP
-        
-        # Process requests based on current direction
-        if self.direction == Direction.UP:
-            # Get floors above current position
-            next_up = self._filter_candidates(candidates, lambda x, y: x > y, min)
-            if next_up is not None:
-                return next_up
-                
-            # If no requests above, check for requests below (direction change)
-            next_down = self._filter_candidates(candidates, lambda x, y: x < y, max)
-            if next_down is not None:
-                self.direction = Direction.DOWN
-                return next_down
-        
-        elif self.direction == Direction.DOWN:
-            # Get floors below current position
-            next_down = self._filter_candidates(candidates, lambda x, y: x < y, max)
-            if next_down is not None:
-                return next_down
-                
-            # If no requests below, check for requests above (direction change)
-            next_up = self._filter_candidates(candidates, lambda x, y: x > y, min)
-            if next_up is not None:
-                self.direction = Direction.UP
-                return next_up
-        
-        # If we get here, there are no valid candidate floors
-        self.direction = Direction.NONE
-        return None
+        return self.scheduler.next_floor(self)
     
 
     def _offload_and_onload_requests(self) -> None:
         """
         This function offloads onboard requests which have reached their destination, and, if space is available,
-        picks up any waiting requests.
+        picks up the waiting requests the scheduler lets on (see Scheduler.boarding_direction()).
+        Both are done as one batch per stop: the people getting off are split from those staying in a single pass,
+        and the people getting on (up to the room left in the lift) are taken from the queue at once, so the cost
+        depends on the number of people moving, not on how many are waiting in the building.
+        The time the stop takes is then given by the dwell time model.
         """
         # drop off any served requests
-        served_requests = [req for req in self.onboard_requests if req.destination_floor == self.current_floor]
-        if served_requests:
+        served_requests: list[Request] = []
+        if self.destination_index.count(self.current_floor) > 0:
+            staying_requests: list[Request] = []
+            for req in self.onboard_requests:
+                if req.destination_floor == self.current_floor:
+                    req.dropoff_time = self.clock
+                    served_requests.append(req)
+                else:
+                    staying_requests.append(req)
             self.currently_offboarding = True # if a request has been served, set status to True
-        for req in served_requests:
-            self.onboard_requests.remove(req)
-
-        waiting_requests = self.request_queue.get_requests()
-        for req in waiting_requests:
-            if req.origin_floor == self.current_floor and not self._is_full():
-                self.onboard_requests.append(req) # add the request to list of onboard requests
-                self.request_queue.remove_request(req) # remove that request from the waiting request queue
+            self.offboarded = served_requests
+            self.onboard_requests = staying_requests
+            self.destination_index.remove(self.current_floor, len(served_requests))
+
+        # pick up waiting requests at this floor, in the order they arrived, until the lift is full
+        room = self.capacity - len(self.onboard_requests)
+        if room > 0:
+            boarders = self.request_queue.pop_many_at_floor(self.current_floor, room,
+                                                            self.scheduler.boarding_direction(self))
+        else:
+            boarders = []
+        if boarders:
+            destinations: dict[int, int] = {}
+            for req in boarders:
                 req.picked_up = True
-                self.currently_onboarding = True # a request onboarded, so we update the status to True
+                req.pickup_time = self.clock
+                destinations[req.destination_floor] = destinations.get(req.destination_floor, 0) + 1
+            for floor, count in destinations.items():
+                self.destination_index.add(floor, count)
+            self.onboard_requests.extend(boarders) # add the requests to list of onboard requests
+            self.boarded = len(boarders)
+            self.currently_onboarding = True # a request onboarded, so we update the status to True
+
+        self.last_dwell_time = self.dwell_model.dwell_time(len(served_requests), self.boarded)
+        self.dwell_time += self.last_dwell_time
 
 
     def _reset_onboarding_offboarding_status(self) -> None:
         """Resets the status of self.currently_offboarding and self.currently_onboarding to False."""
         self.currently_offboarding = False
         self.currently_onboarding = False
+        if self.offboarded:
+            self.offboarded = []
+        self.boarded = 0
+        self.last_dwell_time = 0.0
 
 
-    def move(self) -> None:
+    def _floors_to_next_stop(self, next_floor: int) -> int:
         """
-        The move() method updates the current_floor based on which way the lift is moving (which is determined by _next_floor() method).
-        move() also calls the member method need_to_stop() to see if the lift needs to stop at the current floor (to pick up or
-        drop off any requests).
+        Returns the number of floors between the lift and the first floor on its way to next_floor where it will stop
+        (see Scheduler.next_stop()).
+        """
+        return abs(self.scheduler.next_stop(self, next_floor) - self.current_floor)
+
+
+    def moves_to_next_stop(self) -> int | None:
+        """
+        Returns the number of move() calls until the lift next stops at a floor, or None if the lift is idle.
+        Like move(), this updates the lift's direction for its next stop.
+        """
+        next_floor = self._next_floor()
+        if next_floor is None:
+            return 1 if not self._is_full() and self.request_queue.count_at(self.current_floor) > 0 else None
+        return self._floors_to_next_stop(next_floor)
+
+
+    def travel(self, max_moves: int) -> int:
+        """
+        Moves the lift straight to its next stop, skipping the floors in between where nothing happens.
+        This is equivalent to calling move() up to max_moves times, stopping after the first move where the lift stops
+        at a floor. Returns the number of move() calls this stands for: when the lift is idle every call to move() is
+        identical, so an idle lift uses up all of max_moves.
         """
         next_floor = self._next_floor()
         self._reset_onboarding_offboarding_status()
         if next_floor is None:
-            return
-        
+            # nobody to fetch on any other floor, but people may have called the lift to the floor it is idle at
+            if not self._is_full() and self.request_queue.count_at(self.current_floor) > 0:
+                self.clock += 1
+                self.current_floor_stop = True
+                self._offload_and_onload_requests()
+                return 1
+            self.clock += max_moves
+            return max_moves
+
+        floors = min(self._floors_to_next_stop(next_floor), max_moves)
+        self.clock += floors
         if self.current_floor < next_floor:
-            self.current_floor += 1
-        elif self.current_floor > next_floor:
-            self.current_floor -= 1
+            self.current_floor += floors
+        else:
+            self.current_floor -= floors
 
         self.current_floor_stop = self._need_to_stop()  # update the member variable which shows whether or not the lift needs to stop
 
@@ -184,8 +226,19 @@ class Lift:
             self._offload_and_onload_requests()
 
         # if there are no more requests, and no one onboard, reset direction to None
-        if not self.request_queue.get_requests() and not self.onboard_requests:
+        if not self.request_queue and not self.onboard_requests:
             self.direction = Direction.NONE
+        return floors
+
+
+    def move(self) -> None:
+        """
+        The move() method updates the current_floor based on which way the lift is moving (which is determined by _next_floor() method).
+        move() also calls the member method need_to_stop() to see if the lift needs to stop at the current floor (to pick up or
+        drop off any requests).
+        If the lift is idle and people are waiting at its current floor, it opens its doors for them without moving.
+        """
+        self.travel(1)
 
 
     def __repr__(self) -> str:
@@ -0,0 +1,335 @@
+import argparse
+import asyncio
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from dataclasses import dataclass
+
+from request import Request
+
+READ_SIZE: int = 65536              # bytes read from a source at a time; every complete line read becomes one batch
+MAX_BATCH_SIZE: int = 4096          # calls per batch at most (a bigger read is split)
+MAX_PENDING_BATCHES: int = 64       # batches waiting for the simulation before the sources stop being read
+TAIL_POLL_SECONDS: float = 0.05     # how often a tailed file is checked for new lines once its end is reached
+STARTUP_TIMEOUT_SECONDS: float = 5.0
+
+
+@dataclass
+class FeedStats:
+    """Counters of a live feed, updated by the feed's thread (read them from any thread, for display)."""
+
+    received: int = 0           # calls read and accepted
+    rejected: int = 0           # lines which are not a valid call for the building
+    batches: int = 0            # batches handed to the simulation
+    stalls: int = 0             # times the sources were paused because the simulation had not taken the batches yet
+    last_timestamp: float = 0.0 # timestamp of the latest call received
+
+
+class LiveFeed:
+    """
+    Feeds hall calls from an external source into the simulation while it runs, for example the traffic of a real
+    building (a digital twin). Calls are lines of text "timestamp,origin,destination" (the timestamp in seconds, a
+    "timestamp,origin,destination" header line is skipped), read from one of these sources:
+        tcp://host:port     any number of clients connecting to a TCP server the feed opens (port 0 picks a free one)
+        unix:///path        the same, on a Unix domain socket
+        -                   standard input (for example a pipe)
+        path                a file, read from the start then followed as it grows (like tail -f)
+
+    The sources are read by an asyncio event loop, in a thread of its own, and every read becomes a batch of calls.
+    The batches are handed to the simulation through a bounded thread-safe queue: the simulation takes them with
+    drain(), which never blocks, so a Tk event loop calling it keeps running smoothly. When MAX_PENDING_BATCHES
+    batches are waiting, the sources are not read any more until the simulation catches up, so a source sending
+    faster than the simulation takes the calls is slowed down (TCP flow control, a full pipe) rather than filling the
+    memory.
+
+    Methods:
+        start() -> None:
+            Starts reading the source (returns once the source is open, for example once the server is listening).
+
+        drain(max_batches: int | None = None) -> list[Request]:
+            Returns the calls received since the last call, in order of arrival (from max_batches batches at most).
+
+        finished() -> bool:
+            Returns True once the source has ended (end of a pipe, or the feed was stopped) and every call was drained.
+
+        stop() -> None:
+            Closes the source and stops the feed's thread.
+    """
+
+    def __init__(self, source: str, total_floors: int, max_pending_batches: int = MAX_PENDING_BATCHES):
+        self.source: str = source
+        self.total_floors: int = total_floors
+        self.stats: FeedStats = FeedStats()
+        self.address: tuple | str | None = None     # address the server listens on (tcp:// and unix:// sources)
+        self._batches: queue.Queue[list[Request]] = queue.Queue(max_pending_batches)
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._ready = threading.Event()
+        self._error: BaseException | None = None
+        self._ended: bool = False
+        self._space: asyncio.Event | None = None    # set when the simulation drains batches
+        self._stopping: asyncio.Event | None = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="live-feed", daemon=True)
+        self._thread.start()
+        if not self._ready.wait(STARTUP_TIMEOUT_SECONDS):
+            raise TimeoutError(f"The live feed {self.source!r} did not start")
+        if self._error is not None:
+            raise self._error
+
+    def drain(self, max_batches: int | None = None) -> list[Request]:
+        calls: list[Request] = []
+        taken = 0
+        while max_batches is None or taken < max_batches:
+            try:
+                calls.extend(self._batches.get_nowait())
+            except queue.Empty:
+                break
+            taken += 1
+        if taken and self._loop is not None and not self._ended:
+            try:
+                self._loop.call_soon_threadsafe(self._space.set)     # wake up the readers waiting for room
+            except RuntimeError:
+                pass    # the feed's loop has just ended: nobody is waiting
+        return calls
+
+    def finished(self) -> bool:
+        return self._ended and self._batches.empty()
+
+    def stop(self) -> None:
+        if self._loop is not None and self._thread is not None and self._thread.is_alive():
+            self._loop.call_soon_threadsafe(self._stopping.set)
+            self._thread.join(STARTUP_TIMEOUT_SECONDS)
+
+    def __enter__(self) -> "LiveFeed":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    # everything below runs in the feed's thread
+
+    def _run(self) -> None:
+        try:
+            asyncio.run(self._main())
+        except BaseException as e:   # reported by start() if the source could not be opened
+            self._error = e
+        finally:
+            self._ended = True
+            self._ready.set()
+
+    async def _main(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._space = asyncio.Event()
+        self._stopping = asyncio.Event()
+        if self.source.startswith("tcp://"):
+            host, _, port = self.source[len("tcp://"):].rpartition(":")
+            server = await asyncio.start_server(self._serve_client, host or "127.0.0.1", int(port))
+            self.address = server.sockets[0].getsockname()
+            await self._serve(server)
+        elif self.source.startswith("unix://"):
+            path = self.source[len("unix://"):]
+            server = await asyncio.start_unix_server(self._serve_client, path)
+            self.address = path
+            await self._serve(server)
+            if os.path.exists(path):
+                os.remove(path)
+        elif self.source == "-":
+            reader = asyncio.StreamReader(limit=READ_SIZE)
+            await self._loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+            self._ready.set()
+            await self._until_stopped(self._read_stream(reader))
+        else:
+            with open(self.source, "rb") as f:
+                self._ready.set()
+                await self._until_stopped(self._tail(f))
+
+    async def _serve(self, server: asyncio.AbstractServer) -> None:
+        self._ready.set()
+        async with server:
+            await self._stopping.wait()
+
+    async def _until_stopped(self, reading) -> None:
+        """Runs the reading coroutine until it ends or the feed is stopped."""
+        task = asyncio.ensure_future(reading)
+        stopping = asyncio.ensure_future(self._stopping.wait())
+        await asyncio.wait([task, stopping], return_when=asyncio.FIRST_COMPLETED)
+        for pending in (task, stopping):
+            pending.cancel()
+
+    async def _serve_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            await self._read_stream(reader)
+        finally:
+            writer.close()
+
+    async def _read_stream(self, reader: asyncio.StreamReader) -> None:
+        remainder = b""
+        while True:
+            data = await reader.read(READ_SIZE)
+            if not data:
+                break
+            remainder = await self._feed(remainder + data)
+        await self._feed(remainder + b"\n")
+
+    async def _tail(self, f) -> None:
+        remainder = b""
+        while True:
+            data = f.read(READ_SIZE)
+            if not data:
+                await asyncio.sleep(TAIL_POLL_SECONDS)
+                continue
+            remainder = await self._feed(remainder + data)
+
+    async def _feed(self, data: bytes) -> bytes:
+        """Parses the complete lines of data, hands them over as batches, and returns the incomplete last line."""
+        lines = data.split(b"\n")
+        remainder = lines.pop()
+        batch: list[Request] = []
+        for line in lines:
+            req = self._parse(line)
+            if req is not None:
+                batch.append(req)
+                if len(batch) == MAX_BATCH_SIZE:
+                    await self._put(batch)
+                    batch = []
+        if batch:
+            await self._put(batch)
+        return remainder
+
+    def _parse(self, line: bytes) -> Request | None:
+        fields = line.split(b",")
+        if len(fields) != 3:
+            if line.strip():
+                self.stats.rejected += 1
+            return None
+        try:
+            timestamp, origin, destination = float(fields[0]), int(fields[1]), int(fields[2])
+        except ValueError:
+            if fields[0].strip() != b"timestamp":     # header line
+                self.stats.rejected += 1
+            return None
+        if not (1 <= origin <= self.total_floors and 1 <= destination <= self.total_floors) or origin == destination:
+            self.stats.rejected += 1
+            return None
+        self.stats.received += 1
+        self.stats.last_timestamp = timestamp
+        return Request(origin, destination)
+
+    async def _put(self, batch: list[Request]) -> None:
+        """Hands a batch to the simulation, waiting (without blocking the event loop) while the queue is full."""
+        while True:
+            try:
+                self._batches.put_nowait(batch)
+                self.stats.batches += 1
+                return
+            except queue.Full:
+                # drain() sets the event from the simulation's thread through the loop, so it cannot be set between
+                # the clear() and the wait()
+                self.stats.stalls += 1
+                self._space.clear()
+                await self._space.wait()
+
+
+async def send_calls(target: str, total_floors: int, rate: float, duration: float, seed: int | None = None) -> int:
+    """
+    Stand-in for a building management system: sends random calls to target (a tcp:// or unix:// source of a
+    LiveFeed, "-" for standard output, or a file to append to) at rate calls per second for duration seconds, and
+    returns the number of calls sent. Calls are written in small batches, and sending waits whenever the receiver
+    does not keep up.
+    """
+    rng = random.Random(seed)
+    if target.startswith("tcp://"):
+        host, _, port = target[len("tcp://"):].rpartition(":")
+        _, writer = await asyncio.open_connection(host or "127.0.0.1", int(port))
+        write, flush = writer.write, writer.drain
+    elif target.startswith("unix://"):
+        _, writer = await asyncio.open_unix_connection(target[len("unix://"):])
+        write, flush = writer.write, writer.drain
+    else:
+        writer = None
+        f = sys.stdout.buffer if target == "-" else open(target, "ab")
+
+        def write(data: bytes) -> None:
+            f.write(data)
+
+        async def flush() -> None:
+            f.flush()
+
+    start = time.monotonic()
+    sent = 0
+    while True:
+        elapsed = time.monotonic() - start
+        if elapsed >= duration:
+            break
+        due = int(elapsed * rate) - sent
+        if due <= 0:
+            await asyncio.sleep(0.001)
+            continue
+        lines = []
+        for _ in range(due):
+            origin = rng.randint(1, total_floors)
+            destination = rng.randint(1, total_floors - 1)
+            if destination >= origin:
+                destination += 1
+            lines.append(f"{time.time():.3f},{origin},{destination}\n")
+        write("".join(lines).encode())
+        await flush()
+        sent += due
+    if writer is not None:
+        writer.close()
+        await writer.wait_closed()
+    elif target != "-":
+        f.close()
+    return sent
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Send or receive live hall calls (timestamp,origin,destination lines).")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    send = commands.add_parser("send", help="send random calls, as a stand-in for a building management system")
+    send.add_argument("target", help="tcp://host:port, unix:///path, - (standard output) or a file to append to")
+    send.add_argument("--floors", type=int, default=15, help="total_floors of the building")
+    send.add_argument("--rate", type=float, default=1000, help="calls per second")
+    send.add_argument("--duration", type=float, default=10, help="seconds to send for")
+    send.add_argument("--seed", type=int, default=None, help="seed of the random calls")
+
+    listen = commands.add_parser("listen", help="receive calls and print the throughput, without simulating them")
+    listen.add_argument("source", help="tcp://host:port, unix:///path, - (standard input) or a file to follow")
+    listen.add_argument("--floors", type=int, default=15, help="total_floors of the building")
+    listen.add_argument("--duration", type=float, default=None, help="seconds to listen for (default: until the source ends)")
+    return parser.parse_args()
+
+
+def main():
+    args = _parse_args()
+    if args.command == "send":
+        sent = asyncio.run(send_calls(args.target, args.floors, args.rate, args.duration, args.seed))
+        print(f"Sent {sent} calls", file=sys.stderr)
+        return
+
+    feed = LiveFeed(args.source, args.floors)
+    feed.start()
+    print(f"Listening on {feed.address or args.source}", file=sys.stderr)
+    start = time.monotonic()
+    drained = 0
+    try:
+        while not feed.finished() and (args.duration is None or time.monotonic() - start < args.duration):
+            drained += len(feed.drain())
+            time.sleep(0.01)
+    except KeyboardInterrupt:
+        pass
+    feed.stop()
+    elapsed = time.monotonic() - start
+    stats = feed.stats
+    print(f"{drained} calls in {elapsed:.1f} s ({drained / elapsed:,.0f}/s), {stats.rejected} rejected, "
+          f"{stats.batches} batches, {stats.stalls} stalls")
+
+if __name__ == "__main__":
+    main()
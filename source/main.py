@@ -1,15 +1,61 @@
-import tkinter as tk
+import argparse
 import os
+import sys
 
-from source.simulation import LiftSimulatorGUI
+from input_parser import parse_config, parse_overrides
 
 CONFIG_FILEPATH: str = os.path.join("source", "config.json") # filepath for config.json
+PROFILE_ENV_VAR: str = "LIFT_PROFILE"   # if set, the GUI is profiled, and the profile written to files with this prefix
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run the lift simulation in a window.")
+    parser.add_argument("--config", default=CONFIG_FILEPATH, help="path to the configuration file")
+    parser.add_argument("--scenario", default=None, help="scenario of the configuration file to run")
+    parser.add_argument("--live-feed", default=None, metavar="SOURCE", help="feed calls from tcp://host:port, unix:///path, - (stdin) or a file (see live_feed.py)")
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=VALUE", help="override a parameter of the configuration (can be repeated)")
+    return parser.parse_args()
 
 
 def main():
+    args = _parse_args()
+    try:
+        config = parse_config(args.config, args.scenario, parse_overrides(args.set))
+    except ValueError as e:
+        sys.exit(str(e))
+
+    # Tk and the GUI are only imported here, once the configuration is known to be valid
+    import tkinter as tk
+    from simulation import LiftSimulatorGUI
+
+    profile_prefix = os.environ.get(PROFILE_ENV_VAR)
+    if profile_prefix:
+        # only imported when asked for: without it, the simulation runs with no instrumentation at all
+        from profiling import GUI_PHASES, Profiler
+        profiler = Profiler(trace=True)
+        profiler.enable()
+        profiler.instrument(LiftSimulatorGUI, GUI_PHASES)
+
+    live_feed = None
+    if args.live_feed is not None:
+        from live_feed import LiveFeed
+        live_feed = LiveFeed(args.live_feed, config["total_floors"])
+        try:
+            live_feed.start()
+        except OSError as e:
+            sys.exit(f"Cannot open the live feed {args.live_feed}: {e}")
+
     root = tk.Tk()
-    gui = LiftSimulatorGUI(root, CONFIG_FILEPATH)
+    gui = LiftSimulatorGUI(root, config, live_feed)
     root.mainloop()
+    if live_feed is not None:
+        live_feed.stop()
+
+    if profile_prefix:
+        profiler.disable()
+        print(profiler.summary())
+        profiler.write_collapsed(f"{profile_prefix}.collapsed.txt")
+        profiler.write_chrome_trace(f"{profile_prefix}.trace.json")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,189 @@
+import json
+import os
+import sys
+from array import array
+
+NPY_MAGIC: bytes = b"\x93NUMPY\x01\x00"    # .npy format version 1.0
+NPY_HEADER_SIZE: int = 128                 # bytes before the data, fixed so the header can be rewritten as the file grows
+CHUNK_SIZE: int = 65536                    # number of samples buffered in memory before they are appended to the files
+METADATA_FILE: str = "metadata.json"
+
+_BYTE_ORDER: str = "<" if sys.byteorder == "little" else ">"
+_NPY_TYPES: dict[str, str] = {"q": "i8", "d": "f8"}     # array typecode -> .npy dtype
+
+# columns written by MetricsSink: one sample per window of steps
+METRIC_COLUMNS: dict[str, str] = {
+    "step": "q",                # first step of the window
+    "steps": "q",               # number of steps in the window (only the last window can be shorter)
+    "occupancy_mean": "d",      # average occupancy ratio of the bank of lifts over the window (LOR)
+    "occupancy_max": "d",       # highest occupancy ratio over the window
+    "waiting_mean": "d",        # average number of people waiting over the window
+    "waiting_max": "q",         # highest number of people waiting over the window
+}
+
+
+class NpyColumnWriter:
+    """
+    Writes a one dimensional array to a .npy file, by appending chunks of values, without holding the array in memory
+    (and without NumPy). The header, which holds the length of the array, is rewritten after every chunk, so the file
+    can be read with numpy.load(path, mmap_mode="r") at any time, including while the simulation is still running.
+    Given length, the writer carries on an existing file instead, cut back to its first length values.
+    """
+
+    def __init__(self, path: str, typecode: str, length: int | None = None):
+        self.path: str = path
+        self.typecode: str = typecode
+        self.length: int = length or 0
+        if length is None:
+            self._file = open(path, "wb")
+        else:
+            size = NPY_HEADER_SIZE + length * array(typecode).itemsize
+            if not os.path.exists(path) or os.path.getsize(path) < size:
+                raise ValueError(f"{path} is missing samples written before the snapshot, so it cannot be carried on")
+            self._file = open(path, "r+b")
+            self._file.truncate(size)
+        self._write_header()
+
+    def _write_header(self) -> None:
+        header = (f"{{'descr': '{_BYTE_ORDER}{_NPY_TYPES[self.typecode]}', 'fortran_order': False, "
+                  f"'shape': ({self.length},), }}")
+        padding = NPY_HEADER_SIZE - len(NPY_MAGIC) - 2 - len(header) - 1
+        header_bytes = (header + " " * padding + "\n").encode("latin1")
+        self._file.seek(0)
+        self._file.write(NPY_MAGIC + len(header_bytes).to_bytes(2, "little") + header_bytes)
+        self._file.seek(0, os.SEEK_END)
+
+    def append(self, values: array) -> None:
+        values.tofile(self._file)
+        self.length += len(values)
+        self._write_header()
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class MetricsSink:
+    """
+    Streams the per-step metrics of a run to disk, instead of keeping them in memory (like SimulationResult.lor).
+    Steps are aggregated into windows of `window` steps (1 keeps every step), and each window becomes one sample of
+    the columns in METRIC_COLUMNS. Each column is a .npy file in directory, appended to one chunk of samples at a
+    time, so a run of any length uses a fixed amount of memory, and analysis can memory map the columns (see
+    read_metrics()) rather than parse them.
+
+    Runs of steps with the same state (as recorded by the event driven engine) are aggregated in closed form, so the
+    output is the same in both modes.
+
+    A run restored from a snapshot carries on the columns it started: given the position() of the sink when the
+    snapshot was saved (SimulationEngine.metrics_position), the columns are cut back to the samples written by then,
+    and the window in progress is picked up where it was, so the files are the same as for an uninterrupted run.
+
+    Methods:
+        record(steps: int, waiting: int, onboard: int) -> None:
+            Records steps steps during which waiting people were waiting and onboard people were in the lifts.
+
+        position() -> dict:
+            Returns how far the sink has got (samples written and the window in progress), to carry it on from there.
+
+        flush() -> None:
+            Appends the buffered samples to the files.
+
+        close() -> None:
+            Writes the last (partial) window, the metadata file, and closes the files.
+    """
+
+    def __init__(self, directory: str, capacity: int, window: int = 1, chunk_size: int = CHUNK_SIZE,
+                 first_step: int = 0, position: dict | None = None):
+        if window < 1:
+            raise ValueError("The metrics window must be at least 1 step")
+        if position is not None and position["window"] != window:
+            raise ValueError(f"The metrics were written with a window of {position['window']} steps, not {window}")
+        self.directory: str = directory
+        self.capacity: int = capacity           # total capacity of the bank of lifts, occupancy = onboard / capacity
+        self.window: int = window
+        self.chunk_size: int = chunk_size
+        self.step: int = first_step             # first step of the next window (a restored run does not start at 0)
+        os.makedirs(directory, exist_ok=True)
+        samples = position["samples"] if position is not None else None
+        self._writers: dict[str, NpyColumnWriter] = {
+            name: NpyColumnWriter(os.path.join(directory, f"{name}.npy"), typecode, samples)
+            for name, typecode in METRIC_COLUMNS.items()}
+        self._buffers: dict[str, array] = {name: array(typecode) for name, typecode in METRIC_COLUMNS.items()}
+        # current window
+        self._filled: int = 0
+        self._onboard_sum: int = 0
+        self._onboard_max: int = 0
+        self._waiting_sum: int = 0
+        self._waiting_max: int = 0
+        if position is not None:
+            self.step = position["step"]
+            (self._filled, self._onboard_sum, self._onboard_max,
+             self._waiting_sum, self._waiting_max) = position["window_in_progress"]
+
+    def record(self, steps: int, waiting: int, onboard: int) -> None:
+        while steps:
+            if self._filled == 0 and steps >= self.window:
+                # whole windows with the same state: written in one go (a chunk at most, to bound the memory used)
+                windows = min(steps // self.window, self.chunk_size)
+                self._append(windows, waiting * self.window, onboard * self.window, onboard, waiting, self.window)
+                steps -= windows * self.window
+                continue
+            taken = min(steps, self.window - self._filled)
+            self._filled += taken
+            self._onboard_sum += onboard * taken
+            self._waiting_sum += waiting * taken
+            self._onboard_max = max(self._onboard_max, onboard)
+            self._waiting_max = max(self._waiting_max, waiting)
+            steps -= taken
+            if self._filled == self.window:
+                self._end_window()
+
+    def _end_window(self) -> None:
+        self._append(1, self._waiting_sum, self._onboard_sum, self._onboard_max, self._waiting_max, self._filled)
+        self._filled = self._onboard_sum = self._onboard_max = self._waiting_sum = self._waiting_max = 0
+
+    def _append(self, windows: int, waiting_sum: int, onboard_sum: int, onboard_max: int, waiting_max: int,
+                steps: int) -> None:
+        """Appends `windows` identical samples of `steps` steps each."""
+        buffers = self._buffers
+        buffers["step"].extend(range(self.step, self.step + windows * steps, steps))
+        buffers["steps"].extend([steps] * windows)
+        buffers["occupancy_mean"].extend([onboard_sum / (steps * self.capacity)] * windows)
+        buffers["occupancy_max"].extend([onboard_max / self.capacity] * windows)
+        buffers["waiting_mean"].extend([waiting_sum / steps] * windows)
+        buffers["waiting_max"].extend([waiting_max] * windows)
+        self.step += windows * steps
+        if len(buffers["step"]) >= self.chunk_size:
+            self.flush()
+
+    def position(self) -> dict:
+        return {"window": self.window, "samples": self._writers["step"].length + len(self._buffers["step"]),
+                "step": self.step, "window_in_progress": (self._filled, self._onboard_sum, self._onboard_max,
+                                                          self._waiting_sum, self._waiting_max)}
+
+    def flush(self) -> None:
+        for name, buffer in self._buffers.items():
+            self._writers[name].append(buffer)
+            self._buffers[name] = array(buffer.typecode)
+
+    def close(self) -> None:
+        if self._filled:
+            self._end_window()
+        self.flush()
+        for writer in self._writers.values():
+            writer.close()
+        with open(os.path.join(self.directory, METADATA_FILE), "w") as f:
+            json.dump({"window": self.window, "capacity": self.capacity, "last_step": self.step,
+                       "samples": self._writers["step"].length, "columns": list(METRIC_COLUMNS)}, f)
+
+
+def read_metrics(directory: str) -> dict:
+    """
+    Returns the columns written by a MetricsSink as read-only memory mapped NumPy arrays, by name. Only the pages of
+    the files which are actually used are read from disk.
+
+    Requires NumPy, which is only imported when this function is called.
+    """
+    import numpy as np
+
+    return {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r") for name in METRIC_COLUMNS}
@@ -0,0 +1,147 @@
+import functools
+import json
+import time
+from dataclasses import dataclass, field
+
+from building import Building
+from engine import SimulationEngine
+from latency import LatencyHistogram
+from lift import Lift
+from req_queue import ReqQueue
+
+# methods timed by Profiler.enable(), by class: the phases of a simulation step
+SIMULATION_PHASES: list[tuple[type, list[str]]] = [
+    (SimulationEngine, ["step", "advance", "_release_arrivals", "_record"]),
+    (Building, ["move", "travel", "dispatch", "waiting_count", "onboard_count"]),
+    (Lift, ["move", "travel", "_next_floor", "_need_to_stop", "_floors_to_next_stop", "_offload_and_onload_requests"]),
+    (ReqQueue, ["add_request", "remove_request", "pop_at_floor", "pop_many_at_floor", "get_requests"]),
+]
+# methods of LiftSimulatorGUI worth timing (the GUI is not imported here, so that profiling works without Tk)
+GUI_PHASES: list[str] = ["simulation_frame", "_run_steps", "simulation_step", "_redraw", "_update_lift_position",
+                         "_update_waiting_indicators", "_get_status_text"]
+MAX_TRACE_EVENTS: int = 1_000_000   # a Chrome trace stops recording after this many calls, to bound its memory
+
+
+@dataclass
+class PhaseStats:
+    """Counters of one phase (timed method): number of calls, time with and without the phases it called, durations."""
+
+    calls: int = 0
+    total_ns: int = 0
+    own_ns: int = 0
+    durations: LatencyHistogram = field(default_factory=LatencyHistogram)   # in nanoseconds
+
+
+class Profiler:
+    """
+    Opt-in instrumentation of the phases of a simulation step. enable() replaces the timed methods (see
+    SIMULATION_PHASES) with wrappers which count the calls and time them, and disable() puts the original methods
+    back, so the simulation runs at full speed whenever the profiler is not enabled: nothing is checked or timed.
+
+    Phases nest (Lift.travel() calls Lift._next_floor(), etc.), so each phase records both its total time and its own
+    time (excluding the phases it called), and the time of every stack of phases is kept for flame graphs.
+
+    Methods:
+        enable(phases: list[tuple[type, list[str]]] = SIMULATION_PHASES) -> None:
+            Starts timing the given methods.
+
+        instrument(cls: type, methods: list[str]) -> None:
+            Starts timing methods of cls (for example LiftSimulatorGUI and GUI_PHASES).
+
+        disable() -> None:
+            Stops timing, and restores every method instrumented.
+
+        summary() -> str:
+            Returns a table of the calls and times of each phase.
+
+        write_collapsed(path: str) -> None:
+            Writes the own time of each stack of phases in the collapsed stack format of flamegraph.pl / speedscope.
+
+        write_chrome_trace(path: str) -> None:
+            Writes every call as a Chrome trace (chrome://tracing, Perfetto); only if the profiler was made with trace=True.
+    """
+
+    def __init__(self, trace: bool = False):
+        self.phases: dict[str, PhaseStats] = {}
+        self.stacks: dict[str, int] = {}            # "phase;phase;phase" -> own time of the innermost phase, in ns
+        self.trace_events: list[dict] | None = [] if trace else None
+        self._stack: list[list] = []                # [phase, stack path, time spent in the phases it called] per active call
+        self._originals: list[tuple[type, str, object]] = []
+        self._origin_ns: int = time.perf_counter_ns()
+
+    def enable(self, phases: list[tuple[type, list[str]]] = SIMULATION_PHASES) -> None:
+        for cls, methods in phases:
+            self.instrument(cls, methods)
+
+    def instrument(self, cls: type, methods: list[str]) -> None:
+        for name in methods:
+            original = cls.__dict__[name]
+            self._originals.append((cls, name, original))
+            setattr(cls, name, self._wrap(f"{cls.__name__}.{name}", original))
+
+    def disable(self) -> None:
+        for cls, name, original in reversed(self._originals):
+            setattr(cls, name, original)
+        self._originals.clear()
+
+    def __enter__(self) -> "Profiler":
+        self.enable()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.disable()
+
+    def _wrap(self, phase: str, function):
+        stats = self.phases.setdefault(phase, PhaseStats())
+        stack = self._stack
+        stacks = self.stacks
+        trace_events = self.trace_events
+        clock = time.perf_counter_ns
+
+        @functools.wraps(function)
+        def timed(*args, **kwargs):
+            path = f"{stack[-1][1]};{phase}" if stack else phase
+            frame = [phase, path, 0]
+            stack.append(frame)
+            start = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                elapsed = clock() - start
+                stack.pop()
+                if stack:
+                    stack[-1][2] += elapsed
+                own = elapsed - frame[2]
+                stats.calls += 1
+                stats.total_ns += elapsed
+                stats.own_ns += own
+                stats.durations.record(elapsed)
+                stacks[path] = stacks.get(path, 0) + own
+                if trace_events is not None and len(trace_events) < MAX_TRACE_EVENTS:
+                    trace_events.append({"name": phase, "ph": "X", "pid": 0, "tid": 0,
+                                         "ts": (start - self._origin_ns) / 1000, "dur": elapsed / 1000})
+
+        return timed
+
+    def summary(self) -> str:
+        lines = [f"{'phase':<45} {'calls':>10} {'total ms':>10} {'own ms':>10} {'mean us':>9} "
+                 f"{'p50 us':>8} {'p99 us':>8} {'max us':>9}"]
+        for phase, stats in sorted(self.phases.items(), key=lambda item: item[1].own_ns, reverse=True):
+            if not stats.calls:
+                continue
+            durations = stats.durations
+            lines.append(f"{phase:<45} {stats.calls:>10} {stats.total_ns / 1e6:>10.1f} {stats.own_ns / 1e6:>10.1f} "
+                         f"{durations.mean() / 1e3:>9.2f} {durations.percentile(50) / 1e3:>8.2f} "
+                         f"{durations.percentile(99) / 1e3:>8.2f} {durations.max / 1e3:>9.1f}")
+        return "\n".join(lines)
+
+    def write_collapsed(self, path: str) -> None:
+        with open(path, "w") as f:
+            for stack, own_ns in self.stacks.items():
+                f.write(f"{stack} {own_ns // 1000}\n")     # in microseconds
+
+    def write_chrome_trace(self, path: str) -> None:
+        if self.trace_events is None:
+            raise ValueError("The profiler was not recording a trace (make it with trace=True)")
+        with open(path, "w") as f:
+            json.dump({"traceEvents": self.trace_events, "displayTimeUnit": "ms"}, f)
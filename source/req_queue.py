@@ -1,44 +1,218 @@
+from collections import deque
+from typing import Iterator
+
+from floor_index import FloorIndex
 from request import Request
 
 class ReqQueue:
     """
-    This class stores a list of Request instances.
+    This class stores the Request instances waiting for the lift.
     This class implements functionality for adding and removing Requests to the queue.
 
+    Internally, the requests are indexed by origin floor and direction (one FIFO bucket per (floor, upward) pair), so
+    that adding a request, counting the requests waiting at a floor and taking the next request waiting at a floor are
+    all O(1), regardless of how many requests are waiting in the building.
+    Each request is tagged with an arrival sequence number; remove_request() only drops the request from the arrival
+    index, and the stale bucket entry is skipped the next time that bucket is read.
+
     Attributes:
-        requests (list[Request]): A list containing the Request objects currently in the queue.
+        requests (list[Request]): A list containing the Request objects currently in the queue, in arrival order.
 
     Methods:
         __init__():
             The constructor initialises an empty queue.
 
         get_requests() -> list[Request]:
-            Returns the list of Requests in the queue.
+            Returns a copy of the list of Requests in the queue.
 
         add_request(req: Request) -> None:
             Add a new instance of Request to the queue.
 
         remove_request(req: Request) -> None:
             Remove a specified request from the queue (if it does indeed exist).
-        
+
+        count_at(floor: int, upward: bool | None = None) -> int:
+            Returns the number of requests waiting at a floor (optionally only those going in one direction).
+
+        requests_at(floor: int, upward: bool | None = None) -> Iterator[Request]:
+            Iterates over the requests waiting at a floor, in arrival order, without copying.
+
+        pop_at_floor(floor: int, upward: bool | None = None) -> Request | None:
+            Removes and returns the oldest request waiting at a floor, or None if nobody is waiting there.
+
+        pop_many_at_floor(floor: int, n: int, upward: bool | None = None) -> list[Request]:
+            Removes and returns the (up to) n oldest requests waiting at a floor, in arrival order.
+
+        waiting_floors() -> list[int]:
+            Returns the floors where at least one request is waiting, in ascending order.
+
+        floor_index -> FloorIndex:
+            Sorted index of the floors where requests are waiting (used by the lift to pick its next stop).
+
+        waiting_counts() -> dict[int, int]:
+            Returns the number of requests waiting on each floor.
+
+        __len__() -> int:
+            Returns the number of waiting requests.
+
+        __iter__() -> Iterator[Request]:
+            Iterates over the waiting requests in arrival order, without copying.
+
         __repr__() -> str:
             Returns a string representation of the current state of the queue.
     """
 
-    requests: list[Request]
-
     def __init__(self):
-        self.requests = []
+        self._next_seq: int = 0
+        self._requests: dict[Request, int] = {}                                 # request -> arrival sequence number
+        self._buckets: dict[tuple[int, bool], deque[tuple[int, Request]]] = {}  # (floor, upward) -> FIFO of entries
+        self._floor_index: FloorIndex = FloorIndex()                            # floors with live requests, sorted
+        self._bucket_counts: dict[tuple[int, bool], int] = {}                   # (floor, upward) -> number of live requests
+
+    @property
+    def requests(self) -> list[Request]:
+        return list(self._requests)
 
     def get_requests(self) -> list[Request]:
-        return self.requests.copy()
+        return list(self._requests)
 
     def add_request(self, req: Request) -> None:
-        self.requests.append(req)
+        """Adds a request to the queue. Adding a request which is already waiting in the queue has no effect."""
+        if req in self._requests:
+            return
+        seq = self._next_seq
+        self._next_seq += 1
+        self._requests[req] = seq
+
+        key = (req.origin_floor, req.is_upward())
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = deque()
+        bucket.append((seq, req))
+        self._bucket_counts[key] = self._bucket_counts.get(key, 0) + 1
+        self._floor_index.add(req.origin_floor)
 
     def remove_request(self, req: Request) -> None:
-        if req in self.requests:
-            self.requests.remove(req)
+        if req in self._requests:
+            del self._requests[req]
+            self._decrement_counts(req)
+
+    def count_at(self, floor: int, upward: bool | None = None) -> int:
+        if upward is None:
+            return self._floor_index.count(floor)
+        return self._bucket_counts.get((floor, upward), 0)
+
+    def requests_at(self, floor: int, upward: bool | None = None) -> Iterator[Request]:
+        """Yields the requests waiting at floor in arrival order. The queue must not be modified during iteration."""
+        if upward is not None:
+            for _, req in self._live_entries((floor, upward)):
+                yield req
+            return
+        up = iter(self._live_entries((floor, True)))
+        down = iter(self._live_entries((floor, False)))
+        next_up = next(up, None)
+        next_down = next(down, None)
+        while next_up is not None or next_down is not None:
+            if next_down is None or (next_up is not None and next_up[0] < next_down[0]):
+                yield next_up[1]
+                next_up = next(up, None)
+            else:
+                yield next_down[1]
+                next_down = next(down, None)
+
+    def pop_at_floor(self, floor: int, upward: bool | None = None) -> Request | None:
+        if upward is None:
+            up_head = self._head((floor, True))
+            down_head = self._head((floor, False))
+            if up_head is None and down_head is None:
+                return None
+            if down_head is None or (up_head is not None and up_head[0] < down_head[0]):
+                key = (floor, True)
+            else:
+                key = (floor, False)
+        else:
+            key = (floor, upward)
+            if self._head(key) is None:
+                return None
+
+        _, req = self._buckets[key].popleft()
+        del self._requests[req]
+        self._decrement_counts(req)
+        return req
+
+    def pop_many_at_floor(self, floor: int, n: int, upward: bool | None = None) -> list[Request]:
+        """
+        Batched version of pop_at_floor(): takes up to n requests at once, in arrival order, and updates the counts and
+        the floor index once for the whole batch. The cost is O(n), whatever the number of requests waiting elsewhere.
+        """
+        keys = [(floor, upward)] if upward is not None else [(floor, True), (floor, False)]
+        popped: list[Request] = []
+        popped_per_key = [0] * len(keys)
+        while len(popped) < n:
+            oldest = None
+            for i, key in enumerate(keys):
+                head = self._head(key)
+                if head is not None and (oldest is None or head[0] < oldest[1][0]):
+                    oldest = (i, head)
+            if oldest is None:
+                break
+            i, (_, req) = oldest
+            self._buckets[keys[i]].popleft()
+            del self._requests[req]
+            popped.append(req)
+            popped_per_key[i] += 1
+
+        for key, count in zip(keys, popped_per_key):
+            if count:
+                self._bucket_counts[key] -= count
+                if self._bucket_counts[key] == 0:
+                    del self._bucket_counts[key]
+                    self._buckets.pop(key, None)
+        if popped:
+            self._floor_index.remove(floor, len(popped))
+        return popped
+
+    @property
+    def floor_index(self) -> FloorIndex:
+        return self._floor_index
+
+    def waiting_floors(self) -> list[int]:
+        return self._floor_index.floors()
+
+    def waiting_counts(self) -> dict[int, int]:
+        return self._floor_index.counts()
+
+    def __len__(self) -> int:
+        return len(self._requests)
+
+    def __iter__(self) -> Iterator[Request]:
+        return iter(self._requests)
+
+    def _live_entries(self, key: tuple[int, bool]) -> Iterator[tuple[int, Request]]:
+        for seq, req in self._buckets.get(key, ()):
+            if self._requests.get(req) == seq:
+                yield seq, req
+
+    def _head(self, key: tuple[int, bool]) -> tuple[int, Request] | None:
+        """Returns the oldest live entry of a bucket, discarding any stale entries in front of it."""
+        bucket = self._buckets.get(key)
+        if not bucket:
+            return None
+        while bucket:
+            seq, req = bucket[0]
+            if self._requests.get(req) == seq:
+                return bucket[0]
+            bucket.popleft()
+        del self._buckets[key]
+        return None
+
+    def _decrement_counts(self, req: Request) -> None:
+        key = (req.origin_floor, req.is_upward())
+        self._bucket_counts[key] -= 1
+        if self._bucket_counts[key] == 0:
+            del self._bucket_counts[key]
+            self._buckets.pop(key, None)    # every entry left in the bucket is stale
+        self._floor_index.remove(req.origin_floor)
 
     def __repr__(self) -> str:
-        return f"ReqQueue({self.requests})"
+        return f"ReqQueue({list(self._requests)})"
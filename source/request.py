@@ -2,12 +2,19 @@ class Request:
     """
     Request class denotes an individual lift request.
     In our simulation, a request indicates a call to the lift from an origin floor to a destination floor.
+    The simulation also timestamps each request (in steps) when it is made, picked up and dropped off; these are
+    None until the event has happened.
     """
 
+    __slots__ = ("origin_floor", "destination_floor", "picked_up", "arrival_time", "pickup_time", "dropoff_time")
+
     def __init__(self, origin: int, destination: int):
         self.origin_floor = origin
         self.destination_floor = destination
         self.picked_up = False 
+        self.arrival_time: int | None = None
+        self.pickup_time: int | None = None
+        self.dropoff_time: int | None = None
 
     def is_upward(self) -> bool:
         return self.destination_floor > self.origin_floor
@@ -1,18 +1,126 @@
 import random
+from typing import Iterator
 
 from request import Request
 
-def simulate_requests(n_requests: int, max_floor: int) -> list[Request]:
-    """Generate random requests with floors between 1 and max_floor."""
+def simulate_requests(n_requests: int, max_floor: int, rng: random.Random | None = None) -> list[Request]:
+    """
+    Generate random requests with floors between 1 and max_floor.
+    The floors are drawn from rng if given (for reproducible runs), or from the global random module otherwise.
+    """
+    randint = rng.randint if rng is not None else random.randint
     requests: list[Request] = []
     for _ in range(n_requests):
-        start_floor: int = random.randint(1, max_floor)
-        end_floor: int = random.randint(1, max_floor)
+        start_floor: int = randint(1, max_floor)
+        end_floor: int = randint(1, max_floor)
 
         # Ensure start and end are different.
         while end_floor == start_floor:
-            end_floor = random.randint(1, max_floor)
+            end_floor = randint(1, max_floor)
         
         req: Request = Request(start_floor, end_floor)
         requests.append(req)
     return requests
+
+
+class RequestBatch:
+    """
+    A batch of requests stored as parallel NumPy arrays (origin floors, destination floors, and optionally the step at
+    which each request is made), as produced by simulate_request_arrays().
+    Request objects are only created when the batch is iterated or indexed, so a batch of millions of requests costs
+    a few bytes per request until the simulation actually needs them.
+
+    Attributes:
+        origins (np.ndarray):                 Origin floor of each request.
+        destinations (np.ndarray):            Destination floor of each request.
+        arrival_steps (np.ndarray | None):    Step at which each request is made (None if they are all made at step 0).
+    """
+
+    CHUNK_SIZE: int = 65536     # number of requests converted from the arrays at a time when iterating
+
+    def __init__(self, origins, destinations, arrival_steps=None):
+        self.origins = origins
+        self.destinations = destinations
+        self.arrival_steps = arrival_steps
+
+    def __len__(self) -> int:
+        return len(self.origins)
+
+    def __getitem__(self, i: int) -> Request:
+        return Request(int(self.origins[i]), int(self.destinations[i]))
+
+    def __iter__(self) -> Iterator[Request]:
+        """Yields the requests in order, creating each Request object only when it is reached."""
+        for start in range(0, len(self), self.CHUNK_SIZE):
+            end = start + self.CHUNK_SIZE
+            for origin, destination in zip(self.origins[start:end].tolist(), self.destinations[start:end].tolist()):
+                yield Request(origin, destination)
+
+    def arrivals(self) -> "BatchArrivals":
+        """
+        Returns the (step, request) pairs in order of arrival, for SimulationEngine.add_arrivals().
+        Requests without an arrival step are all made at step 0.
+        """
+        return BatchArrivals(self)
+
+    def __repr__(self) -> str:
+        return f"RequestBatch({len(self)} requests)"
+
+
+class BatchArrivals:
+    """
+    Iterator over the (step, request) pairs of a RequestBatch, in order of arrival (see RequestBatch.arrivals()).
+    Requests are created one chunk of the arrays at a time. Unlike a generator, the iterator can be pickled (for
+    example in a SimulationEngine snapshot), so a run reading it can be saved and restored.
+    """
+
+    def __init__(self, batch: RequestBatch):
+        self.batch: RequestBatch = batch
+        self.order = batch.arrival_steps.argsort(kind="stable") if batch.arrival_steps is not None else None
+        self.position: int = 0                      # index of the first request of the next chunk
+        self._chunk: list[tuple[int, int, int]] = []  # (step, origin, destination) of the current chunk, reversed
+
+    def __iter__(self) -> "BatchArrivals":
+        return self
+
+    def _read_chunk(self) -> None:
+        batch = self.batch
+        start, end = self.position, min(self.position + RequestBatch.CHUNK_SIZE, len(batch))
+        if self.order is None:
+            steps = [0] * (end - start)
+            chunk = slice(start, end)
+        else:
+            chunk = self.order[start:end]
+            steps = batch.arrival_steps[chunk].tolist()
+        self._chunk = list(zip(steps, batch.origins[chunk].tolist(), batch.destinations[chunk].tolist()))
+        self._chunk.reverse()
+        self.position = end
+
+    def __next__(self) -> tuple[int, Request]:
+        if not self._chunk:
+            if self.position >= len(self.batch):
+                raise StopIteration
+            self._read_chunk()
+        step, origin, destination = self._chunk.pop()
+        return step, Request(origin, destination)
+
+
+def simulate_request_arrays(n_requests: int, max_floor: int, rng=None, duration: int | None = None) -> RequestBatch:
+    """
+    Vectorised version of simulate_requests(): generates n_requests random requests with floors between 1 and
+    max_floor as NumPy arrays, in bulk.
+    rng can be a numpy.random.Generator, or a seed for a new one (None for a random seed).
+    The destination is drawn as a non-zero offset from the origin (wrapping around the building), which is uniform
+    over the other floors, so no retry loop is needed for origin == destination.
+    If duration is given, each request is also given a random arrival step in [0, duration).
+
+    Requires NumPy, which is only imported when this function is called.
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(rng)
+    origins = rng.integers(1, max_floor + 1, size=n_requests, dtype=np.int32)
+    offsets = rng.integers(1, max_floor, size=n_requests, dtype=np.int32)
+    destinations = (origins - 1 + offsets) % max_floor + 1
+    arrival_steps = rng.integers(0, duration, size=n_requests, dtype=np.int64) if duration is not None else None
+    return RequestBatch(origins, destinations, arrival_steps)
@@ -0,0 +1,271 @@
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING
+
+from direction import Direction
+
+if TYPE_CHECKING:
+    from lift import Lift   # lift.py imports this module for its default scheduler
+
+COST_REVERSAL_PENALTY: float = 4.0  # floors CostScheduler adds to the cost of a floor behind the lift (turning around)
+COST_PEOPLE_WEIGHT: float = 2.0     # floors CostScheduler takes off the cost of a floor per person getting off or on there
+COST_AGE_WEIGHT: float = 0.1        # floors CostScheduler takes off the cost of a floor per step its oldest request has waited
+
+
+class Scheduler(ABC):
+    """
+    A scheduler decides where a single lift goes next, among the requests it was assigned by the dispatcher. The lift
+    delegates its choices to it (see Lift), so the same lift mechanics (moving, stopping, boarding) can run any
+    algorithm. A scheduler holds no state of its own, so one instance can be shared by all the lifts of a bank.
+
+    Methods:
+        next_floor(lift: Lift) -> int | None:
+            Returns the floor the lift should head to next, or None if it has nowhere to go, and sets lift.direction
+            to the direction of that floor.
+
+        stops_at(lift: Lift, floor: int) -> bool:
+            Returns True if the lift, on its way to its next floor, stops at floor.
+
+        next_stop(lift: Lift, next_floor: int) -> int:
+            Returns the first floor where the lift stops on its way to next_floor (used to skip the floors in between).
+
+        boarding_direction(lift: Lift) -> bool | None:
+            Returns which of the people waiting at the lift's floor get on: those going up (True), down (False), or
+            anyone (None).
+    """
+
+    @abstractmethod
+    def next_floor(self, lift: "Lift") -> int | None:
+        ...
+
+    def stops_at(self, lift: "Lift", floor: int) -> bool:
+        """By default, the lift stops where someone gets off, or where someone is waiting and there is room."""
+        if lift.destination_index.count(floor) > 0:
+            return True
+        return not lift._is_full() and lift.request_queue.count_at(floor) > 0
+
+    def next_stop(self, lift: "Lift", next_floor: int) -> int:
+        """
+        By default, stops_at() is checked at each floor where someone gets off or is waiting between the lift and
+        next_floor, nearest first. This visits the occupied floors only, in O(log F) each for F floors.
+        """
+        up = next_floor > lift.current_floor
+        indexes = (lift.destination_index, lift.request_queue.floor_index)
+        floor = lift.current_floor
+        while True:
+            candidates = [c for c in (index.nearest_above(floor) if up else index.nearest_below(floor)
+                                      for index in indexes) if c is not None]
+            if not candidates:
+                return next_floor
+            floor = min(candidates) if up else max(candidates)
+            if (floor >= next_floor) if up else (floor <= next_floor):
+                return next_floor
+            if self.stops_at(lift, floor):
+                return floor
+
+    def boarding_direction(self, lift: "Lift") -> bool | None:
+        return None
+
+
+class LookScheduler(Scheduler):
+    """
+    Improved SCAN algorithm (also known as the elevator algorithm, or LOOK): the lift carries on in its direction while
+    there is a candidate floor ahead of it (a destination of someone onboard, or a floor where someone is waiting, if
+    the lift is not full), and turns around otherwise. It stops wherever someone is waiting, even when it is full, and
+    lets anyone on. This is the default scheduler.
+
+    The nearest candidate floor in each direction is looked up in the sorted floor indexes (destination_index and the
+    request queue's floor_index), so each decision costs O(log F) in the number of floors F, whatever the number of
+    requests.
+    """
+
+    def next_floor(self, lift: "Lift") -> int | None:
+        if lift.direction == Direction.NONE:
+            # we arbitrarily assign UP, the next part of the function will deal appropriately
+            lift.direction = Direction.UP
+
+        if lift.direction == Direction.UP:
+            next_up = lift._nearest_candidate_above()
+            if next_up is not None:
+                return next_up
+            # If no requests above, check for requests below (direction change)
+            next_down = lift._nearest_candidate_below()
+            if next_down is not None:
+                lift.direction = Direction.DOWN
+                return next_down
+
+        elif lift.direction == Direction.DOWN:
+            next_down = lift._nearest_candidate_below()
+            if next_down is not None:
+                return next_down
+            # If no requests below, check for requests above (direction change)
+            next_up = lift._nearest_candidate_above()
+            if next_up is not None:
+                lift.direction = Direction.UP
+                return next_up
+
+        # If we get here, there are no valid candidate floors
+        lift.direction = Direction.NONE
+        return None
+
+    def stops_at(self, lift: "Lift", floor: int) -> bool:
+        # check if any onboard requests have reached their destination, then if anyone is waiting at the floor
+        if lift.destination_index.count(floor) > 0:
+            return True
+        return lift.request_queue.count_at(floor) > 0
+
+    def next_stop(self, lift: "Lift", next_floor: int) -> int:
+        # next_floor is the nearest destination ahead, so only a floor where someone waits can come first (the lift
+        # stops there even when it is full and nobody can get on)
+        if next_floor > lift.current_floor:
+            waiting = lift.request_queue.floor_index.nearest_above(lift.current_floor)
+            return min(next_floor, waiting) if waiting is not None else next_floor
+        waiting = lift.request_queue.floor_index.nearest_below(lift.current_floor)
+        return max(next_floor, waiting) if waiting is not None else next_floor
+
+
+class CollectiveScheduler(Scheduler):
+    """
+    Directional collective control, as used by most real lifts: on its way up, the lift only answers the calls of
+    people going up (and lets off the people onboard), and the other way round on its way down. At the end of its
+    sweep (when there is nobody onboard going further and nobody waiting further), it goes to the furthest call
+    against its direction and turns around there. A full lift passes hall calls by.
+
+    Compared with LookScheduler, people are not picked up only to be carried the wrong way first, at the cost of a
+    lift passing floors where people wait.
+    """
+
+    def next_floor(self, lift: "Lift") -> int | None:
+        if lift.direction == Direction.NONE:
+            lift.direction = Direction.UP
+        for _ in range(2):
+            up = lift.direction == Direction.UP
+            target = self._sweep_target(lift, up)
+            if target is not None:
+                return target
+            lift.direction = Direction.DOWN if up else Direction.UP
+        lift.direction = Direction.NONE
+        return None
+
+    def _sweep_target(self, lift: "Lift", up: bool) -> int | None:
+        """
+        Returns the next floor of the lift's sweep in direction up: the nearest floor ahead where someone gets off or
+        someone going the same way is waiting, otherwise the furthest floor ahead where someone is waiting.
+        """
+        current = lift.current_floor
+        destinations = lift.destination_index
+        target = destinations.nearest_above(current) if up else destinations.nearest_below(current)
+        if lift._is_full():
+            return target
+        waiting = lift.request_queue.floor_index
+        floor = current
+        while True:
+            floor = waiting.nearest_above(floor) if up else waiting.nearest_below(floor)
+            if floor is None or (target is not None and ((floor >= target) if up else (floor <= target))):
+                break
+            if lift.request_queue.count_at(floor, up) > 0:
+                return floor
+        if target is None:
+            furthest = waiting.highest() if up else waiting.lowest()
+            if furthest is not None and ((furthest > current) if up else (furthest < current)):
+                return furthest
+        return target
+
+    def _sweep_continues(self, lift: "Lift", floor: int, up: bool) -> bool:
+        """Returns True if someone onboard gets off, or someone is waiting, beyond floor in direction up."""
+        for index in (lift.destination_index, lift.request_queue.floor_index):
+            if (index.nearest_above(floor) if up else index.nearest_below(floor)) is not None:
+                return True
+        return False
+
+    def stops_at(self, lift: "Lift", floor: int) -> bool:
+        if lift.destination_index.count(floor) > 0:
+            return True
+        if lift._is_full():
+            return False
+        if lift.direction == Direction.NONE:
+            return lift.request_queue.count_at(floor) > 0
+        up = lift.direction == Direction.UP
+        if lift.request_queue.count_at(floor, up) > 0:
+            return True
+        # a call against the direction of travel is answered at the end of the sweep only
+        return lift.request_queue.count_at(floor, not up) > 0 and not self._sweep_continues(lift, floor, up)
+
+    def boarding_direction(self, lift: "Lift") -> bool | None:
+        if lift.direction == Direction.NONE:
+            return None
+        up = lift.direction == Direction.UP
+        if lift.request_queue.count_at(lift.current_floor, up) > 0 or self._sweep_continues(lift, lift.current_floor, up):
+            return up
+        return not up   # end of the sweep: the lift turns around, so the people going the other way get on
+
+
+class CostScheduler(Scheduler):
+    """
+    Cost function scheduler: the lift heads for the candidate floor (where someone onboard gets off, or someone is
+    waiting and there is room) of lowest cost, where the cost of a floor is
+
+        floors to travel (+ COST_REVERSAL_PENALTY if the lift has to turn around)
+        - COST_PEOPLE_WEIGHT x number of people getting off or on there
+        - COST_AGE_WEIGHT x steps since the oldest of them made their request
+
+    so busy floors are served first, and nobody is starved. On its way, the lift stops wherever someone gets off or
+    can get on, and it only turns around at a floor where it stopped (or when there is nothing left ahead of it).
+
+    Every term but the distance is fixed between two events, and floors ahead of the lift all get closer at the same
+    rate, so the choice does not change while the lift travels (the event driven engine relies on it). Each decision scores every candidate floor and every person onboard, so it
+    costs O(C + capacity) for C occupied floors, rather than the O(log F) of LookScheduler.
+    """
+
+    def next_floor(self, lift: "Lift") -> int | None:
+        current = lift.current_floor
+        # number of people and oldest request time of each candidate floor
+        people: dict[int, int] = {}
+        oldest: dict[int, int] = {}
+        for req in lift.onboard_requests:
+            floor = req.destination_floor
+            people[floor] = people.get(floor, 0) + 1
+            arrival = req.arrival_time if req.arrival_time is not None else lift.clock
+            oldest[floor] = min(oldest.get(floor, arrival), arrival)
+        if not lift._is_full():
+            queue = lift.request_queue
+            for floor in queue.waiting_floors():
+                people[floor] = people.get(floor, 0) + queue.count_at(floor)
+                head = next(queue.requests_at(floor))
+                arrival = head.arrival_time if head.arrival_time is not None else lift.clock
+                oldest[floor] = min(oldest.get(floor, arrival), arrival)
+        people.pop(current, None)
+        if not people:
+            lift.direction = Direction.NONE
+            return None
+        if lift.direction != Direction.NONE and not lift.current_floor_stop:
+            # between two stops, the lift only turns around if there is nothing left ahead of it
+            up = lift.direction == Direction.UP
+            ahead = [floor for floor in people if (floor > current) == up]
+            if ahead:
+                people = {floor: people[floor] for floor in ahead}
+
+        best_floor = None
+        best_cost = 0.0
+        for floor in sorted(people):
+            cost = abs(floor - current)
+            if (floor < current) if lift.direction == Direction.UP else (floor > current and lift.direction == Direction.DOWN):
+                cost += COST_REVERSAL_PENALTY
+            cost -= COST_PEOPLE_WEIGHT * people[floor] + COST_AGE_WEIGHT * (lift.clock - oldest[floor])
+            if best_floor is None or cost < best_cost:
+                best_floor, best_cost = floor, cost
+        lift.direction = Direction.UP if best_floor > current else Direction.DOWN
+        return best_floor
+
+
+SCHEDULERS: dict[str, type[Scheduler]] = {
+    "look": LookScheduler,
+    "collective": CollectiveScheduler,
+    "cost": CostScheduler,
+}
+
+
+def make_scheduler(name: str) -> Scheduler:
+    """Returns a new scheduler from its name (one of the keys of SCHEDULERS)."""
+    if name not in SCHEDULERS:
+        raise ValueError(f"Unknown scheduler {name!r}, must be one of: {', '.join(SCHEDULERS)}")
+    return SCHEDULERS[name]()
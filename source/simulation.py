@@ -1,18 +1,28 @@
+import math
+import random
+import time
 import tkinter as tk
 
-from lift import Lift
+from arrivals import ArrivalCursor, make_arrivals
+from building import Building
+from dispatcher import make_dispatcher
 from lift import Direction
 from request_simulator import simulate_requests
+from scheduling import make_scheduler
 from input_parser import parse_config
 
 
 # CONSTANTS:
 
 STEP_DELAY_MS: int = 500                             # delay between lift steps in ms
-LIFT_STOP_DELAY_MS: int = 500                        # waiting time for lift stop at a floor
+DWELL_DELAY_MS_PER_SECOND: int = 100                 # delay added at a stop per second of dwell time (see DwellTimeModel)
 LIFT_DEFAULT_SPEED_FACTOR: float = 1.0               # default speed multiplier for the lift
 LIFT_MIN_SPEED_FACTOR: float = 0.5                   # minimum speed multiplier for the lift
-LIFT_MAX_SPEED_FACTOR: float = 3.0                   # maximum speed multiplier for the lift
+LIFT_MAX_SPEED_FACTOR: float = 20.0                  # maximum speed multiplier for the lift
+LIFT_SPEED_FACTOR_RESOLUTION: float = 0.5            # step of the speed slider
+
+FRAME_INTERVAL_MS: int = 33                          # delay between two redraws of the GUI (about 30 frames per second)
+FRAME_STEP_BUDGET_MS: int = 20                       # time the simulation may run for in each frame, so the GUI stays responsive
 
 
 GUI_BACKGROUND_COLOUR: str = "white"                 # background colour for the main window
@@ -20,14 +30,31 @@ GUI_WINDOW_TITLE: str = "Best Team Lift Simulator"   # window title
 GUI_DEFAULT_FONT: str = "Arial"                      # default font used in the GUI
 
 GUI_LIFT_COLOUR: str = "blue"                        # fill colour of the lift rectangle 
+GUI_LIFT_WIDTH: int = 50                             # width of a lift rectangle
+GUI_LIFT_SPACING: int = 10                           # horizontal gap between the lift rectangles of a bank of lifts
+GUI_CANVAS_MIN_WIDTH: int = 350                      # width of the canvas for a single lift
 
 GUI_FLOOR_HEIGHT: int = 40                           # height of each floor
+GUI_MAX_VISIBLE_FLOORS: int = 20                     # floors shown at once; the view of a taller building scrolls
+GUI_VIEW_MARGIN_FLOORS: int = 2                      # floors drawn beyond each edge of the view, off screen
+
+GUI_MINIMAP_WIDTH: int = 24                          # width of the minimap of a building which does not fit in the view
+GUI_MINIMAP_BIN_HEIGHT: int = 4                      # height (in pixels) of each group of floors of the minimap, at least
+GUI_MINIMAP_BACKGROUND: str = "#f2f2f2"              # colour of the minimap where nobody is waiting
+GUI_MINIMAP_VIEW_COLOUR: str = "black"               # outline of the part of the building in view, on the minimap
+# colour of a group of floors of the minimap, from the average number of people waiting per floor (the first met)
+GUI_MINIMAP_LEVELS: list[tuple[float, str]] = [(4.0, "#b00000"), (2.0, "#ff3333"), (1.0, "#ff8888"), (0.0, "#ffd0d0")]
 
 WAITING_INDICATOR_X_OFFSET: int = 60                 # x offset (in pixels) of the leftmost waiting indicator
 # this is necessary, as otherwise the waiting indicators overlap with the floor numbers
 WAITING_INDICATOR_RADIUS: int = 5                    # radius of waiting indicator circles
+WAITING_INDICATOR_MAX_CIRCLES: int = 10              # above this many people waiting on a floor, a numeric badge is shown
+WAITING_INDICATOR_COLOUR: str = "red"                # fill colour of the waiting indicator circles
+WAITING_BADGE_FONT_SIZE: int = 11                    # text font size of the waiting count badge
 
 SPEED_SLIDER_LABEL: str = "Simulation speed"         # label for speed slider element
+FAST_FORWARD_LABEL: str = "As fast as possible"      # label for the fast forward checkbox
+FOLLOW_LIFT_LABEL: str = "Follow lift"               # label for the checkbox scrolling the view along with a lift
 
 GUI_LIFT_TEXT_COLOUR: str = "white"                  # text colour for onboard counter in lift rectangle
 GUI_LIFT_TEXT_FONT: str = GUI_DEFAULT_FONT           # text font for onboard counter in lift rectangle
@@ -41,38 +68,97 @@ GUI_SIMULATION_FINISHED_TEXT: str = "Simulation finished!\n<3"
 
 
 class LiftSimulatorGUI:
-    def __init__(self, master, config_file):
+    def __init__(self, master, config, live_feed=None):
         self.master = master
         self.master.title(GUI_WINDOW_TITLE)
         
-        self.config = parse_config(config_file)
+        # config is the path of a configuration file, or a configuration already read by parse_config()
+        self.config = parse_config(config) if isinstance(config, str) else config
         self.total_floors: int = self.config["total_floors"]
         self.capacity: int = self.config["capacity"]
         self.num_requests: int = self.config["num_requests"]
+        self.num_lifts: int = self.config["num_lifts"]
 
         self.speed_multiplier = tk.DoubleVar(value=LIFT_DEFAULT_SPEED_FACTOR)
+        self.fast_forward = tk.BooleanVar(value=False)
+
+        # the simulation runs in batches of steps, and the GUI is redrawn once per frame (see simulation_frame)
+        self.step_credit_ms: float = 0.0     # time elapsed towards the next step, at the current speed
+        self.last_frame_time: float = 0.0    # time.perf_counter() at the previous frame
 
         self.floor_height = GUI_FLOOR_HEIGHT # i had to move this up because self.canvas = tk.Canvas(...)
         # required the floor_height to determine the size of the window
         
         # these are the simulation objects
-        self.lift = Lift(self.total_floors, self.capacity)
-        self.requests = simulate_requests(n_requests=self.num_requests, max_floor=self.total_floors)
+        self.building = Building(self.total_floors, self.capacity, self.num_lifts, make_dispatcher(self.config["dispatcher"]),
+                                 scheduler=make_scheduler(self.config["scheduler"]))
+        # every random draw of the GUI comes from this generator, so a run with a seed in the config is reproducible
+        self.rng = random.Random(self.config["seed"])
+        self.requests = simulate_requests(n_requests=self.num_requests, max_floor=self.total_floors, rng=self.rng)
         for req in self.requests:
-            self.lift.request_queue.add_request(req)
+            self.building.add_request(req)
+
+        # requests made while the simulation runs, read lazily from the arrival stream (None if there is none)
+        stream = make_arrivals(self.config["arrivals"], self.total_floors, self.config["arrival_rate"],
+                               seed=self.rng.getrandbits(64))
+        self.arrivals: ArrivalCursor | None = ArrivalCursor(stream) if stream is not None else None
+        # calls received from an external source while the simulation runs (a started LiveFeed), if any
+        self.live_feed = live_feed
         
-        canvas_height = self.total_floors * self.floor_height # this line dynamically adapts
-        # the height of the window based on the number of floors the user has specified.
-        # i implemented this otherwise the window looked really ugly for certain input parameters
-        self.canvas = tk.Canvas(master, width=350, height=canvas_height, bg=GUI_BACKGROUND_COLOUR)
+        # the canvas shows up to GUI_MAX_VISIBLE_FLOORS floors (this line dynamically adapts the height of the window
+        # based on the number of floors the user has specified, otherwise the window looked really ugly for certain
+        # input parameters). The building is laid out over building_height in canvas coordinates, and a taller
+        # building scrolls: only the floors in view have canvas items (see _show_floors), so a building of any
+        # height costs the same to draw.
+        self.visible_floors: int = min(self.total_floors, GUI_MAX_VISIBLE_FLOORS)
+        self.canvas_height: int = self.visible_floors * self.floor_height
+        self.building_height: int = self.total_floors * self.floor_height
+        self.scrollable: bool = self.total_floors > self.visible_floors
+        self.canvas_width: int = GUI_CANVAS_MIN_WIDTH + (self.num_lifts - 1) * (GUI_LIFT_WIDTH + GUI_LIFT_SPACING)
+        self.canvas = tk.Canvas(master, width=self.canvas_width, height=self.canvas_height, bg=GUI_BACKGROUND_COLOUR,
+                                scrollregion=(0, 0, self.canvas_width, self.building_height),
+                                yscrollincrement=self.floor_height, yscrollcommand=self._on_view_changed)
         self.canvas.pack(side="left", fill="both", expand=True)
+        self.scrollbar = None
+        self.minimap = None
+        if self.scrollable:
+            self.scrollbar = tk.Scrollbar(master, orient="vertical", command=self._scroll)
+            self.scrollbar.pack(side="left", fill="y")
+            self.minimap = tk.Canvas(master, width=GUI_MINIMAP_WIDTH, height=self.canvas_height,
+                                     bg=GUI_MINIMAP_BACKGROUND, highlightthickness=0)
+            self.minimap.pack(side="left", fill="y")
+            for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+                self.canvas.bind(sequence, self._on_mouse_wheel)
+            self.minimap.bind("<Button-1>", self._on_minimap_click)
+            self.minimap.bind("<B1-Motion>", self._on_minimap_click)
+        self.follow_lift = tk.BooleanVar(value=False)
+        self.followed_lift = tk.IntVar(value=1)     # number (from 1) of the lift the view follows
         
         # create the tk frame
         self.info_frame = tk.Frame(master)
         self.info_frame.pack(side="right", fill="y", padx=10, pady=10)
         
-        # Initialize lift_rect before drawing elements
-        self.lift_rect = None
+        # Initialize lift_rects before drawing elements (one rectangle and one onboard counter per lift)
+        self.lift_rects: list[int] = []
+        self.lift_texts: list[int] = []
+        self.drawn_lifts: list[tuple[int, int]] = []  # (floor, onboard count) each lift was last drawn with
+
+        # the floors in view are drawn by a fixed set of rows, floor f by row f % number of rows, and a row is moved
+        # to its new floor when the view scrolls (see _show_floors)
+        self.row_floors: list[int] = []                 # row -> floor the row currently draws (0 for none yet)
+        self.row_labels: list[int] = []                 # row -> text item of the floor number
+        # the canvas items of the waiting indicators are kept from one step to the next, and only the rows whose
+        # waiting count changed are updated (see _update_waiting_indicators)
+        self.waiting_circles: list[list[int]] = []      # row -> circle items created for the row so far
+        self.waiting_badges: dict[int, int] = {}        # row -> text item showing the waiting count
+        self.drawn_waiting: list[int] = []              # row -> waiting count currently drawn
+        # minimap: one rectangle per group of floors, coloured by how many people wait there (see _update_minimap)
+        self.minimap_bins: list[int] = []
+        self.minimap_colours: list[str] = []            # bin -> colour currently drawn
+        self.minimap_lifts: list[int] = []              # lift -> line item marking its floor
+        self.minimap_view: int | None = None            # rectangle outlining the floors in view
+        self.floors_per_bin: int = 1
+        self.status_text: str = ""
         
         # create and render all the visual elements
         self._draw_all_elements()
@@ -94,22 +180,77 @@ class LiftSimulatorGUI:
         self.add_requests_button.config(state="disabled")  # should not be able to add new requests before simulation has started
 
 
-    def _draw_building(self):
-        """Draw floor lines and labels on the canvas based on the current canvas width."""
+    def _draw_building(self, rows: int | None = None):
+        """
+        Creates the rows drawing the floors in view (floor lines, labels and waiting indicators), based on the
+        current canvas width: enough rows for the floors in view and GUI_VIEW_MARGIN_FLOORS beyond each edge, or rows.
+        """
         self.canvas.delete("floor")
-        canvas_width = int(self.canvas["width"]) # gets current canvas width
+        self.canvas.delete("waiting")
+        canvas_width = self.canvas_width
         LEFT_MARGIN = 10
         RIGHT_MARGIN = 10
         line_start = LEFT_MARGIN
         line_end = canvas_width - RIGHT_MARGIN
 
-        for i in range(1, self.total_floors + 1):
-            # calculate y-coordinate for i-th floor
-            y = (self.total_floors - i + 1) * self.floor_height
-            # floor line
-            self.canvas.create_line(line_start, y, line_end, y, fill="gray", tags="floor")
-            # write floor number
-            self.canvas.create_text(LEFT_MARGIN + 20, y - self.floor_height/2, text=str(i), tags="floor")
+        if rows is None:
+            rows = self.visible_floors + 2 * GUI_VIEW_MARGIN_FLOORS + 1 # + 1 for a floor partly in view at each edge
+        self.row_floors = [0] * rows
+        self.row_labels = []
+        self.waiting_circles = [[] for _ in range(rows)]
+        self.waiting_badges = {}
+        self.drawn_waiting = [0] * rows
+        for row in range(rows):
+            # each row starts below the building (as floor 0), and is moved to its floor by _show_floors
+            y = self._floor_y(0) + self.floor_height/2
+            self.canvas.create_line(line_start, y, line_end, y, fill="gray", tags=("floor", f"row{row}"))
+            self.row_labels.append(self.canvas.create_text(LEFT_MARGIN + 20, y - self.floor_height/2, text="",
+                                                           tags=("floor", f"row{row}")))
+        self.canvas.tag_raise("lift")
+        self.canvas.tag_raise("lift_text")
+        self._show_floors()
+
+
+    def _floor_y(self, floor: float) -> float:
+        """Returns the y coordinate of the middle of a floor, on the canvas (floor 1 at the bottom of the building)."""
+        return self.building_height - (floor - 0.5) * self.floor_height
+
+
+    def _floors_in_view(self) -> tuple[int, int]:
+        """Returns the lowest and highest floors (partly) in view."""
+        view_height = max(self.canvas.winfo_height(), self.canvas_height) # the canvas is 1 pixel high until shown
+        top = max(0, min(self.canvas.canvasy(0), self.building_height - view_height))
+        highest = self.total_floors - int(top // self.floor_height)
+        lowest = self.total_floors - int(min(top + view_height - 1, self.building_height - 1) // self.floor_height)
+        return max(lowest, 1), min(highest, self.total_floors)
+
+
+    def _show_floors(self) -> None:
+        """
+        Moves the rows to the floors in view and GUI_VIEW_MARGIN_FLOORS beyond (floor f is drawn by row f % number of
+        rows, so only the rows of the floors which came into view move), and creates more rows if the canvas grew.
+        """
+        lowest, highest = self._floors_in_view()
+        lowest = max(1, lowest - GUI_VIEW_MARGIN_FLOORS)
+        highest = min(self.total_floors, highest + GUI_VIEW_MARGIN_FLOORS)
+        rows = len(self.row_floors)
+        if highest - lowest + 1 > rows:
+            self._draw_building(highest - lowest + 1) # the canvas was made taller than the rows can cover
+            return
+
+        waiting_counts = None
+        for floor in range(lowest, highest + 1):
+            row = floor % rows
+            previous_floor = self.row_floors[row]
+            if previous_floor == floor:
+                continue
+            # everything of the row (line, label, waiting indicators) moves along with it
+            self.canvas.move(f"row{row}", 0, (previous_floor - floor) * self.floor_height)
+            self.canvas.itemconfig(self.row_labels[row], text=str(floor))
+            self.row_floors[row] = floor
+            if waiting_counts is None:
+                waiting_counts = self._get_waiting_counters()
+            self._draw_waiting_indicators(row, waiting_counts.get(floor, 0))
 
 
     def _draw_all_elements(self) -> None:
@@ -117,8 +258,14 @@ class LiftSimulatorGUI:
         self._draw_start_button()
         self._draw_add_requests_button()
         self._create_speed_slider()
+        self._create_fast_forward_checkbox()
         self._draw_building()
         self._draw_lift()
+        if self.scrollable:
+            self._create_follow_lift_checkbox()
+            self._draw_minimap()
+            self.canvas.yview_moveto(1.0) # the lifts start at the bottom of the building
+            self._show_floors()
         self._update_status("Simulation not started yet.")
 
     
@@ -127,7 +274,7 @@ class LiftSimulatorGUI:
             self.info_frame,
             from_=LIFT_MIN_SPEED_FACTOR, 
             to=LIFT_MAX_SPEED_FACTOR,
-            resolution=0.25,
+            resolution=LIFT_SPEED_FACTOR_RESOLUTION,
             orient="horizontal",
             label=SPEED_SLIDER_LABEL,
             variable=self.speed_multiplier,
@@ -137,35 +284,153 @@ class LiftSimulatorGUI:
         self.speed_slider.config(state="disabled") # not active before start of simulation
         self.speed_slider.pack(pady=10)
 
+
+    def _create_fast_forward_checkbox(self) -> None:
+        """When ticked, the simulation ignores the speed slider and runs as many steps as fit in each frame."""
+        self.fast_forward_checkbox = tk.Checkbutton(self.info_frame, text=FAST_FORWARD_LABEL, variable=self.fast_forward)
+        self.fast_forward_checkbox.pack(pady=10)
+        self.fast_forward_checkbox.config(state="disabled") # not active before start of simulation
+
     
-    def _update_lift_position(self) -> None:
-        canvas_height = int(self.canvas["height"])
-        canvas_width = int(self.canvas["width"])
-        y = canvas_height - (self.lift.current_floor - 0.5) * self.floor_height # this gets the y coordinate for the lift rect
-        LIFT_WIDTH = 50  # width of the lift rectangle
+    def _create_follow_lift_checkbox(self) -> None:
+        """When ticked, the view scrolls to keep a lift in sight (chosen with a spinbox if there are several)."""
+        self.follow_lift_checkbox = tk.Checkbutton(self.info_frame, text=FOLLOW_LIFT_LABEL, variable=self.follow_lift)
+        self.follow_lift_checkbox.pack(pady=10)
+        if self.num_lifts > 1:
+            self.followed_lift_spinbox = tk.Spinbox(self.info_frame, from_=1, to=self.num_lifts, width=4,
+                                                    textvariable=self.followed_lift, state="readonly")
+            self.followed_lift_spinbox.pack()
 
-        # lift is positioned 20 px from right edge
-        x2 = canvas_width - 20
-        x1 = x2 - LIFT_WIDTH
 
-        if self.lift_rect is None:
-            self.lift_rect = self.canvas.create_rectangle(x1, y - 15, x2, y + 15, fill=GUI_LIFT_COLOUR, tags="lift")
-        else:
-            self.canvas.coords(self.lift_rect, x1, y - 15, x2, y + 15)
-
-        # display the number of people onboard inside the lift rectangle
-        onboard_count = len(self.lift.onboard_requests)
-        if not hasattr(self, 'lift_text') or self.lift_text is None:
-            self.lift_text = self.canvas.create_text(
-                (x1 + x2) // 2, y,
-                text=str(onboard_count),
-                fill=GUI_LIFT_TEXT_COLOUR,
-                font=(GUI_LIFT_TEXT_FONT, GUI_LIFT_TEXT_FONT_SIZE, "bold"),
-                tags="lift_text"
-            )
+    def _draw_minimap(self) -> None:
+        """
+        Draws the minimap: the whole building squeezed into the height of the view, as groups of floors (at least
+        GUI_MINIMAP_BIN_HEIGHT pixels high each) coloured by how many people wait there, the lifts, and an outline of
+        the floors in view. Its number of items does not depend on the number of floors.
+        """
+        height = self.canvas_height
+        bins = max(1, min(self.total_floors, height // GUI_MINIMAP_BIN_HEIGHT))
+        self.floors_per_bin = math.ceil(self.total_floors / bins)
+        bins = math.ceil(self.total_floors / self.floors_per_bin)
+        for i in range(bins):
+            y1 = self._minimap_y((i + 1) * self.floors_per_bin + 0.5)
+            y2 = self._minimap_y(i * self.floors_per_bin + 0.5)
+            self.minimap_bins.append(self.minimap.create_rectangle(0, y1, GUI_MINIMAP_WIDTH, y2, width=0,
+                                                                   fill=GUI_MINIMAP_BACKGROUND))
+        self.minimap_colours = [GUI_MINIMAP_BACKGROUND] * bins
+        self.minimap_view = self.minimap.create_rectangle(1, 0, GUI_MINIMAP_WIDTH - 1, 0,
+                                                          outline=GUI_MINIMAP_VIEW_COLOUR)
+        for lift in self.building.lifts:
+            y = self._minimap_y(lift.current_floor)
+            self.minimap_lifts.append(self.minimap.create_line(0, y, GUI_MINIMAP_WIDTH, y, fill=GUI_LIFT_COLOUR,
+                                                               width=2))
+
+
+    def _minimap_y(self, floor: float) -> float:
+        """Returns the y coordinate of the middle of a floor on the minimap."""
+        return self.canvas_height * (1 - (floor - 0.5) / self.total_floors)
+
+
+    def _update_minimap(self, waiting_counts: dict[int, int]) -> None:
+        """Recolours the groups of floors whose waiting level changed, and moves the lift markers."""
+        waiting = [0] * len(self.minimap_bins)
+        for floor, count in waiting_counts.items():
+            waiting[(floor - 1) // self.floors_per_bin] += count
+        for i, count in enumerate(waiting):
+            colour = GUI_MINIMAP_BACKGROUND
+            if count:
+                density = count / self.floors_per_bin
+                colour = next(colour for level, colour in GUI_MINIMAP_LEVELS if density >= level)
+            if colour != self.minimap_colours[i]:
+                self.minimap.itemconfig(self.minimap_bins[i], fill=colour)
+                self.minimap_colours[i] = colour
+        for marker, lift in zip(self.minimap_lifts, self.building.lifts):
+            y = self._minimap_y(lift.current_floor)
+            self.minimap.coords(marker, 0, y, GUI_MINIMAP_WIDTH, y)
+
+
+    def _on_view_changed(self, first: str, last: str) -> None:
+        """Called by the canvas whenever its view scrolls (or is resized), with the fractions of the building in view."""
+        if self.scrollbar is not None:
+            self.scrollbar.set(first, last)
+        if self.minimap_view is not None:
+            self.minimap.coords(self.minimap_view, 1, float(first) * self.canvas_height,
+                                GUI_MINIMAP_WIDTH - 1, float(last) * self.canvas_height)
+        if self.row_floors:
+            self._show_floors()
+
+
+    def _scroll(self, *args) -> None:
+        """Scrolls the view from the scrollbar; scrolling by hand stops following the lift."""
+        self.follow_lift.set(False)
+        self.canvas.yview(*args)
+        self._show_floors()
+
+
+    def _on_mouse_wheel(self, event) -> None:
+        if event.num == 4 or getattr(event, "delta", 0) > 0:
+            self._scroll("scroll", -1, "units")
         else:
-            self.canvas.itemconfig(self.lift_text, text=str(onboard_count))
-            self.canvas.coords(self.lift_text, (x1 + x2) // 2, y)
+            self._scroll("scroll", 1, "units")
+
+
+    def _on_minimap_click(self, event) -> None:
+        """Scrolls the view to the floor clicked on the minimap."""
+        self.follow_lift.set(False)
+        self._scroll_to(self.total_floors * (1 - event.y / self.canvas_height) + 0.5)
+
+
+    def _scroll_to(self, floor: float) -> None:
+        """Scrolls the view so that floor is in the middle of it."""
+        top = self.building_height - (floor - 0.5) * self.floor_height - self.canvas_height / 2
+        self.canvas.yview_moveto(max(0.0, top) / self.building_height)
+        self._show_floors()
+
+
+    def _follow(self) -> None:
+        """Scrolls the view to the followed lift if it went out of the floors in view (keeping one floor around it)."""
+        floor = self.building.lifts[min(max(self.followed_lift.get(), 1), self.num_lifts) - 1].current_floor
+        lowest, highest = self._floors_in_view()
+        # at the bottom or the top of the building, the view cannot scroll any further
+        if (floor <= lowest and lowest > 1) or (floor >= highest and highest < self.total_floors):
+            self._scroll_to(floor)
+
+
+    def _update_lift_position(self) -> None:
+        canvas_width = self.canvas_width
+
+        for i, lift in enumerate(self.building.lifts):
+            onboard_count = len(lift.onboard_requests)
+            if i < len(self.drawn_lifts) and self.drawn_lifts[i] == (lift.current_floor, onboard_count):
+                continue # nothing to redraw for this lift
+            y = self._floor_y(lift.current_floor) # this gets the y coordinate for the lift rect
+
+            # the first lift is positioned 20 px from right edge, the others to its left
+            x2 = canvas_width - 20 - i * (GUI_LIFT_WIDTH + GUI_LIFT_SPACING)
+            x1 = x2 - GUI_LIFT_WIDTH
+
+            if i == len(self.lift_rects):
+                self.lift_rects.append(self.canvas.create_rectangle(x1, y - 15, x2, y + 15, fill=GUI_LIFT_COLOUR, tags="lift"))
+            else:
+                self.canvas.coords(self.lift_rects[i], x1, y - 15, x2, y + 15)
+
+            # display the number of people onboard inside the lift rectangle
+            if i == len(self.lift_texts):
+                self.lift_texts.append(self.canvas.create_text(
+                    (x1 + x2) // 2, y,
+                    text=str(onboard_count),
+                    fill=GUI_LIFT_TEXT_COLOUR,
+                    font=(GUI_LIFT_TEXT_FONT, GUI_LIFT_TEXT_FONT_SIZE, "bold"),
+                    tags="lift_text"
+                ))
+            else:
+                self.canvas.itemconfig(self.lift_texts[i], text=str(onboard_count))
+                self.canvas.coords(self.lift_texts[i], (x1 + x2) // 2, y)
+
+            if i == len(self.drawn_lifts):
+                self.drawn_lifts.append((lift.current_floor, onboard_count))
+            else:
+                self.drawn_lifts[i] = (lift.current_floor, onboard_count)
 
 
     def _get_waiting_counters(self) -> dict[int, int]:
@@ -173,31 +438,60 @@ class LiftSimulatorGUI:
         Returns a dictionary of type [int, int], which represents the number of people (requests) waiting on each floor.
         Example: {1: 3, 2: 7, 3: 0}
         """
-        waiting_counts = {}
-        for req in self.lift.request_queue.get_requests():
-            waiting_counts[req.origin_floor] = waiting_counts.get(req.origin_floor, 0) + 1
-        return waiting_counts
+        return self.building.waiting_counts()
     
 
-    def _draw_waiting_indicators(self, waiting_counts: dict[int, int]) -> None:
-        for floor, count in waiting_counts.items():
-            canvas_height = int(self.canvas["height"])
-            y = canvas_height - (floor - 0.5) * self.floor_height
-            start_x = WAITING_INDICATOR_X_OFFSET  
-            radius = WAITING_INDICATOR_RADIUS
-            for i in range(count):
-                circle_x = start_x + i * (2 * radius + 2)
-                self.canvas.create_oval(circle_x-radius, y-radius, circle_x+radius, y+radius, fill="red", tags="waiting")
-    
+    def _draw_waiting_indicators(self, row: int, count: int) -> None:
+        """
+        Shows count people waiting on the floor of a row: one circle per person, or a single circle and a numeric badge
+        above WAITING_INDICATOR_MAX_CIRCLES people. Circles are created the first time they are needed, then hidden and
+        shown again rather than deleted, so the cost only depends on how much the count changed.
+        """
+        y = self._floor_y(self.row_floors[row])
+        radius = WAITING_INDICATOR_RADIUS
+        circles = self.waiting_circles[row]
+        shown = count if count <= WAITING_INDICATOR_MAX_CIRCLES else 1
+        drawn = self.drawn_waiting[row]
+        drawn_shown = drawn if drawn <= WAITING_INDICATOR_MAX_CIRCLES else 1
+
+        for i in range(drawn_shown, shown):
+            if i == len(circles):
+                circle_x = WAITING_INDICATOR_X_OFFSET + i * (2 * radius + 2)
+                circles.append(self.canvas.create_oval(circle_x-radius, y-radius, circle_x+radius, y+radius,
+                                                       fill=WAITING_INDICATOR_COLOUR, tags=("waiting", f"row{row}")))
+            else:
+                self.canvas.itemconfig(circles[i], state="normal")
+        for i in range(shown, drawn_shown):
+            self.canvas.itemconfig(circles[i], state="hidden")
+
+        if count > WAITING_INDICATOR_MAX_CIRCLES:
+            badge_text = f"x {count}"
+            if row not in self.waiting_badges:
+                badge_x = WAITING_INDICATOR_X_OFFSET + 2 * radius + 4
+                self.waiting_badges[row] = self.canvas.create_text(
+                    badge_x, y, text=badge_text, anchor="w", fill=WAITING_INDICATOR_COLOUR,
+                    font=(GUI_DEFAULT_FONT, WAITING_BADGE_FONT_SIZE, "bold"), tags=("waiting", f"row{row}"))
+            else:
+                self.canvas.itemconfig(self.waiting_badges[row], text=badge_text, state="normal")
+        elif drawn > WAITING_INDICATOR_MAX_CIRCLES:
+            self.canvas.itemconfig(self.waiting_badges[row], state="hidden")
+
+        self.drawn_waiting[row] = count
+
 
     def _update_waiting_indicators(self) -> None:
         """
-        Draws little circles on each floor representing the number of waiting people,
-        positioned so that they do not overlap the floor numbers.
+        Draws little circles on each floor in view representing the number of waiting people,
+        positioned so that they do not overlap the floor numbers, and updates the minimap.
+        Only the floors whose waiting count changed since the last step are redrawn.
         """
-        self.canvas.delete("waiting") # reset waiting indicators
         waiting_counts: dict[int, int] = self._get_waiting_counters() # get waiting counts
-        self._draw_waiting_indicators(waiting_counts) # draw waiting indicators
+        for row, floor in enumerate(self.row_floors):
+            count = waiting_counts.get(floor, 0)
+            if count != self.drawn_waiting[row]:
+                self._draw_waiting_indicators(row, count)
+        if self.minimap is not None:
+            self._update_minimap(waiting_counts)
 
 
     def _gui_display_lift_direction(self, lift_direction) -> str:
@@ -208,10 +502,28 @@ class LiftSimulatorGUI:
 
     def _add_requests(self, n: int) -> None:
         """This function adds n new requests for the lift."""
-        new_requests = simulate_requests(n_requests=n, max_floor=self.total_floors)
+        new_requests = simulate_requests(n_requests=n, max_floor=self.total_floors, rng=self.rng)
         for req in new_requests:
             self.requests.append(req)
-            self.lift.request_queue.add_request(req)
+            self.building.add_request(req)
+
+    
+    def _release_arrivals(self) -> None:
+        """Makes the requests of the arrival stream which are due by the current step, and the calls of the live feed."""
+        if self.arrivals is not None:
+            for req in self.arrivals.release(self.building.clock):
+                self.building.add_request(req)
+        if self.live_feed is not None:
+            # never blocks: only the batches the feed's thread has already received are taken
+            for req in self.live_feed.drain():
+                self.building.add_request(req)
+
+
+    def _arrivals_pending(self) -> bool:
+        """Returns True if the arrival stream still has requests to make, or the live feed is still open."""
+        if self.live_feed is not None and not self.live_feed.finished():
+            return True
+        return self.arrivals is not None and not self.arrivals.exhausted()
 
     
     def _update_speed_multiplier(self, val: float) -> None:
@@ -220,23 +532,34 @@ class LiftSimulatorGUI:
 
     def _get_step_delay_ms(self) -> int:
         """Returns delay before next step in ms"""
-        delay: float = (STEP_DELAY_MS + LIFT_STOP_DELAY_MS * self.lift.current_floor_stop) * (1.0/self.speed_multiplier.get())
+        # the lifts move in lockstep, so the step lasts as long as the longest stop (crowded stops take longer)
+        dwell_time: float = max(lift.last_dwell_time for lift in self.building.lifts)
+        delay: float = (STEP_DELAY_MS + DWELL_DELAY_MS_PER_SECOND * dwell_time) * (1.0/self.speed_multiplier.get())
         return int(delay) # number of ms (as an int)
     
 
     def _get_status_text(self) -> str:
         """Returns the text to be displayed on top right for current lift status."""
-        status_text = (
-            f"----------- Status -----------\n\n"
-            f"Current Floor: {self.lift.current_floor}\n"
-            f"Direction: {self._gui_display_lift_direction(self.lift.direction)}\n"
-            f"Waiting: {len(self.lift.request_queue.get_requests())}\n"
-            f"Onboard: {len(self.lift.onboard_requests)}\n"
-            f"Stopping: {"Yes" if self.lift.current_floor_stop else "No"}\n"
-            f"People getting on: {"Yes" if self.lift.currently_onboarding else "No"}\n"
-            f"People getting off: {"Yes" if self.lift.currently_offboarding else "No"}\n"
-            f"\n-------------------------------\n"
-        )
+        status_text = f"----------- Status -----------\n\n"
+        status_text += f"Step: {self.building.clock}\n\n"
+        for i, lift in enumerate(self.building.lifts):
+            if self.num_lifts > 1:
+                status_text += f"Lift {i + 1}\n"
+            status_text += (
+                f"Current Floor: {lift.current_floor}\n"
+                f"Direction: {self._gui_display_lift_direction(lift.direction)}\n"
+                f"Waiting: {len(lift.request_queue)}\n"
+                f"Onboard: {len(lift.onboard_requests)}\n"
+                f"Stopping: {"Yes" if lift.current_floor_stop else "No"}\n"
+                f"People getting on: {"Yes" if lift.currently_onboarding else "No"}\n"
+                f"People getting off: {"Yes" if lift.currently_offboarding else "No"}\n"
+                f"\n"
+            )
+        if self.num_lifts > 1:
+            status_text += f"Not yet assigned: {len(self.building.hall_calls)}\n\n"
+        if self.live_feed is not None:
+            status_text += f"Live calls: {self.live_feed.stats.received} ({self.live_feed.stats.rejected} rejected)\n\n"
+        status_text += f"-------------------------------\n"
         return status_text
 
 
@@ -255,23 +578,73 @@ class LiftSimulatorGUI:
         self.start_button.destroy()
         self.add_requests_button.destroy()
         self.speed_slider.destroy()
+        self.fast_forward_checkbox.destroy()
+
+
+    def _simulation_running(self) -> bool:
+        """
+        Returns True while there is, either at least 1 request still remaining, or at least 1 person still on the
+        lift, or requests still to come.
+        """
+        return not self.building.is_idle() or self._arrivals_pending()
 
 
     def simulation_step(self) -> None:
-        """Performs a simulation step and schedules the next one."""
-        # the following if statement checks whether there is, either at least 1 request still remaining,
-        # or at least 1 person still on the lift; if so, we go through the logic
-        if self.lift.request_queue.get_requests() or self.lift.onboard_requests:
-            self.lift.move() # simulation goes forward by 1 move
-            self._update_lift_position() # update the position of the lift
-            self._update_waiting_indicators() # update the little circles of people waiting on each floor
-            
-            # update status label (on the right) with current info
-            status_text = self._get_status_text()
+        """Performs a single simulation step, without redrawing anything."""
+        self._release_arrivals()
+        self.building.move() # simulation goes forward by 1 move
+
+
+    def _run_steps(self, elapsed_ms: float) -> None:
+        """
+        Performs the simulation steps which are due after elapsed_ms more milliseconds at the current speed, or in
+        fast forward mode, as many steps as fit in FRAME_STEP_BUDGET_MS. Either way, the steps stop once
+        FRAME_STEP_BUDGET_MS is used up, so that a frame never takes much longer than FRAME_INTERVAL_MS.
+        """
+        deadline = time.perf_counter() + FRAME_STEP_BUDGET_MS / 1000
+        fast_forward = self.fast_forward.get()
+        self.step_credit_ms += elapsed_ms
+        while self._simulation_running():
+            if not fast_forward:
+                delay_ms = self._get_step_delay_ms()
+                if self.step_credit_ms < delay_ms:
+                    return
+                self.step_credit_ms -= delay_ms
+            self.simulation_step()
+            if time.perf_counter() >= deadline:
+                # the simulation is falling behind: drop the time we could not catch up on, rather than trying to
+                # catch up over the next frames (which would freeze the GUI)
+                self.step_credit_ms = 0.0
+                return
+
+
+    def _redraw(self) -> None:
+        """Redraws the lifts, the waiting indicators and the status label for the current step."""
+        if self.scrollable and self.follow_lift.get():
+            self._follow()
+        self._update_lift_position() # update the position of the lifts
+        self._update_waiting_indicators() # update the little circles of people waiting on each floor
+
+        # update status label (on the right) with current info, if it changed
+        status_text = self._get_status_text()
+        if status_text != self.status_text:
             self.status_label.config(text=status_text)
-            
-            delay_ms = self._get_step_delay_ms()
-            self.master.after(delay_ms, self.simulation_step)
+            self.status_text = status_text
+
+
+    def simulation_frame(self) -> None:
+        """
+        Runs the simulation steps due since the previous frame, redraws the GUI once, and schedules the next frame.
+        The frame rate is fixed (FRAME_INTERVAL_MS), whatever the speed: at high speeds a frame shows many steps at
+        once, rather than every step being drawn.
+        """
+        now = time.perf_counter()
+        self._run_steps((now - self.last_frame_time) * 1000)
+        self.last_frame_time = now
+
+        self._redraw()
+        if self._simulation_running():
+            self.master.after(FRAME_INTERVAL_MS, self.simulation_frame)
         else:
             self.status_label.config(text=GUI_SIMULATION_FINISHED_TEXT)
             self._destroy_buttons_and_sliders()
@@ -281,4 +654,7 @@ class LiftSimulatorGUI:
         self.start_button.config(state="disabled") # should not be able to press start button once the simulation has been started
         self.add_requests_button.config(state="normal") # can now add new requests
         self.speed_slider.config(state="normal") # can now change speed
-        self.simulation_step()
+        self.fast_forward_checkbox.config(state="normal")
+        self.last_frame_time = time.perf_counter()
+        self.step_credit_ms = self._get_step_delay_ms() # the first step is performed straight away
+        self.simulation_frame()
@@ -0,0 +1,273 @@
+import argparse
+import csv
+import hashlib
+import os
+import random
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import Iterator
+
+from cache import CACHE_DIRECTORY, DISK_BYTES, ResultCache
+from engine import SimulationResult, run_simulation
+from input_parser import parse_config
+from latency import LatencyHistogram
+from metrics_sink import MetricsSink
+
+DATA_DIRECTORY: str = os.path.join("performance_data", "data") # directory of the performance analysis csv files
+
+# csv headers used by the files in performance_data/data, by metric
+METRIC_HEADERS: dict[str, list[str]] = {
+    "moves": ["Simulation", "Total Floors", "Capacity", "Total Requests", "Moves"],
+    "ttsw": ["Simulation", "Total Floors", "Capacity", "Total Requests", "TTSW"],
+    "lor": ["simulation", "total_floors", "capacity", "total_requests", "lor", "visited_floors"],
+    "latency": ["Simulation", "Total Floors", "Capacity", "Total Requests", "Wait p50", "Wait p90", "Wait p99", "Wait max",
+                "Ride p50", "Ride p90", "Ride p99", "Ride max"],
+}
+
+
+@dataclass(frozen=True)
+class SweepTask:
+    """One simulation of a sweep: the parameters of the run, and the seed its requests are drawn from."""
+
+    simulation: int
+    total_floors: int
+    capacity: int
+    num_requests: int
+    seed: int
+
+
+@dataclass(frozen=True)
+class SweepPreset:
+    """
+    Parameters used to generate one of the csv files in performance_data/data.
+    Each parameter is either a list of values (every value is simulated, in order) or a (low, high) range (each run
+    draws a random value from the range, bounds included).
+    """
+
+    metric: str
+    path: str
+    runs: int
+    total_floors: list[int] | tuple[int, int]
+    capacity: list[int] | tuple[int, int]
+    num_requests: list[int] | tuple[int, int]
+    header: list[str] | None = None
+
+
+PRESETS: dict[str, SweepPreset] = {
+    "moves_vs_capacity": SweepPreset("moves", os.path.join("moves_data", "moves_vs_capacity.csv"), 30, [10], (2, 15), [30]),
+    "moves_vs_floors": SweepPreset("moves", os.path.join("moves_data", "moves_vs_floors.csv"), 30, (5, 20), [5], [30]),
+    "moves_vs_requests": SweepPreset("moves", os.path.join("moves_data", "moves_vs_requests.csv"), 30, [10], [5], (10, 50),
+                                     header=["Simulation", "Total Floors", "Capacity", "Num Requests", "Moves"]),
+    "ttsw_vs_capacity": SweepPreset("ttsw", os.path.join("ttsw_data", "ttsw_vs_capacity.csv"), 50, [10], (2, 15), [30]),
+    "ttsw_vs_floors": SweepPreset("ttsw", os.path.join("ttsw_data", "ttsw_vs_floors.csv"), 50, (3, 20), [5], [30]),
+    "ttsw_vs_requests": SweepPreset("ttsw", os.path.join("ttsw_data", "ttsw_vs_requests.csv"), 50, [10], [5], (10, 50)),
+    "lor_vs_time_varying_capacity": SweepPreset("lor", os.path.join("lor_data", "lor_vs_time_varying_capacity.csv"), 1,
+                                                [10], [4, 8, 12, 16, 20], [26]),
+    "lor_vs_time_varying_floors": SweepPreset("lor", os.path.join("lor_data", "lor_vs_time_varying_floors.csv"), 1,
+                                              [4, 8, 12, 16, 20], [20], [26]),
+    "lor_vs_time_varying_requests": SweepPreset("lor", os.path.join("lor_data", "lor_vs_time_varying_requests.csv"), 1,
+                                                [10], [20], [10, 20, 30, 40, 50]),
+}
+
+
+def derive_seed(base_seed: int, index: int) -> int:
+    """
+    Returns the seed for the index-th task of a sweep. The seed only depends on base_seed and index (not on the
+    process the task runs in, or the order tasks complete in), so a sweep gives the same results on any machine.
+    """
+    digest = hashlib.sha256(f"{base_seed}:{index}".encode()).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
+def make_tasks(total_floors: list[int] | tuple[int, int], capacity: list[int] | tuple[int, int],
+               num_requests: list[int] | tuple[int, int], runs: int = 1, base_seed: int = 0) -> list[SweepTask]:
+    """
+    Builds the tasks of a sweep. Parameters given as lists are combined as a grid (every combination, repeated runs
+    times); parameters given as (low, high) tuples are drawn at random for each of those runs.
+    """
+    rng = random.Random(base_seed)
+    grid = [(floors, cap, requests)
+            for floors in _grid_values(total_floors)
+            for cap in _grid_values(capacity)
+            for requests in _grid_values(num_requests)]
+    tasks: list[SweepTask] = []
+    for floors, cap, requests in grid:
+        for _ in range(runs):
+            index = len(tasks)
+            tasks.append(SweepTask(
+                simulation=index + 1,
+                total_floors=floors if floors is not None else rng.randint(*total_floors),
+                capacity=cap if cap is not None else rng.randint(*capacity),
+                num_requests=requests if requests is not None else rng.randint(*num_requests),
+                seed=derive_seed(base_seed, index),
+            ))
+    return tasks
+
+
+def _grid_values(values: list[int] | tuple[int, int]) -> list[int | None]:
+    """Returns the grid values of a parameter, or [None] for a random range (the value is drawn per task)."""
+    return list(values) if isinstance(values, list) else [None]
+
+
+def _metrics_path(metrics_directory: str, task: SweepTask) -> str:
+    return os.path.join(metrics_directory, f"simulation_{task.simulation}")
+
+
+def run_task(task: SweepTask, record_lor: bool = False, metrics_directory: str | None = None,
+             metrics_window: int = 1) -> SimulationResult:
+    """
+    Runs the simulation for a single task. This runs in the worker processes.
+    If metrics_directory is given, the per-step metrics are streamed to a subdirectory of it (see MetricsSink).
+    """
+    metrics_sink = None
+    if metrics_directory is not None:
+        metrics_sink = MetricsSink(_metrics_path(metrics_directory, task), task.capacity, metrics_window)
+    result = run_simulation(task.total_floors, task.capacity, task.num_requests, record_lor=record_lor,
+                            event_driven=True, seed=task.seed, metrics_sink=metrics_sink)
+    if metrics_sink is not None:
+        metrics_sink.close()
+    return result
+
+
+def task_config(task: SweepTask) -> dict:
+    """Returns the configuration a task is run with (the defaults of parse_config(), with the task's parameters)."""
+    overrides = {"total_floors": task.total_floors, "capacity": task.capacity, "num_requests": task.num_requests}
+    return parse_config(None, overrides=overrides, environ={})
+
+
+def _csv_row(metric: str, task: SweepTask, result: SimulationResult, metrics_directory: str | None = None) -> list:
+    row = [task.simulation, task.total_floors, task.capacity, task.num_requests]
+    if metric == "moves":
+        row.append(result.moves)
+    elif metric == "ttsw":
+        row.append(result.ttsw)
+    elif metric == "lor":
+        # with a metrics directory, the LOR series is in the run's .npy files rather than in the csv cell
+        lor = _metrics_path(metrics_directory, task) if metrics_directory is not None else str(result.lor)
+        row += [lor, str(result.visited_floors)]
+    else:
+        for histogram in (result.wait_times, result.ride_times):
+            row += [histogram.percentile(50), histogram.percentile(90), histogram.percentile(99), histogram.max]
+    return row
+
+
+def run_tasks(tasks: list[SweepTask], executor: Executor, workers: int | None = None, record_lor: bool = False,
+              metrics_directory: str | None = None, metrics_window: int = 1,
+              cache: ResultCache | None = None) -> Iterator[SimulationResult]:
+    """
+    Runs the tasks on executor, a pool of worker processes (see run_task()), and yields their results in task order,
+    as soon as they are available.
+    If cache is given, the results of tasks which were run before (same parameters, seed and code) are taken from it,
+    only the other tasks are simulated, and their results are added to it. The cache is not used with
+    metrics_directory, as the metrics files are written while the simulation runs.
+    """
+    if metrics_directory is not None:
+        cache = None
+    keys = [cache.key(task_config(task), task.seed, record_lor=record_lor) for task in tasks] if cache else []
+    cached = {i: result for i, result in enumerate(cache.get(key) for key in keys) if result is not None}
+    to_run = [task for i, task in enumerate(tasks) if i not in cached]
+
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(to_run) // (workers * 4))
+    worker = partial(run_task, record_lor=record_lor, metrics_directory=metrics_directory,
+                     metrics_window=metrics_window)
+    results = executor.map(worker, to_run, chunksize=chunksize)
+    for i in range(len(tasks)):
+        result = cached.get(i)
+        if result is None:
+            result = next(results)
+            if cache is not None:
+                cache.put(keys[i], result)
+        yield result
+
+
+def run_sweep(tasks: list[SweepTask], metric: str, output_path: str, workers: int | None = None,
+              header: list[str] | None = None, metrics_directory: str | None = None,
+              metrics_window: int = 1, cache: ResultCache | None = None) -> tuple[LatencyHistogram, LatencyHistogram]:
+    """
+    Runs the tasks across a pool of worker processes (one per core by default) and writes one csv row per task to
+    output_path, in task order. Rows are written as soon as they are available, so partial results are on disk while
+    the sweep is still running.
+    If metrics_directory is given, the per-step metrics of each run are streamed to .npy files in a subdirectory of it
+    (aggregated over metrics_window steps), and the lor cells of the csv file hold the path of that subdirectory.
+    If cache is given, the results of earlier runs are reused (see run_tasks()).
+    Returns the waiting time and ride time histograms of the whole sweep (all runs merged).
+    """
+    if metric not in METRIC_HEADERS:
+        raise ValueError(f"metric must be one of: {', '.join(METRIC_HEADERS)}")
+    record_lor = metric == "lor" and metrics_directory is None
+    wait_times = LatencyHistogram()
+    ride_times = LatencyHistogram()
+
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, "w", newline="") as f, ProcessPoolExecutor(max_workers=workers) as executor:
+        writer = csv.writer(f)
+        writer.writerow(header or METRIC_HEADERS[metric])
+        results = run_tasks(tasks, executor, workers, record_lor, metrics_directory, metrics_window, cache)
+        for task, result in zip(tasks, results):
+            writer.writerow(_csv_row(metric, task, result, metrics_directory))
+            f.flush()
+            wait_times.merge(result.wait_times)
+            ride_times.merge(result.ride_times)
+    return wait_times, ride_times
+
+
+def run_preset(name: str, data_directory: str = DATA_DIRECTORY, base_seed: int = 0, workers: int | None = None,
+               cache: ResultCache | None = None) -> str:
+    """Regenerates one of the csv files in performance_data/data (see run_sweep() for cache) and returns its path."""
+    preset = PRESETS[name]
+    tasks = make_tasks(preset.total_floors, preset.capacity, preset.num_requests, preset.runs, base_seed)
+    output_path = os.path.join(data_directory, preset.path)
+    run_sweep(tasks, preset.metric, output_path, workers, preset.header, cache=cache)
+    return output_path
+
+
+def _parse_values(text: str) -> list[int] | tuple[int, int]:
+    """Parses a parameter given on the command line: "a,b,c" is a list of values, "low:high" a random range."""
+    if ":" in text:
+        low, high = (int(value) for value in text.split(":"))
+        return (low, high)
+    return [int(value) for value in text.split(",")]
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run a parameter sweep of headless simulations in parallel.")
+    parser.add_argument("--preset", choices=[*PRESETS, "all"], help="regenerate one (or all) of the performance_data csv files")
+    parser.add_argument("--metric", choices=list(METRIC_HEADERS), default="moves", help="metric to write to the csv file")
+    parser.add_argument("--floors", type=_parse_values, default=[10], help='total_floors: "a,b,c" or random range "low:high"')
+    parser.add_argument("--capacity", type=_parse_values, default=[5], help='capacity: "a,b,c" or random range "low:high"')
+    parser.add_argument("--requests", type=_parse_values, default=[30], help='num_requests: "a,b,c" or random range "low:high"')
+    parser.add_argument("--runs", type=int, default=1, help="number of runs per combination of parameters")
+    parser.add_argument("--seed", type=int, default=0, help="base seed of the sweep")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes (default: one per core)")
+    parser.add_argument("--output", "-o", default="sweep.csv", help="output csv file (ignored with --preset)")
+    parser.add_argument("--data-dir", default=DATA_DIRECTORY, help="directory the --preset csv files are written to")
+    parser.add_argument("--metrics-dir", default=None, help="directory to stream the per-step metrics of each run to, as .npy columns")
+    parser.add_argument("--metrics-window", type=int, default=1, help="number of steps aggregated into each sample of --metrics-dir")
+    parser.add_argument("--cache", nargs="?", const=CACHE_DIRECTORY, default=None, metavar="DIR", help=f"reuse the results of earlier runs, cached in DIR (default {CACHE_DIRECTORY})")
+    parser.add_argument("--cache-size", type=int, default=DISK_BYTES // 2**20, help="size of the cache directory in MB, beyond which the least recently used results are deleted")
+    return parser.parse_args()
+
+
+def main():
+    args = _parse_args()
+    # without --cache, results are still reused within this sweep (presets share some of their runs)
+    cache = ResultCache(args.cache, disk_bytes=args.cache_size * 2**20)
+    if args.preset is not None:
+        names = list(PRESETS) if args.preset == "all" else [args.preset]
+        for name in names:
+            print(f"Wrote {run_preset(name, args.data_dir, args.seed, args.workers, cache)}")
+        print(f"{cache.stats.hits} simulations taken from the cache, {cache.stats.misses} run")
+        return
+
+    tasks = make_tasks(args.floors, args.capacity, args.requests, args.runs, args.seed)
+    wait_times, ride_times = run_sweep(tasks, args.metric, args.output, args.workers,
+                                       metrics_directory=args.metrics_dir, metrics_window=args.metrics_window,
+                                       cache=cache)
+    print(f"Wrote {len(tasks)} simulations to {args.output} ({cache.stats.hits} taken from the cache)")
+    for name, histogram in (("Wait", wait_times), ("Ride", ride_times)):
+        print(f"{name} times (steps) over the sweep: " + ", ".join(f"{key}={value:g}" for key, value in histogram.summary().items()))
+
+if __name__ == "__main__":
+    main()